@@ -1,17 +1,120 @@
-import { spawn } from "child_process";
+import { spawn, ChildProcessWithoutNullStreams } from "child_process";
+import readline from "readline";
 import path from "path";
 import fs from "fs-extra";
 
+interface PendingCall {
+    resolve: (value: any) => void;
+    reject: (error: Error) => void;
+}
+
 /**
  * Historian class - bridges to the liveGit Python version control system
  */
 export class Historian {
     private liveGitPath: string;
+    private server: ChildProcessWithoutNullStreams | null = null;
+    private pending = new Map<number, PendingCall>();
+    private nextId = 1;
 
     constructor(liveGitPath: string = "/Volumes/DEV/M4L-MCP/packages/python-scripts") {
         this.liveGitPath = liveGitPath;
     }
 
+    /**
+     * Start (once) the long-lived Python analysis server, which keeps parsed
+     * sessions warm between tool calls
+     */
+    private startServer(): ChildProcessWithoutNullStreams {
+        if (this.server) {
+            return this.server;
+        }
+
+        const scriptPath = path.join(this.liveGitPath, "ableton_server.py");
+        if (!fs.existsSync(scriptPath)) {
+            throw new Error(`Python script not found: ${scriptPath}`);
+        }
+
+        const server = spawn("python3", [scriptPath]);
+        let stderr = "";
+
+        readline.createInterface({ input: server.stdout }).on("line", (line) => {
+            let message: any;
+            try {
+                message = JSON.parse(line);
+            } catch {
+                return;
+            }
+
+            const call = this.pending.get(message.id);
+            if (!call) {
+                return;
+            }
+            this.pending.delete(message.id);
+
+            if (message.error) {
+                call.reject(new Error(`Python server error: ${message.error.message}`));
+            } else {
+                call.resolve(message.result);
+            }
+        });
+
+        // Analyzer progress output; keep the tail for error messages
+        server.stderr.on("data", (data) => {
+            stderr = (stderr + data.toString()).slice(-4000);
+        });
+
+        const fail = (error: Error) => {
+            if (this.server === server) {
+                this.server = null;
+            }
+            for (const call of this.pending.values()) {
+                call.reject(error);
+            }
+            this.pending.clear();
+        };
+
+        server.on("exit", (code) => {
+            fail(new Error(`Python server exited with code ${code}: ${stderr}`));
+        });
+
+        server.on("error", (error) => {
+            fail(new Error(`Failed to start Python server: ${error.message}`));
+        });
+
+        this.server = server;
+        return server;
+    }
+
+    /**
+     * Call a JSON-RPC method on the analysis server
+     */
+    private call(method: string, params: Record<string, unknown>): Promise<any> {
+        return new Promise((resolve, reject) => {
+            let server: ChildProcessWithoutNullStreams;
+            try {
+                server = this.startServer();
+            } catch (error) {
+                reject(error);
+                return;
+            }
+
+            const id = this.nextId++;
+            this.pending.set(id, { resolve, reject });
+            server.stdin.write(JSON.stringify({ jsonrpc: "2.0", id, method, params }) + "\n");
+        });
+    }
+
+    /**
+     * Stop the analysis server
+     */
+    dispose(): void {
+        if (this.server) {
+            this.server.stdin.end();
+            this.server = null;
+        }
+    }
+
     /**
      * Execute a Python script from the liveGit directory
      */
@@ -57,30 +160,25 @@ export class Historian {
      * Scan a project directory for versioned .als files
      */
     async scanVersions(projectPath: string): Promise<any> {
-        const output = await this.executePython("ableton_version_manager.py", [
-            "scan",
-            projectPath,
-        ]);
-        return this.parseOutput(output);
+        return await this.call("scan", { project_path: projectPath });
     }
 
     /**
      * Get version history for a project
      */
     async getVersionHistory(projectPath: string): Promise<any> {
-        const output = await this.executePython("ableton_version_manager.py", [
-            "history",
-            projectPath,
-        ]);
-
-        // Try to read the versions.json file directly for structured data
-        const historyPath = path.join(projectPath, "_history", "versions.json");
-        if (await fs.pathExists(historyPath)) {
-            const data = await fs.readJson(historyPath);
-            return data;
-        }
+        // versions.json is only a periodic snapshot (recent registrations sit in
+        // versions.journal), so ask the version manager for the merged database
+        return await this.call("history", { project_path: projectPath });
+    }
 
-        return this.parseOutput(output);
+    /**
+     * Get per-version metrics (tempo, counts, notes, automation) as one list per column
+     */
+    async getVersionMetrics(projectPath: string): Promise<any> {
+        // Read from _history/metrics.jsonl; only versions without a row are analyzed
+        const result = await this.call("metrics", { project_path: projectPath });
+        return result.columns;
     }
 
     /**
@@ -90,23 +188,19 @@ export class Historian {
         oldPath: string,
         newPath: string
     ): Promise<string> {
-        const output = await this.executePython("ableton_version_manager.py", [
-            "compare",
-            oldPath,
-            newPath,
-        ]);
-        return output;
+        const result = await this.call("compare", { old_file: oldPath, new_file: newPath });
+        return result.report;
     }
 
     /**
      * Compare the latest two versions in a project
      */
     async compareLatest(projectPath: string): Promise<string> {
-        const output = await this.executePython("ableton_version_manager.py", [
-            "diff-latest",
-            projectPath,
-        ]);
-        return output;
+        const result = await this.call("diff-latest", { project_path: projectPath });
+        if (!result.from_version) {
+            return result.report;
+        }
+        return `Comparing ${result.from_version} -> ${result.to_version}\n\n${result.report}`;
     }
 
     /**
@@ -139,10 +233,7 @@ export class Historian {
     async generateTimeline(projectPath: string): Promise<string> {
         const timelinePath = path.join(projectPath, "_history", "timeline.html");
 
-        await this.executePython("ableton_visualizer.py", [
-            projectPath,
-            timelinePath
-        ]);
+        await this.call("timeline", { project_path: projectPath, output: timelinePath });
 
         if (await fs.pathExists(timelinePath)) {
             return `Timeline generated at: ${timelinePath}`;
@@ -124,6 +124,20 @@ server.setRequestHandler(ListToolsRequestSchema, async () => {
                     required: ["projectPath"],
                 },
             },
+            {
+                name: "get_version_metrics",
+                description: "Get per-version metrics of an Ableton project (tempo, track/clip/device counts, total and per-track notes, automation points), one list per column, oldest version first.",
+                inputSchema: {
+                    type: "object",
+                    properties: {
+                        projectPath: {
+                            type: "string",
+                            description: "The absolute path to the Ableton project directory",
+                        },
+                    },
+                    required: ["projectPath"],
+                },
+            },
             {
                 name: "compare_versions",
                 description: "Compare two specific versions of an Ableton project to see what changed.",
@@ -332,6 +346,14 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
             };
         }
 
+        if (name === "get_version_metrics") {
+            const { projectPath } = args as { projectPath: string };
+            const metrics = await historian.getVersionMetrics(projectPath);
+            return {
+                content: [{ type: "text", text: JSON.stringify(metrics) }],
+            };
+        }
+
         if (name === "compare_versions") {
             const { oldPath, newPath } = args as { oldPath: string; newPath: string };
             const diff = await historian.compareVersions(oldPath, newPath);
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Ableton Version Archive
+Stores project versions as periodic keyframes plus line-level XML deltas under _history/archive/.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from ableton_loader import iter_chunks
+
+
+# A full copy is kept every this many archived versions
+DEFAULT_KEYFRAME_EVERY = 16
+
+# Lines that must match before a copy is taken from elsewhere in the old version
+MIN_COPY_RUN = 4
+
+# A delta is a list of ops against the previous version's lines:
+# [start, end] copies old lines start..end-1, a string is inserted text.
+DeltaOp = Union[List[int], str]
+
+
+def read_xml(file_path) -> str:
+    """Decompressed XML of an Ableton file."""
+    return b''.join(iter_chunks(file_path)).decode('utf-8')
+
+
+def line_delta(old: List[str], new: List[str]) -> List[DeltaOp]:
+    """Copy/insert ops that turn ``old`` lines into ``new`` lines.
+
+    Runs in one pass over ``new``: lines continue the current copy while
+    they match, and after a mismatch the next occurrence of the line in
+    ``old`` (found through a line -> positions map) restarts the copy if
+    at least MIN_COPY_RUN lines agree. Edited values, inserted clips and
+    moved tracks all come out as a handful of ops.
+    """
+    positions: Dict[str, List[int]] = defaultdict(list)
+    for i, line in enumerate(old):
+        positions[line].append(i)
+
+    ops: List[DeltaOp] = []
+    literal: List[str] = []
+    old_len, new_len = len(old), len(new)
+    pos = anchor = 0
+    j = 0
+    while j < new_len:
+        if pos < old_len and old[pos] == new[j]:
+            start = pos
+            while pos < old_len and j < new_len and old[pos] == new[j]:
+                pos += 1
+                j += 1
+            if literal:
+                ops.append(''.join(literal))
+                literal = []
+            ops.append([start, pos])
+            anchor = pos
+            continue
+
+        candidate = _find_copy(old, new, j, positions.get(new[j]), anchor)
+        if candidate is not None:
+            pos = candidate
+            continue
+
+        # No copy here: emit the line and assume it replaced one old line
+        literal.append(new[j])
+        j += 1
+        pos += 1
+
+    if literal:
+        ops.append(''.join(literal))
+    return ops
+
+
+def _find_copy(old: List[str], new: List[str], j: int,
+               candidates: Optional[List[int]], anchor: int) -> Optional[int]:
+    """Nearest position at or after ``anchor`` (else the first anywhere) where a copy run starts."""
+    if not candidates:
+        return None
+    first = bisect_left(candidates, anchor)
+    for index in (first, 0):
+        if index >= len(candidates):
+            continue
+        start = candidates[index]
+        run = old[start:start + MIN_COPY_RUN]
+        if run == new[j:j + len(run)] and (len(run) == MIN_COPY_RUN or start + len(run) == len(old)):
+            return start
+    return None
+
+
+def apply_delta(old: List[str], ops: List[DeltaOp]) -> List[str]:
+    """Rebuild the new version's lines from the previous version's lines."""
+    lines: List[str] = []
+    for op in ops:
+        if isinstance(op, str):
+            lines.extend(op.splitlines(keepends=True))
+        else:
+            lines.extend(old[op[0]:op[1]])
+    return lines
+
+
+def _write_als(lines: List[str], path: Path):
+    """Gzip XML lines to ``path`` byte for byte, with no name or timestamp in the header.
+
+    Bytes are written as they are (no newline translation), so the file's
+    XML matches the archived checksum, and every rebuild of a version has
+    the same bytes, so summary cache lookups by content hash hit.
+    """
+    with open(path, 'wb') as raw:
+        with gzip.GzipFile(filename='', fileobj=raw, mode='wb', mtime=0) as f:
+            f.write(''.join(lines).encode('utf-8'))
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class VersionArchive:
+    """Append-only archive of a project's versions.
+
+    ``archive.jsonl`` has one record per version, in archive order. Every
+    ``keyframe_every``-th version is stored as a copy of the original
+    ``.als``; the others are gzipped deltas against the version before.
+    Reading a version replays at most ``keyframe_every - 1`` deltas from
+    its keyframe, and the result is checked against the stored SHA-256 of
+    its XML.
+    """
+
+    DIRNAME = 'archive'
+    INDEX_FILENAME = 'archive.jsonl'
+
+    def __init__(self, history_dir, keyframe_every: int = DEFAULT_KEYFRAME_EVERY):
+        self.directory = Path(history_dir) / self.DIRNAME
+        self.index_path = self.directory / self.INDEX_FILENAME
+        self.keyframe_every = keyframe_every
+        self.records: List[Dict] = []
+        self._by_version: Dict[str, int] = {}
+        # Lines of the last archived version, so consecutive adds diff without re-reading it
+        self._last_lines: Optional[List[str]] = None
+        self._load()
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from an interrupted process
+                    continue
+                if (self.directory / record['object']).exists():
+                    self._by_version[record['version']] = len(self.records)
+                    self.records.append(record)
+
+    def __contains__(self, version: str) -> bool:
+        return version in self._by_version
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def record(self, version: str) -> Optional[Dict]:
+        """Archive record of a version, or None if it is not archived."""
+        position = self._by_version.get(version)
+        return self.records[position] if position is not None else None
+
+    def add(self, version: str, file_path) -> Dict:
+        """Archive one version; versions must be added in order."""
+        if version in self._by_version:
+            return self.records[self._by_version[version]]
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        xml = read_xml(file_path)
+        lines = xml.splitlines(keepends=True)
+        record = {
+            'version': version,
+            'filename': Path(file_path).name,
+            'sha256': _sha256(xml),
+            'xml_bytes': len(xml.encode('utf-8')),
+        }
+
+        since_keyframe = 0
+        for previous in reversed(self.records):
+            if previous['kind'] == 'keyframe':
+                break
+            since_keyframe += 1
+
+        if not self.records or since_keyframe + 1 >= self.keyframe_every:
+            record.update(kind='keyframe', object=f"{version}.als")
+            shutil.copyfile(file_path, self.directory / record['object'])
+        else:
+            base = self.records[-1]
+            old_lines = self._last_lines
+            if old_lines is None:
+                old_lines = self.read_lines(base['version'])
+            ops = line_delta(old_lines, lines)
+            record.update(kind='delta', base=base['version'], object=f"{version}.delta.gz")
+            with gzip.open(self.directory / record['object'], 'wt', encoding='utf-8') as f:
+                json.dump(ops, f, separators=(',', ':'))
+
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        self._by_version[version] = len(self.records)
+        self.records.append(record)
+        self._last_lines = lines
+        return record
+
+    def read_lines(self, version: str) -> List[str]:
+        """XML lines of an archived version, verified against its checksum."""
+        if version not in self._by_version:
+            raise KeyError(f"Version {version} is not archived")
+        position = self._by_version[version]
+        start = position
+        while self.records[start]['kind'] != 'keyframe':
+            start -= 1
+
+        lines = read_xml(self.directory / self.records[start]['object']).splitlines(keepends=True)
+        for record in self.records[start + 1:position + 1]:
+            with gzip.open(self.directory / record['object'], 'rt', encoding='utf-8') as f:
+                lines = apply_delta(lines, json.load(f))
+
+        if _sha256(''.join(lines)) != self.records[position]['sha256']:
+            raise ValueError(f"Archived version {version} failed its checksum")
+        return lines
+
+    def restore(self, version: str, output_path) -> Path:
+        """Write an archived version back out as a gzipped ``.als`` file."""
+        output_path = Path(output_path)
+        record = self.record(version)
+        if record is not None and record['kind'] == 'keyframe':
+            shutil.copyfile(self.directory / record['object'], output_path)
+            return output_path
+
+        lines = self.read_lines(version)
+        tmp_path = output_path.with_name(output_path.name + '.tmp')
+        _write_als(lines, tmp_path)
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    def verify(self, version: str, file_path) -> bool:
+        """Whether the archive rebuilds ``file_path``'s exact XML for this version."""
+        record = self.record(version)
+        if record is None or _sha256(read_xml(file_path)) != record['sha256']:
+            return False
+        try:
+            self.read_lines(version)
+        except (OSError, ValueError):
+            return False
+        return True
+
+    @contextlib.contextmanager
+    def restored(self, version: str) -> Iterator[Path]:
+        """A readable ``.als`` of an archived version, for as long as the block runs.
+
+        Keyframes are used in place. Other versions are rebuilt (and checked)
+        into a temporary file written like ``restore`` writes them.
+        """
+        record = self.record(version)
+        if record is None:
+            raise KeyError(f"Version {version} is not archived")
+        if record['kind'] == 'keyframe':
+            yield self.directory / record['object']
+            return
+
+        lines = self.read_lines(version)
+        # Per process, so concurrent readers never remove each other's copy
+        tmp_path = self.directory / f"{version}.{os.getpid()}.restored.als"
+        _write_als(lines, tmp_path)
+        try:
+            yield tmp_path
+        finally:
+            tmp_path.unlink()
+
+    def disk_usage(self) -> int:
+        """Bytes used by the archive's files."""
+        return sum(p.stat().st_size for p in self.directory.iterdir() if p.is_file())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Ableton Summary Cache
+Persists parsed session summaries under _history/ so unchanged versions are never re-parsed.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock; appends and rewrites run unlocked
+    fcntl = None
+
+from ableton_version_manager import summarize_file
+from ableton_profile import PROFILER
+from ableton_store import VersionStore, store_enabled
+
+
+# Bump whenever the summary layout or the analysis behind it changes;
+# caches written by another version are discarded on load.
+CACHE_VERSION = 5
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def file_digest(file_path, chunk_size: int = 1 << 20) -> str:
+    """Content hash of a file as stored on disk (compressed bytes)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Size-bounded LRU cache of ``EnhancedAbletonAnalyzer.get_summary()`` results.
+
+    Everything lives in one JSON-lines file holding three kinds of record:
+    summaries keyed by content hash, path records mapping (path, size,
+    mtime) to a hash, and ``touch`` records. Records are only ever
+    appended, so the order of lines is the LRU order; the file is rewritten
+    only when it outgrows ``max_bytes`` or is mostly stale.
+
+    A matching (path, size, mtime) is a hit without reading the file. A
+    changed stat falls back to the content hash, so touched, copied or
+    renamed versions still hit.
+
+    The watcher, the server and the CLI may share one cache file. Appends
+    and rewrites hold an advisory lock (where ``fcntl`` exists) and first
+    replay what other processes appended, so a rewrite never drops their
+    records; a file another process rewrote is read again from the start.
+    """
+
+    FILENAME = 'analysis_cache.jsonl'
+    LOCK_FILENAME = 'analysis_cache.lock'
+
+    def __init__(self, history_dir, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(history_dir) / self.FILENAME
+        self.lock_path = Path(history_dir) / self.LOCK_FILENAME
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._paths: Dict[str, Tuple[int, int, str]] = {}
+        self._touched: 'OrderedDict[str, None]' = OrderedDict()
+        # Hashes computed by lookup() misses, reused by the store() that follows
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        # Bytes of the file already replayed, and which file (device, inode) they came from
+        self._file_bytes = 0
+        self._file_id: Optional[Tuple[int, int]] = None
+        with self._locked():
+            self._replay()
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the cache's advisory lock for the block (a no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _replay(self):
+        """Apply records appended since the last replay; ignore a file written by another cache version."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            stat = None
+        file_id = (stat.st_dev, stat.st_ino) if stat is not None else None
+        if file_id != self._file_id or (stat is not None and stat.st_size < self._file_bytes):
+            # Rewritten or removed by another process; start over from its contents
+            self._entries.clear()
+            self._sizes.clear()
+            self._paths.clear()
+            self._file_bytes = 0
+            self._file_id = file_id
+        if stat is None or stat.st_size == self._file_bytes:
+            return
+
+        with open(self.path, 'rb') as f:
+            if self._file_bytes == 0:
+                try:
+                    version = json.loads(f.readline()).get('cache_version')
+                except ValueError:
+                    version = None
+                if version != CACHE_VERSION:
+                    return
+            else:
+                f.seek(self._file_bytes)
+            for line in f:
+                self._apply(line)
+            self._file_bytes = f.tell()
+
+    def _apply(self, line: bytes):
+        """Update the in-memory state with one record line."""
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Torn write from an interrupted process
+            return
+        if 'touch' in record:
+            if record['touch'] in self._entries:
+                self._entries.move_to_end(record['touch'])
+        elif 'path' in record:
+            self._paths[record['path']] = (record['size'], record['mtime_ns'], record['hash'])
+        else:
+            self._entries[record['hash']] = record['summary']
+            self._entries.move_to_end(record['hash'])
+            self._sizes[record['hash']] = len(line)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, file_path, streaming: Optional[bool] = None) -> Dict:
+        """Return the summary for ``file_path``, analyzing it only on a miss."""
+        summary = self.lookup(file_path)
+        if summary is None:
+            summary = self.store(file_path, summarize_file(file_path, streaming))
+        return summary
+
+    def lookup(self, file_path) -> Optional[Dict]:
+        """Return the cached summary for ``file_path`` without ever analyzing it."""
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+
+        ident = self._paths.get(path)
+        if ident is not None and ident[:2] == (stat.st_size, stat.st_mtime_ns) and ident[2] in self._entries:
+            PROFILER.count('summary_cache_hits')
+            self._touch(ident[2])
+            return self._entries[ident[2]]
+
+        key = file_digest(path)
+        if key not in self._entries:
+            PROFILER.count('summary_cache_misses')
+            self._digests[(path, stat.st_size, stat.st_mtime_ns)] = key
+            return None
+        PROFILER.count('summary_cache_hits')
+        summary = self._entries[key]
+        self._touch(key)
+        self._record_path(path, stat, key)
+        return summary
+
+    def store(self, file_path, summary: Dict) -> Dict:
+        """Add a freshly computed summary; returns it as a later hit would."""
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+        key = self._digests.pop((path, stat.st_size, stat.st_mtime_ns), None) or file_digest(path)
+
+        line = json.dumps({'hash': key, 'summary': summary}, separators=(',', ':')) + '\n'
+        path_line = json.dumps({'path': path, 'size': stat.st_size,
+                                'mtime_ns': stat.st_mtime_ns, 'hash': key}) + '\n'
+        self._append(line + path_line)
+        # Entries are parsed back from their lines, so this is what a later hit returns
+        return self._entries[key]
+
+    def _record_path(self, path: str, stat: os.stat_result, key: str):
+        self._append(json.dumps({'path': path, 'size': stat.st_size,
+                                 'mtime_ns': stat.st_mtime_ns, 'hash': key}) + '\n')
+
+    def _touch(self, key: str):
+        self._entries.move_to_end(key)
+        self._touched[key] = None
+        self._touched.move_to_end(key)
+
+    def _header(self) -> str:
+        return json.dumps({'cache_version': CACHE_VERSION}) + '\n'
+
+    def _append(self, text: str):
+        """Append records after replaying other processes' appends."""
+        with self._locked():
+            self._replay()
+            self._write(text)
+
+    def _write(self, text: str):
+        """Append records (lock held, state replayed) and apply them."""
+        data = text.encode('utf-8')
+        if self._file_bytes == 0:
+            # New file, or one written by another cache version
+            self._replace(self._header().encode('utf-8') + data)
+        else:
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            self._file_bytes += len(data)
+        for line in data.splitlines(keepends=True):
+            self._apply(line)
+
+    def flush(self):
+        """Persist recency, evicting least recently used entries over the size bound."""
+        with self._locked():
+            self._replay()
+            live_bytes = sum(self._sizes.values())
+            evicted = False
+            while live_bytes > self.max_bytes and len(self._entries) > 1:
+                key, _ = self._entries.popitem(last=False)
+                live_bytes -= self._sizes.pop(key)
+                self._touched.pop(key, None)
+                evicted = True
+
+            if evicted or self._file_bytes > 2 * live_bytes + (1 << 16):
+                self._compact()
+            elif self._touched:
+                self._write(''.join(json.dumps({'touch': key}) + '\n' for key in self._touched))
+            self._touched.clear()
+
+    def close(self):
+        """Flush; the cache keeps no file open between writes."""
+        self.flush()
+
+    def _compact(self):
+        """Rewrite the file with only live records, least recently used first (lock held)."""
+        self._paths = {path: ident for path, ident in self._paths.items()
+                       if ident[2] in self._entries}
+        lines = [self._header()]
+        for key, summary in self._entries.items():
+            lines.append(json.dumps({'hash': key, 'summary': summary}, separators=(',', ':')) + '\n')
+        for path, (size, mtime_ns, key) in self._paths.items():
+            lines.append(json.dumps({'path': path, 'size': size,
+                                     'mtime_ns': mtime_ns, 'hash': key}) + '\n')
+        self._replace(''.join(lines).encode('utf-8'))
+
+    def _replace(self, data: bytes):
+        """Swap in a whole new cache file (lock held)."""
+        # Per process, so concurrent writers never share a temporary file
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        stat = self.path.stat()
+        self._file_bytes = stat.st_size
+        self._file_id = (stat.st_dev, stat.st_ino)
+
+
+class StoreSummaryCache:
+    """``SummaryCache`` interface over the project's SQLite store.
+
+    Every summary is kept (there is no size bound), and each lookup or
+    store is its own transaction, so concurrent processes see each other's
+    results immediately.
+    """
+
+    def __init__(self, history_dir, store: Optional[VersionStore] = None):
+        self.db = store or VersionStore(history_dir)
+        # A store passed in belongs to the caller, who closes it
+        self._owns_db = store is None
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self.db.drop_stale_summaries(CACHE_VERSION)
+
+    def __len__(self) -> int:
+        return self.db.summary_count(CACHE_VERSION)
+
+    def get(self, file_path, streaming: Optional[bool] = None) -> Dict:
+        """Return the summary for ``file_path``, analyzing it only on a miss."""
+        summary = self.lookup(file_path)
+        if summary is None:
+            summary = self.store(file_path, summarize_file(file_path, streaming))
+        return summary
+
+    def lookup(self, file_path) -> Optional[Dict]:
+        """Return the stored summary for ``file_path`` without ever analyzing it."""
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+
+        key = self.db.file_hash(path, stat.st_size, stat.st_mtime_ns)
+        summary = self.db.summary(key, CACHE_VERSION) if key is not None else None
+        if summary is not None:
+            PROFILER.count('summary_cache_hits')
+            return summary
+
+        key = file_digest(path)
+        summary = self.db.summary(key, CACHE_VERSION)
+        if summary is None:
+            PROFILER.count('summary_cache_misses')
+            self._digests[(path, stat.st_size, stat.st_mtime_ns)] = key
+            return None
+        PROFILER.count('summary_cache_hits')
+        self.db.record_file(path, stat.st_size, stat.st_mtime_ns, key)
+        return summary
+
+    def store(self, file_path, summary: Dict) -> Dict:
+        """Add a freshly computed summary; returns it as a later hit would."""
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+        key = self._digests.pop((path, stat.st_size, stat.st_mtime_ns), None) or file_digest(path)
+        self.db.store_summary(key, CACHE_VERSION, summary, path, stat.st_size, stat.st_mtime_ns)
+        # Tuples come back as lists from a later hit
+        return json.loads(json.dumps(summary))
+
+    def flush(self):
+        """Nothing to do; every write is already committed."""
+
+    def close(self):
+        """Close the SQLite connection if this cache opened it."""
+        if self._owns_db:
+            self.db.close()
+
+
+def open_summary_cache(history_dir, store: Optional[VersionStore] = None):
+    """The project's summary cache: the SQLite store when enabled, else ``analysis_cache.jsonl``."""
+    if store is not None or store_enabled(history_dir):
+        return StoreSummaryCache(history_dir, store)
+    return SummaryCache(history_dir)
@@ -4,27 +4,69 @@ Ableton Live Session Analyzer
 Decompresses and compares Ableton Live files (.als, .adg, .adv) to detect changes.
 """
 
-import gzip
+import hashlib
+import json
+import sys
 import xml.etree.ElementTree as ET
+from bisect import bisect_left
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional, TextIO
 from dataclasses import dataclass, field
-from collections import defaultdict
+from collections import defaultdict, deque
+from ableton_loader import SessionIndex, clip_keys, load_indexed
+from ableton_envelopes import diff_envelopes, lane_label, track_envelopes
+from ableton_notes import NoteTable, diff_notes
+from ableton_profile import PROFILER, add_profile_arguments, start_profiling
+
+
+# Category of elements added or removed inside a track during a deep diff
+DEEP_CATEGORIES = {
+    'MidiClip': 'clip',
+    'AudioClip': 'clip',
+    'AutomationEnvelope': 'automation',
+    'FloatEvent': 'automation',
+    'MidiNoteEvent': 'note',
+    'KeyTrack': 'note',
+}
+
+
+# Version of the NDJSON change-record layout; bump on incompatible changes
+CHANGE_SCHEMA_VERSION = 1
 
 
 @dataclass
 class Change:
     """Represents a detected change between two sessions."""
-    change_type: str  # 'added', 'removed', 'modified'
-    category: str     # 'track', 'device', 'parameter', 'clip', etc.
+    change_type: str  # 'added', 'removed', 'modified', 'moved', 'renamed'
+    category: str     # 'session', 'track', 'device', 'clip', 'parameter', 'automation', 'note', 'element'
     path: str         # XPath-like location
     details: Dict = field(default_factory=dict)
+    track: Optional[str] = None  # Name of the track the change is in
+    old: Any = None              # Value before, when the change has one
+    new: Any = None              # Value after
+
+    def to_record(self) -> Dict:
+        """The change as one NDJSON ``change`` record."""
+        return {
+            'record': 'change',
+            'change': self.change_type,
+            'category': self.category,
+            'path': self.path,
+            'track': self.track,
+            'old': self.old,
+            'new': self.new,
+            'details': self.details,
+        }
 
     def __str__(self):
         if self.change_type == 'added':
             return f"+ Added {self.category}: {self.path} {self._format_details()}"
         elif self.change_type == 'removed':
             return f"- Removed {self.category}: {self.path} {self._format_details()}"
+        elif self.change_type == 'moved':
+            return f"> Moved {self.category}: {self.path} {self._format_details()}"
+        elif self.change_type == 'renamed':
+            return f"~ Renamed {self.category}: {self.path} {self._format_details()}"
         else:
             return f"* Modified {self.category}: {self.path} {self._format_details()}"
 
@@ -34,40 +76,53 @@ class Change:
         return f"({', '.join(f'{k}={v}' for k, v in self.details.items())})"
 
 
+def write_change_records(changes: Iterable[Change], out: TextIO, source: str,
+                         old_file: str, new_file: str) -> int:
+    """Stream changes as NDJSON: a header, one record per change, then an end record.
+
+    Every line is flushed as it is written so readers see records while the
+    comparison is still running. Returns the number of changes written.
+    """
+    def write(record: Dict):
+        out.write(json.dumps(record) + '\n')
+        out.flush()
+
+    write({'record': 'header', 'schema': CHANGE_SCHEMA_VERSION, 'source': source,
+           'old': str(old_file), 'new': str(new_file)})
+    count = 0
+    for change in changes:
+        write(change.to_record())
+        count += 1
+    write({'record': 'end', 'changes': count})
+    return count
+
+
 class AbletonFile:
     """Handles reading and parsing Ableton Live files."""
 
     def __init__(self, file_path: str):
         self.file_path = Path(file_path)
         self.root: Optional[ET.Element] = None
+        self.index: Optional[SessionIndex] = None
         self._load()
 
     def _load(self):
         """Decompress and parse the Ableton file."""
         try:
-            with gzip.open(self.file_path, 'rb') as f:
-                xml_content = f.read()
-                self.root = ET.fromstring(xml_content)
+            self.root, self.index = load_indexed(self.file_path)
         except Exception as e:
             raise ValueError(f"Failed to load {self.file_path}: {e}")
 
     def get_tracks(self) -> List[ET.Element]:
         """Extract all tracks from the session."""
-        tracks = []
-        if self.root is not None:
-            # Audio tracks
-            tracks.extend(self.root.findall('.//AudioTrack'))
-            # MIDI tracks
-            tracks.extend(self.root.findall('.//MidiTrack'))
-            # Return tracks
-            tracks.extend(self.root.findall('.//ReturnTrack'))
-            # Master track
-            tracks.extend(self.root.findall('.//MasterTrack'))
-        return tracks
+        if self.root is None:
+            return []
+        # Audio, MIDI, Return, then Master tracks
+        return self.index.tracks_of('AudioTrack', 'MidiTrack', 'ReturnTrack', 'MasterTrack')
 
     def get_track_name(self, track: ET.Element) -> str:
         """Get the name of a track."""
-        name_elem = track.find('.//Name/EffectiveName')
+        name_elem = self.index.track(track).first('Name/EffectiveName')
         if name_elem is not None and name_elem.get('Value'):
             return name_elem.get('Value')
         return "Unnamed Track"
@@ -75,40 +130,42 @@ class AbletonFile:
     def get_devices(self, track: ET.Element) -> List[ET.Element]:
         """Get all devices in a track."""
         devices = []
-        device_chain = track.find('.//DeviceChain/DeviceChain')
-        if device_chain is not None:
-            devices.extend(device_chain.findall('.//AudioEffectBranch'))
-            devices.extend(device_chain.findall('.//MidiEffectBranch'))
-            devices.extend(device_chain.findall('.//InstrumentBranch'))
+        if self.index.device_chain(track) is not None:
+            track_index = self.index.track(track)
+            devices.extend(track_index.all('AudioEffectBranch'))
+            devices.extend(track_index.all('MidiEffectBranch'))
+            devices.extend(track_index.all('InstrumentBranch'))
         return devices
 
     def get_clips(self, track: ET.Element) -> List[ET.Element]:
-        """Get all clips in a track."""
-        clips = []
-        clip_slots = track.findall('.//ClipSlot')
-        for slot in clip_slots:
-            clip = slot.find('.//MidiClip')
-            if clip is None:
-                clip = slot.find('.//AudioClip')
-            if clip is not None:
-                clips.append(clip)
-        return clips
+        """Get all clips in a track, Session and Arrangement."""
+        return [clip.elem for clip in self.index.clips(track)]
 
 
 class AbletonDiff:
     """Compares two Ableton Live sessions and identifies changes."""
 
-    def __init__(self, old_file: str, new_file: str):
+    def __init__(self, old_file: str, new_file: str, deep: bool = False):
         self.old = AbletonFile(old_file)
         self.new = AbletonFile(new_file)
+        self.deep = deep
         self.changes: List[Change] = []
 
     def compare(self) -> List[Change]:
         """Perform full comparison and return list of changes."""
-        self.changes = []
-        self._compare_tracks()
+        with PROFILER.phase('diff'):
+            self.changes = list(self._compare_tracks())
+        PROFILER.count('changes', len(self.changes))
         return self.changes
 
+    def iter_changes(self) -> Iterator[Change]:
+        """Yield changes as they are found, so consumers can start before the diff ends."""
+        self.changes = []
+        for change in self._compare_tracks():
+            self.changes.append(change)
+            yield change
+        PROFILER.count('changes', len(self.changes))
+
     def _element_to_dict(self, elem: ET.Element, max_depth: int = 3, current_depth: int = 0) -> Dict:
         """Convert XML element to dict for comparison."""
         if current_depth >= max_depth:
@@ -134,77 +191,210 @@ class AbletonDiff:
 
         return result
 
-    def _compare_tracks(self):
+    def _compare_tracks(self) -> Iterator[Change]:
         """Compare tracks between old and new sessions."""
         old_tracks = self.old.get_tracks()
         new_tracks = self.new.get_tracks()
 
-        # Create track mappings by name and index
-        old_track_map = {(i, self.old.get_track_name(t)): t for i, t in enumerate(old_tracks)}
-        new_track_map = {(i, self.new.get_track_name(t)): t for i, t in enumerate(new_tracks)}
-
-        old_keys = set(old_track_map.keys())
-        new_keys = set(new_track_map.keys())
-
-        # Detect added tracks
-        for key in new_keys - old_keys:
-            idx, name = key
-            self.changes.append(Change(
-                change_type='added',
-                category='track',
-                path=f"Track[{idx}]",
-                details={'name': name, 'type': new_track_map[key].tag}
-            ))
-
-        # Detect removed tracks
-        for key in old_keys - new_keys:
-            idx, name = key
-            self.changes.append(Change(
-                change_type='removed',
-                category='track',
-                path=f"Track[{idx}]",
-                details={'name': name, 'type': old_track_map[key].tag}
-            ))
-
-        # Compare existing tracks
-        for key in old_keys & new_keys:
-            idx, name = key
-            self._compare_track_contents(
-                old_track_map[key],
-                new_track_map[key],
-                f"Track[{idx}]:{name}"
+        old_names = [self.old.get_track_name(t) for t in old_tracks]
+        new_names = [self.new.get_track_name(t) for t in new_tracks]
+        pairs = self._align_tracks(old_tracks, new_tracks, old_names, new_names)
+
+        matched_new = set(pairs.values())
+        for idx, track in enumerate(new_tracks):
+            if idx not in matched_new:
+                yield Change(
+                    change_type='added',
+                    category='track',
+                    path=f"Track[{idx}]",
+                    details={'name': new_names[idx], 'type': track.tag},
+                    track=new_names[idx]
+                )
+
+        for idx, track in enumerate(old_tracks):
+            if idx not in pairs:
+                yield Change(
+                    change_type='removed',
+                    category='track',
+                    path=f"Track[{idx}]",
+                    details={'name': old_names[idx], 'type': track.tag},
+                    track=old_names[idx]
+                )
+
+        # Tracks outside the longest run kept in relative order were moved;
+        # everything else only shifted because of inserts and deletes.
+        ordered = sorted(pairs.items())
+        in_order = _longest_increasing(ordered)
+        for old_idx, new_idx in ordered:
+            if old_names[old_idx] != new_names[new_idx]:
+                yield Change(
+                    change_type='renamed',
+                    category='track',
+                    path=f"Track[{new_idx}]",
+                    details={'name': f"{old_names[old_idx]} -> {new_names[new_idx]}"},
+                    track=new_names[new_idx],
+                    old=old_names[old_idx],
+                    new=new_names[new_idx]
+                )
+            if old_idx not in in_order:
+                yield Change(
+                    change_type='moved',
+                    category='track',
+                    path=f"Track[{new_idx}]:{new_names[new_idx]}",
+                    details={'position': f"{old_idx} -> {new_idx}"},
+                    track=new_names[new_idx],
+                    old=old_idx,
+                    new=new_idx
+                )
+
+        for old_idx, new_idx in sorted(pairs.items(), key=lambda pair: pair[1]):
+            yield from self._compare_track_contents(
+                old_tracks[old_idx],
+                new_tracks[new_idx],
+                f"Track[{new_idx}]:{new_names[new_idx]}",
+                new_names[new_idx]
             )
 
-    def _compare_track_contents(self, old_track: ET.Element, new_track: ET.Element, track_path: str):
+    def _align_tracks(self, old_tracks: List[ET.Element], new_tracks: List[ET.Element],
+                      old_names: List[str], new_names: List[str]) -> Dict[int, int]:
+        """Match old track positions to new ones by Live track Id, then content, then name.
+
+        Each stage only sees tracks the previous stages left unmatched, and
+        every stage is a hash-map join, so alignment stays linear in the
+        number of tracks.
+        """
+        pairs: Dict[int, int] = {}
+
+        def match(old_key, new_key):
+            old_left = [i for i in range(len(old_tracks)) if i not in pairs]
+            new_left = set(range(len(new_tracks))) - set(pairs.values())
+            if not old_left or not new_left:
+                return
+            new_by_key: Dict[object, 'deque[int]'] = defaultdict(deque)
+            for i in sorted(new_left):
+                key = new_key(i)
+                if key is not None:
+                    new_by_key[key].append(i)
+            # Duplicate keys pair up in order
+            for i in old_left:
+                key = old_key(i)
+                candidates = new_by_key.get(key) if key is not None else None
+                if candidates:
+                    pairs[i] = candidates.popleft()
+
+        match(lambda i: _track_id(old_tracks[i]), lambda i: _track_id(new_tracks[i]))
+        match(lambda i: _content_key(self.old.index, old_tracks[i]),
+              lambda i: _content_key(self.new.index, new_tracks[i]))
+        match(lambda i: (old_tracks[i].tag, old_names[i]),
+              lambda i: (new_tracks[i].tag, new_names[i]))
+        return pairs
+
+    def _compare_track_contents(self, old_track: ET.Element, new_track: ET.Element,
+                                track_path: str, track_name: str) -> Iterator[Change]:
         """Compare the contents of two tracks."""
         # Compare devices
         old_devices = self.old.get_devices(old_track)
         new_devices = self.new.get_devices(new_track)
 
         if len(old_devices) != len(new_devices):
-            self.changes.append(Change(
+            yield Change(
                 change_type='modified',
                 category='track',
                 path=track_path,
-                details={'device_count': f"{len(old_devices)} -> {len(new_devices)}"}
-            ))
+                details={'device_count': f"{len(old_devices)} -> {len(new_devices)}"},
+                track=track_name,
+                old=len(old_devices),
+                new=len(new_devices)
+            )
 
         # Compare clips
         old_clips = self.old.get_clips(old_track)
         new_clips = self.new.get_clips(new_track)
 
         if len(old_clips) != len(new_clips):
-            self.changes.append(Change(
+            yield Change(
                 change_type='modified',
                 category='track',
                 path=track_path,
-                details={'clip_count': f"{len(old_clips)} -> {len(new_clips)}"}
-            ))
+                details={'clip_count': f"{len(old_clips)} -> {len(new_clips)}"},
+                track=track_name,
+                old=len(old_clips),
+                new=len(new_clips)
+            )
 
-        # Compare track parameters (volume, pan, etc.)
-        self._compare_parameters(old_track, new_track, track_path)
+        if self.deep:
+            # Every attribute below the track, descending only where hashes differ
+            yield from self._compare_subtree(old_track, new_track, track_path, track_name)
+        else:
+            # Compare track parameters (volume, pan, etc.)
+            yield from self._compare_parameters(old_track, new_track, track_path, track_name)
+            yield from self._compare_automation(old_track, new_track, track_path, track_name)
+            yield from self._compare_notes(old_track, new_track, track_path, track_name)
+
+    def _compare_subtree(self, old_elem: ET.Element, new_elem: ET.Element, path: str,
+                         track_name: str) -> Iterator[Change]:
+        """Report differences below two elements, skipping subtrees with equal hashes."""
+        if self.old.index.subtree_hash(old_elem) == self.new.index.subtree_hash(new_elem):
+            return
+        PROFILER.count('subtrees_compared')
+
+        for name in sorted(set(old_elem.attrib) | set(new_elem.attrib)):
+            old_val = old_elem.get(name)
+            new_val = new_elem.get(name)
+            if old_val != new_val:
+                yield Change(
+                    change_type='modified',
+                    category='parameter',
+                    path=path if name == 'Value' else f"{path}@{name}",
+                    details={'value': f"{old_val} -> {new_val}"},
+                    track=track_name,
+                    old=old_val,
+                    new=new_val
+                )
+
+        old_text = (old_elem.text or '').strip()
+        new_text = (new_elem.text or '').strip()
+        if old_text != new_text:
+            yield Change(
+                change_type='modified',
+                category='parameter',
+                path=path,
+                details={'text': f"{len(old_text)} -> {len(new_text)} chars"},
+                track=track_name,
+                old=old_text,
+                new=new_text
+            )
 
-    def _compare_parameters(self, old_elem: ET.Element, new_elem: ET.Element, path: str):
+        old_children = _keyed_children(old_elem)
+        new_children = _keyed_children(new_elem)
+
+        for key, (label, child) in new_children.items():
+            if key not in old_children:
+                yield Change(
+                    change_type='added',
+                    category=_deep_category(new_elem, child),
+                    path=f"{path}/{label}",
+                    details=dict(child.attrib),
+                    track=track_name
+                )
+
+        for key, (label, child) in old_children.items():
+            if key not in new_children:
+                yield Change(
+                    change_type='removed',
+                    category=_deep_category(old_elem, child),
+                    path=f"{path}/{label}",
+                    details=dict(child.attrib),
+                    track=track_name
+                )
+
+        for key, (label, new_child) in new_children.items():
+            old_entry = old_children.get(key)
+            if old_entry is not None:
+                yield from self._compare_subtree(old_entry[1], new_child, f"{path}/{label}", track_name)
+
+    def _compare_parameters(self, old_elem: ET.Element, new_elem: ET.Element, path: str,
+                            track_name: str) -> Iterator[Change]:
         """Compare parameter values between two elements."""
         # Check common parameters
         param_paths = [
@@ -222,15 +412,98 @@ class AbletonDiff:
                 new_val = new_param.get('Value')
 
                 if old_val != new_val:
-                    self.changes.append(Change(
+                    yield Change(
                         change_type='modified',
                         category='parameter',
                         path=f"{path}/{param_name}",
-                        details={'value': f"{old_val} -> {new_val}"}
-                    ))
+                        details={'value': f"{old_val} -> {new_val}"},
+                        track=track_name,
+                        old=old_val,
+                        new=new_val
+                    )
+
+    def _compare_automation(self, old_track: ET.Element, new_track: ET.Element, path: str,
+                            track_name: str) -> Iterator[Change]:
+        """Compare automation lanes by target, measuring how each edited curve moved."""
+        old_envelopes = {e.pointee: e for e in track_envelopes(self.old.index, old_track)}
+        new_envelopes = {e.pointee: e for e in track_envelopes(self.new.index, new_track)}
+        old_targets = self.old.index.automation_targets(old_track)
+        new_targets = self.new.index.automation_targets(new_track)
+
+        for pointee, envelope in new_envelopes.items():
+            if pointee not in old_envelopes:
+                yield Change(
+                    change_type='added',
+                    category='automation',
+                    path=f"{path}/automation/{lane_label(envelope, new_targets)}",
+                    details={'points': len(envelope)},
+                    track=track_name
+                )
+
+        for pointee, envelope in old_envelopes.items():
+            if pointee not in new_envelopes:
+                yield Change(
+                    change_type='removed',
+                    category='automation',
+                    path=f"{path}/automation/{lane_label(envelope, old_targets)}",
+                    details={'points': len(envelope)},
+                    track=track_name
+                )
+
+        for pointee, new_envelope in new_envelopes.items():
+            old_envelope = old_envelopes.get(pointee)
+            if old_envelope is None or old_envelope.digest() == new_envelope.digest():
+                continue
+            PROFILER.count('curves_compared')
+            curve = diff_envelopes(old_envelope, new_envelope)
+            if not curve.changed:
+                continue
+            yield Change(
+                change_type='modified',
+                category='automation',
+                path=f"{path}/automation/{lane_label(new_envelope, new_targets)}",
+                details={
+                    'max_deviation': curve.max_deviation,
+                    'at': curve.at,
+                    'ranges': [list(span) for span in curve.ranges],
+                },
+                track=track_name,
+                old=len(old_envelope),
+                new=len(new_envelope)
+            )
+
+    def _compare_notes(self, old_track: ET.Element, new_track: ET.Element, path: str,
+                       track_name: str) -> Iterator[Change]:
+        """Note-level diff of each MIDI clip present in both versions (same slot or arrangement start)."""
+        old_clips = self.old.index.clips(old_track)
+        new_clips = self.new.index.clips(new_track)
+        old_by_key = dict(zip(clip_keys((c.view, c.slot, c.start, c.name) for c in old_clips), old_clips))
+
+        for key, new_clip in zip(clip_keys((c.view, c.slot, c.start, c.name) for c in new_clips), new_clips):
+            old_clip = old_by_key.get(key)
+            if new_clip.type != 'midi' or old_clip is None or old_clip.type != 'midi':
+                continue
+            PROFILER.count('clips_compared')
+            old_notes = NoteTable.from_clip(old_clip.elem)
+            new_notes = NoteTable.from_clip(new_clip.elem)
+            notes = diff_notes(old_notes, new_notes)
+            if notes.changed:
+                yield Change(
+                    change_type='modified',
+                    category='note',
+                    path=f"{path}/{key}",
+                    details={'clip': new_clip.name or key, **notes.counts()},
+                    track=track_name,
+                    old=len(old_notes),
+                    new=len(new_notes)
+                )
 
     def generate_report(self) -> str:
         """Generate a human-readable report of changes."""
+        with PROFILER.phase('render'):
+            return self._render_report()
+
+    def _render_report(self) -> str:
         if not self.changes:
             return "No changes detected."
 
@@ -258,6 +531,72 @@ class AbletonDiff:
         return "\n".join(report_lines)
 
 
+def _track_id(track: ET.Element) -> Optional[Tuple[str, str]]:
+    """Live's persistent track Id; the master track has none and is unique by type."""
+    if track.tag == 'MasterTrack':
+        return (track.tag, '')
+    track_id = track.get('Id')
+    return (track.tag, track_id) if track_id is not None else None
+
+
+def _content_key(index: SessionIndex, track: ET.Element) -> bytes:
+    """Hash of a track's contents, ignoring the track Id itself."""
+    digest = hashlib.blake2b(track.tag.encode('utf-8'), digest_size=16)
+    for child in track:
+        digest.update(index.subtree_hash(child))
+    return digest.digest()
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> set:
+    """Old positions of the longest run of pairs whose new positions also increase.
+
+    Patience sorting over the new positions: O(n log n).
+    """
+    tails: List[int] = []
+    tail_at: List[int] = []
+    previous: List[int] = [-1] * len(pairs)
+    for i, (_, new_idx) in enumerate(pairs):
+        pos = bisect_left(tails, new_idx)
+        if pos == len(tails):
+            tails.append(new_idx)
+            tail_at.append(i)
+        else:
+            tails[pos] = new_idx
+            tail_at[pos] = i
+        previous[i] = tail_at[pos - 1] if pos else -1
+
+    run = set()
+    i = tail_at[-1] if tail_at else -1
+    while i != -1:
+        run.add(pairs[i][0])
+        i = previous[i]
+    return run
+
+
+def _keyed_children(elem: ET.Element) -> Dict[Tuple[str, str], Tuple[str, ET.Element]]:
+    """Children keyed by (tag, Id) when Live assigned one, else (tag, position among same-tag siblings)."""
+    children = {}
+    seen: Dict[str, int] = defaultdict(int)
+    for child in elem:
+        child_id = child.get('Id')
+        if child_id is not None:
+            key = (child.tag, f"Id={child_id}")
+            label = f"{child.tag}[Id={child_id}]"
+        else:
+            ordinal = seen[child.tag]
+            key = (child.tag, str(ordinal))
+            label = child.tag if ordinal == 0 else f"{child.tag}[{ordinal}]"
+        seen[child.tag] += 1
+        children[key] = (label, child)
+    return children
+
+
+def _deep_category(parent: ET.Element, child: ET.Element) -> str:
+    if parent.tag == 'Devices':
+        return 'device'
+    return DEEP_CATEGORIES.get(child.tag, 'element')
+
+
 def main():
     """CLI entry point."""
     import argparse
@@ -269,17 +608,40 @@ def main():
     parser.add_argument('new_file', help='Path to new .als file')
     parser.add_argument('-o', '--output', help='Output file for report (default: stdout)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
+    parser.add_argument('--deep', action='store_true',
+                        help='Report every changed parameter, not just volume/pan/tempo')
+    parser.add_argument('--format', choices=['text', 'ndjson'], default='text',
+                        help='text report, or one JSON change record per line streamed as found')
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_profiling(args, script='ableton_diff.py')
+
+    if args.format == 'ndjson':
+        try:
+            differ = AbletonDiff(args.old_file, args.new_file, deep=args.deep)
+            with PROFILER.phase('diff'):
+                if args.output:
+                    with open(args.output, 'w') as f:
+                        write_change_records(differ.iter_changes(), f, 'ableton_diff',
+                                             args.old_file, args.new_file)
+                else:
+                    write_change_records(differ.iter_changes(), sys.stdout, 'ableton_diff',
+                                         args.old_file, args.new_file)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
 
     try:
-        differ = AbletonDiff(args.old_file, args.new_file)
+        differ = AbletonDiff(args.old_file, args.new_file, deep=args.deep)
         changes = differ.compare()
         report = differ.generate_report()
 
         if args.output:
-            with open(args.output, 'w') as f:
-                f.write(report)
+            with PROFILER.phase('write'):
+                with open(args.output, 'w') as f:
+                    f.write(report)
             print(f"Report written to {args.output}")
         else:
             print(report)
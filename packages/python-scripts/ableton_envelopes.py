@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Ableton Automation Envelopes
+Automation lanes as (time, value) columns with resampling and curve diffs (uses NumPy when installed).
+"""
+
+import hashlib
+import math
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import compress
+from operator import le
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: without NumPy the same curves come from stdlib arrays
+    np = None
+
+from ableton_loader import SessionIndex, parse_column
+
+
+# Value differences at or below this are not reported by curve diffs
+DEFAULT_TOLERANCE = 1e-6
+
+
+class Envelope:
+    """One automation lane: breakpoint times (beats) and values as parallel columns.
+
+    The curve is linear between breakpoints and holds the first and last
+    values outside them. Two breakpoints at the same time form a step; from
+    that time on the curve takes the later value. Columns are NumPy arrays
+    when NumPy is installed, else ``array.array``.
+    """
+
+    __slots__ = ('pointee', 'times', 'values')
+
+    def __init__(self, pointee: str, times: array, values: array):
+        self.pointee = pointee
+        if np is not None:
+            # Zero-copy views of the parsed buffers
+            times = np.frombuffer(times, dtype=np.float64)
+            values = np.frombuffer(values, dtype=np.float64)
+        self.times = times
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def from_element(cls, envelope: ET.Element) -> Optional['Envelope']:
+        """Read an AutomationEnvelope element; None when it names no target."""
+        target = envelope.find('EnvelopeTarget/PointeeId')
+        if target is not None:
+            pointee = target.get('Value')
+        else:
+            # Layout written by older Live versions
+            target = envelope.find('.//Envelope/Automation/Pointee')
+            pointee = target.get('Id') if target is not None else None
+        if pointee is None:
+            return None
+
+        attribs = [event.attrib for event in envelope.iterfind('.//Automation/Events/FloatEvent')]
+        times = parse_column(attribs, 'Time', float, math.nan)
+        values = parse_column(attribs, 'Value', float, math.nan)
+        if any(map(math.isnan, times)) or any(map(math.isnan, values)):
+            usable = [not (math.isnan(t) or math.isnan(v)) for t, v in zip(times, values)]
+            times, values = list(compress(times, usable)), list(compress(values, usable))
+        if not all(map(le, times, times[1:])):
+            # Stable, so steps keep their order
+            order = sorted(range(len(times)), key=times.__getitem__)
+            times, values = [times[i] for i in order], [values[i] for i in order]
+        return cls(pointee, array('d', times), array('d', values))
+
+    def digest(self) -> str:
+        """Short hash of the breakpoints; equal digests mean identical lanes."""
+        h = hashlib.blake2b(digest_size=8)
+        h.update(self.times.tobytes())
+        h.update(self.values.tobytes())
+        return h.hexdigest()
+
+    def stats(self, name: Optional[str] = None) -> Dict:
+        """Lane entry of the analysis summary (plain JSON types)."""
+        stats = {
+            'parameter': self.pointee,
+            'name': name,
+            'point_count': len(self),
+            'digest': self.digest(),
+        }
+        if len(self):
+            if np is not None:
+                stats['min_value'] = float(self.values.min())
+                stats['max_value'] = float(self.values.max())
+            else:
+                stats['min_value'] = min(self.values)
+                stats['max_value'] = max(self.values)
+            stats['start'] = float(self.times[0])
+            stats['end'] = float(self.times[-1])
+        return stats
+
+    def resample(self, grid: Sequence[float], left: bool = False):
+        """Curve values at each grid time (at steps, the value just before with ``left``)."""
+        if not len(self):
+            return (np.full(len(grid), np.nan) if np is not None
+                    else array('d', [math.nan]) * len(grid))
+        if np is not None:
+            grid = np.asarray(grid, dtype=np.float64)
+            if left:
+                # Interpolating the mirrored curve picks the first value of each step
+                return np.interp(-grid, -self.times[::-1], self.values[::-1])
+            return np.interp(grid, self.times, self.values)
+        return array('d', map(partial(self._value_at, bisect_left if left else bisect_right), grid))
+
+    def _value_at(self, bisect, time: float) -> float:
+        times, values = self.times, self.values
+        i = bisect(times, time)
+        if i == 0:
+            return values[0]
+        if i == len(times):
+            return values[-1]
+        t0, t1 = times[i - 1], times[i]
+        return values[i - 1] + (values[i] - values[i - 1]) * (time - t0) / (t1 - t0)
+
+
+@dataclass
+class CurveDiff:
+    """Where and by how much two versions of an automation lane differ."""
+    max_deviation: Optional[float]    # Largest value gap (None if one lane has no points)
+    at: Optional[float] = None        # Time of the largest gap
+    ranges: List[Tuple[float, float]] = field(default_factory=list)  # Spans where the curves differ
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.ranges)
+
+    def describe(self) -> str:
+        spans = ', '.join(f"{start:g}-{end:g}" for start, end in self.ranges)
+        if self.max_deviation is None:
+            return f"points only on one side ({spans})"
+        return f"max deviation {self.max_deviation:.4g} at {self.at:g}, changed {spans}"
+
+
+def diff_envelopes(old: Envelope, new: Envelope, tolerance: float = DEFAULT_TOLERANCE) -> CurveDiff:
+    """Compare two lanes exactly, on the union of their breakpoints.
+
+    Both curves are linear between consecutive union points, so the
+    largest gap is always at one of them (or just before one, at a step);
+    a changed range runs from the last equal point before a gap to the
+    first equal point after it.
+    """
+    if not len(old) or not len(new):
+        other = old if len(old) else new
+        if not len(other):
+            return CurveDiff(0.0)
+        return CurveDiff(None, ranges=[(float(other.times[0]), float(other.times[-1]))])
+
+    if np is not None:
+        grid = np.union1d(old.times, new.times)
+        gaps = np.maximum(np.abs(old.resample(grid) - new.resample(grid)),
+                          np.abs(old.resample(grid, left=True) - new.resample(grid, left=True)))
+        peak = int(np.argmax(gaps))
+        # Runs of changed points as [first, stop) index pairs
+        changed = np.concatenate(([0], (gaps > tolerance).astype(np.int8), [0]))
+        bounds = np.flatnonzero(np.diff(changed))
+        runs = zip(bounds[::2].tolist(), bounds[1::2].tolist())
+    else:
+        grid = sorted(set(old.times).union(new.times))
+        gaps = [max(abs(a - b), abs(c - d)) for a, b, c, d in zip(
+            old.resample(grid), new.resample(grid),
+            old.resample(grid, left=True), new.resample(grid, left=True))]
+        peak = max(range(len(gaps)), key=gaps.__getitem__)
+        runs = []
+        first = None
+        for i, gap in enumerate(gaps):
+            if gap > tolerance and first is None:
+                first = i
+            elif gap <= tolerance and first is not None:
+                runs.append((first, i))
+                first = None
+        if first is not None:
+            runs.append((first, len(gaps)))
+
+    last = len(grid) - 1
+    ranges = [(float(grid[max(first - 1, 0)]), float(grid[min(stop, last)])) for first, stop in runs]
+    if not ranges:
+        return CurveDiff(float(gaps[peak]))
+    return CurveDiff(float(gaps[peak]), float(grid[peak]), ranges)
+
+
+def track_envelopes(index: SessionIndex, track: ET.Element) -> List[Envelope]:
+    """Automation lanes of a track that name a target, in file order."""
+    envelopes = []
+    for elem in index.track(track).all('Envelopes/AutomationEnvelope'):
+        envelope = Envelope.from_element(elem)
+        if envelope is not None:
+            envelopes.append(envelope)
+    return envelopes
+
+
+def lane_label(envelope: Envelope, targets: Dict[str, str]) -> str:
+    """Parameter name for reports, falling back to the target Id."""
+    name = targets.get(envelope.pointee)
+    return f"{name}#{envelope.pointee}" if name else envelope.pointee
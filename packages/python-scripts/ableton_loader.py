@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Ableton Session Loader
+Streams gzipped Ableton Live files into the XML parser without holding the decompressed document.
+"""
+
+import contextlib
+import gzip
+import hashlib
+import mmap
+import os
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from ableton_profile import PROFILER
+
+
+# Decompressed bytes handed to the parser per feed() call
+CHUNK_SIZE = 1 << 20
+
+# Opt-in cache of decompressed XML under <project>/_history/cache/:
+# set ABLETON_XML_CACHE=1, optionally cap it with ABLETON_XML_CACHE_MAX_MB
+XML_CACHE_ENV = 'ABLETON_XML_CACHE'
+XML_CACHE_MAX_MB_ENV = 'ABLETON_XML_CACHE_MAX_MB'
+DEFAULT_XML_CACHE_MAX_BYTES = 2 << 30
+
+# Elements that own a device chain, mixer and clips
+TRACK_TAGS = ('AudioTrack', 'MidiTrack', 'ReturnTrack', 'MasterTrack')
+
+# Clip elements and the type reported for them
+CLIP_TYPES = {'MidiClip': 'midi', 'AudioClip': 'audio'}
+
+
+def iter_chunks(file_path, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the decompressed XML of an Ableton file in fixed-size chunks.
+
+    With the XML cache enabled, the first read of a version also writes its
+    XML to ``_history/cache/`` and later reads map that file instead of
+    decompressing, so concurrent processes share one copy in the page cache.
+    """
+    cache_path = xml_cache_path(file_path)
+    if cache_path is None:
+        yield from _iter_gzip(file_path, chunk_size)
+    elif cache_path.exists():
+        yield from _iter_mapped(cache_path, chunk_size)
+    else:
+        yield from _iter_and_cache(file_path, cache_path, chunk_size)
+
+
+def _iter_gzip(file_path, chunk_size: int) -> Iterator[bytes]:
+    with gzip.open(file_path, 'rb') as f:
+        while True:
+            with PROFILER.phase('decompress'):
+                chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            PROFILER.count('bytes_decompressed', len(chunk))
+            yield chunk
+
+
+def xml_cache_path(file_path) -> Optional[Path]:
+    """Cache file for this exact version of ``file_path``, or None when the cache is off.
+
+    Only files in a versioned project (one with a ``_history`` folder) are
+    cached. The name carries the source size and mtime, so an overwritten
+    file never hits a stale entry.
+    """
+    if os.environ.get(XML_CACHE_ENV, '') in ('', '0'):
+        return None
+    path = Path(file_path).resolve()
+    history_dir = path.parent / '_history'
+    if not history_dir.is_dir():
+        return None
+    stat = path.stat()
+    return history_dir / 'cache' / f"{path.name}.{stat.st_size}-{stat.st_mtime_ns}.xml"
+
+
+def _iter_mapped(cache_path: Path, chunk_size: int) -> Iterator[bytes]:
+    # Hits refresh the mtime, which eviction uses as recency
+    os.utime(cache_path)
+    with open(cache_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            advise = hasattr(mapped, 'madvise') and chunk_size % mmap.PAGESIZE == 0
+            if advise:
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            PROFILER.count('xml_cache_hits')
+            for offset in range(0, len(mapped), chunk_size):
+                with PROFILER.phase('decompress'):
+                    chunk = mapped[offset:offset + chunk_size]
+                yield chunk
+                if advise:
+                    # Pages stay in the shared page cache, just not in our RSS
+                    mapped.madvise(mmap.MADV_DONTNEED, offset, min(chunk_size, len(mapped) - offset))
+
+
+def _iter_and_cache(file_path, cache_path: Path, chunk_size: int) -> Iterator[bytes]:
+    cache_path.parent.mkdir(exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    complete = False
+    try:
+        with open(tmp_path, 'wb') as out:
+            for chunk in _iter_gzip(file_path, chunk_size):
+                out.write(chunk)
+                yield chunk
+        os.replace(tmp_path, cache_path)
+        complete = True
+    finally:
+        if not complete:
+            # Reader stopped early or failed; never publish a partial file
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+    _evict_xml_cache(cache_path)
+
+
+def _evict_xml_cache(keep: Path):
+    """Drop stale copies of ``keep``'s source, then least recently used entries over the cap."""
+    max_bytes = DEFAULT_XML_CACHE_MAX_BYTES
+    if os.environ.get(XML_CACHE_MAX_MB_ENV):
+        max_bytes = int(os.environ[XML_CACHE_MAX_MB_ENV]) * 1024 * 1024
+
+    source_name = keep.name.rsplit('.', 2)[0]
+    entries = []
+    for path in keep.parent.glob('*.xml'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if path != keep and path.name.rsplit('.', 2)[0] == source_name:
+            with contextlib.suppress(OSError):
+                path.unlink()
+            continue
+        entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        with contextlib.suppress(OSError):
+            path.unlink()
+        total -= size
+
+
+def iterparse_als(file_path, events: Sequence[str] = ('end',),
+                  chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, ET.Element]]:
+    """Yield parser events as soon as each decompressed chunk has been fed.
+
+    Works like ``ET.iterparse`` on the gzip stream: callers see the first
+    elements after one chunk instead of after the whole file.
+    """
+    parser = ET.XMLPullParser(events=events)
+    for chunk in iter_chunks(file_path, chunk_size):
+        with PROFILER.phase('parse'):
+            parser.feed(chunk)
+        yield from parser.read_events()
+    with PROFILER.phase('parse'):
+        parser.close()
+    yield from parser.read_events()
+
+
+def load_als(file_path, chunk_size: int = CHUNK_SIZE) -> ET.Element:
+    """Parse an Ableton file into an element tree, one chunk at a time."""
+    parser = ET.XMLParser()
+    for chunk in iter_chunks(file_path, chunk_size):
+        with PROFILER.phase('parse'):
+            parser.feed(chunk)
+    with PROFILER.phase('parse'):
+        return parser.close()
+
+
+@dataclass
+class Clip:
+    """One clip on a track, from the Session or the Arrangement view."""
+    elem: ET.Element
+    type: str                        # 'midi' or 'audio'
+    view: str                        # 'session' or 'arrangement'
+    name: str
+    slot: Optional[int] = None       # Session clip slot (scene) index
+    start: Optional[float] = None    # CurrentStart/CurrentEnd, in beats
+    end: Optional[float] = None
+    loop_start: Optional[float] = None
+    loop_end: Optional[float] = None
+    looping: bool = False
+
+    @classmethod
+    def from_element(cls, elem: ET.Element, view: str, slot: Optional[int] = None) -> 'Clip':
+        name_elem = elem.find('Name')
+        if name_elem is None:
+            name_elem = elem.find('.//Name')
+        clip = cls(
+            elem=elem,
+            type=CLIP_TYPES[elem.tag],
+            view=view,
+            name=name_elem.get('Value', '') if name_elem is not None else '',
+            slot=slot,
+            start=_float_value(elem.find('CurrentStart')),
+            end=_float_value(elem.find('CurrentEnd')),
+        )
+        loop = elem.find('Loop')
+        if loop is not None:
+            clip.loop_start = _float_value(loop.find('LoopStart'))
+            clip.loop_end = _float_value(loop.find('LoopEnd'))
+            loop_on = loop.find('LoopOn')
+            clip.looping = loop_on is not None and loop_on.get('Value') == 'true'
+        return clip
+
+
+def clip_keys(clips: Iterable[Tuple[str, Optional[int], Optional[float], str]]) -> List[str]:
+    """Labels pairing (view, slot, start, name) clips across versions.
+
+    Session clips are keyed by slot (``session/<slot>``), Arrangement clips
+    by start time (``arrangement/<start>``), so inserting a clip does not
+    shift the keys of the clips after it. Clips sharing a start add their
+    name, then a count.
+    """
+    keys = []
+    seen: Dict[str, int] = defaultdict(int)
+    for view, slot, start, name in clips:
+        if view == 'session':
+            keys.append(f"session/{slot}")
+            continue
+        key = f"arrangement/{start:g}" if start is not None else "arrangement/?"
+        seen[key] += 1
+        if seen[key] > 1:
+            key = f"{key}/{name}"
+            seen[key] += 1
+            if seen[key] > 1:
+                key = f"{key}#{seen[key]}"
+        keys.append(key)
+    return keys
+
+
+def _float_value(elem: Optional[ET.Element]) -> Optional[float]:
+    if elem is None:
+        return None
+    try:
+        return float(elem.get('Value'))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_column(attribs: List[Dict[str, str]], attr: str, convert: Callable, missing) -> List:
+    """One attribute of many elements, converted in bulk (per element only if some value is bad)."""
+    try:
+        return list(map(convert, map(itemgetter(attr), attribs)))
+    except (KeyError, TypeError, ValueError):
+        values = []
+        for attrib in attribs:
+            try:
+                values.append(convert(attrib[attr]))
+            except (KeyError, TypeError, ValueError):
+                values.append(missing)
+        return values
+
+
+class ElementIndex:
+    """Tag and parent/tag lookups over one subtree.
+
+    ``all('Scene')`` answers ``findall('.//Scene')`` and
+    ``all('Volume/Manual')`` answers ``findall('.//Volume/Manual')``, with
+    results in the same order ElementPath would return them.
+    """
+
+    def __init__(self):
+        self.by_tag: Dict[str, List[ET.Element]] = defaultdict(list)
+        self.by_path: Dict[str, List[ET.Element]] = defaultdict(list)
+
+    def add(self, elem: ET.Element):
+        """Record an element and its parent/child pairs."""
+        tag = elem.tag
+        self.by_tag[tag].append(elem)
+        for child in elem:
+            self.by_path[f"{tag}/{child.tag}"].append(child)
+
+    def add_subtree(self, elem: ET.Element):
+        """Record every element below (and including) ``elem``."""
+        for node in elem.iter():
+            self.add(node)
+
+    def all(self, key: str) -> List[ET.Element]:
+        """Elements matching a ``Tag`` or ``Parent/Tag`` key."""
+        table = self.by_path if '/' in key else self.by_tag
+        return table.get(key, [])
+
+    def first(self, key: str) -> Optional[ET.Element]:
+        """First element matching a ``Tag`` or ``Parent/Tag`` key."""
+        matches = self.all(key)
+        return matches[0] if matches else None
+
+
+class SessionIndex:
+    """Per-file lookup tables built in a single walk over the element tree.
+
+    Elements outside tracks go into ``session``; each track subtree gets its
+    own ElementIndex so per-track queries never scan other tracks.
+    """
+
+    def __init__(self, root: ET.Element):
+        self.root = root
+        self.session = ElementIndex()
+        self.tracks: List[ET.Element] = []
+        self._track_indexes: Dict[ET.Element, ElementIndex] = {}
+        self._hashes: Dict[ET.Element, bytes] = {}
+        self._clips: Dict[ET.Element, List[Clip]] = {}
+        self._build()
+
+    def _build(self):
+        stack = [self.root]
+        while stack:
+            elem = stack.pop()
+            if elem.tag in TRACK_TAGS:
+                self.tracks.append(elem)
+                self.session.by_tag[elem.tag].append(elem)
+                index = ElementIndex()
+                index.add_subtree(elem)
+                self._track_indexes[elem] = index
+                continue
+            self.session.add(elem)
+            stack.extend(reversed(elem))
+
+    def element_count(self) -> int:
+        """Elements recorded across the session and track indexes."""
+        indexes = [self.session] + list(self._track_indexes.values())
+        # Track elements are listed in both the session index and their own
+        return sum(len(elems) for index in indexes for elems in index.by_tag.values()) - len(self.tracks)
+
+    def tracks_of(self, *tags: str) -> List[ET.Element]:
+        """Tracks of the given types, grouped by type in the order given."""
+        result = []
+        for tag in tags:
+            result.extend(self.session.all(tag))
+        return result
+
+    def track(self, track: ET.Element) -> ElementIndex:
+        """Index of one track's subtree (built on demand for foreign elements)."""
+        index = self._track_indexes.get(track)
+        if index is None:
+            index = ElementIndex()
+            index.add_subtree(track)
+            self._track_indexes[track] = index
+        return index
+
+    @property
+    def master(self) -> Optional[ET.Element]:
+        return self.session.first('MasterTrack')
+
+    @property
+    def scenes(self) -> List[ET.Element]:
+        return self.session.all('Scene')
+
+    @property
+    def locators(self) -> List[ET.Element]:
+        return self.session.all('Locators/Locator')
+
+    def device_chain(self, track: ET.Element) -> Optional[ET.Element]:
+        """The track's inner device chain (``.//DeviceChain/DeviceChain``)."""
+        return self.track(track).first('DeviceChain/DeviceChain')
+
+    def clips(self, track: ET.Element) -> List[Clip]:
+        """Session clips in slot order, then Arrangement clips in timeline order.
+
+        Built once per track from the track's index: slots come from the
+        ``ClipSlotList`` of ``DeviceChain/MainSequencer`` (the clip sits in
+        the nested ``ClipSlot/Value``), arrangement clips from its
+        ``ClipTimeable`` (MIDI) or ``Sample`` (audio)
+        ``ArrangerAutomation/Events``. Frozen tracks keep a copy of both
+        under ``FreezeSequencer``, which is not read.
+        """
+        clips = self._clips.get(track)
+        if clips is not None:
+            return clips
+
+        clips = []
+        for sequencer in self.track(track).all('DeviceChain/MainSequencer'):
+            slot_list = sequencer.find('ClipSlotList')
+            slots = [slot for slot in slot_list if slot.tag == 'ClipSlot'] if slot_list is not None else []
+            for position, slot in enumerate(slots):
+                value = slot.find('ClipSlot/Value')
+                container = value if value is not None else slot
+                clip = next((e for e in container.iter() if e.tag in CLIP_TYPES), None)
+                if clip is not None:
+                    clips.append(Clip.from_element(clip, 'session', position))
+            for events in sequencer.findall('*/ArrangerAutomation/Events'):
+                for elem in events:
+                    if elem.tag in CLIP_TYPES:
+                        clips.append(Clip.from_element(elem, 'arrangement'))
+
+        self._clips[track] = clips
+        return clips
+
+    def devices(self, track: ET.Element) -> List[ET.Element]:
+        """Devices on a track, in chain order.
+
+        Live nests devices under ``DeviceChain/DeviceChain/Devices``; older
+        files put them directly in the inner chain.
+        """
+        chain = self.device_chain(track)
+        if chain is None:
+            return []
+        devices = chain.find('Devices')
+        return list(devices if devices is not None else chain)
+
+    def automation_targets(self, track: ET.Element) -> Dict[str, str]:
+        """AutomationTarget Id -> name of the parameter that owns it (``Volume``, ``Pan``, ...).
+
+        Automation envelopes point at these Ids through ``EnvelopeTarget/PointeeId``.
+        """
+        targets = {}
+        for key, elems in self.track(track).by_path.items():
+            parent, _, tag = key.partition('/')
+            if tag == 'AutomationTarget':
+                for elem in elems:
+                    targets.setdefault(elem.get('Id'), parent)
+        return targets
+
+    def subtree_hash(self, elem: ET.Element) -> bytes:
+        """Structural (Merkle) hash of an element: tag, attributes, text and child hashes.
+
+        The first call hashes the element's whole subtree bottom-up and
+        memoizes every node, so two files can be compared by skipping any
+        subtrees whose hashes match.
+        """
+        digest = self._hashes.get(elem)
+        if digest is None:
+            self._hash_subtree(elem)
+            digest = self._hashes[elem]
+        return digest
+
+    def _hash_subtree(self, top: ET.Element):
+        hashes = self._hashes
+        blake2b = hashlib.blake2b
+        # Reversed preorder visits every child before its parent
+        for elem in reversed(list(top.iter())):
+            if elem in hashes:
+                continue
+            attrib = elem.attrib
+            text = elem.text.strip() if elem.text else ''
+            key = '\0'.join([elem.tag, text] + [f"{k}={attrib[k]}" for k in sorted(attrib)])
+            digest = blake2b(key.encode('utf-8'), digest_size=16)
+            for child in elem:
+                digest.update(hashes[child])
+            hashes[elem] = digest.digest()
+
+
+def load_indexed(file_path, chunk_size: int = CHUNK_SIZE) -> Tuple[ET.Element, SessionIndex]:
+    """Parse an Ableton file and build its SessionIndex."""
+    root = load_als(file_path, chunk_size)
+    with PROFILER.phase('index'):
+        index = SessionIndex(root)
+    if PROFILER.enabled:
+        PROFILER.count('files_loaded')
+        PROFILER.count('elements_indexed', index.element_count())
+    return root, index
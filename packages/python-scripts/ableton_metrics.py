@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Ableton Version Metrics
+Per-version project metrics kept in _history/metrics.jsonl, so project evolution can be plotted without opening any .als.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+# Bump when columns are added, removed or computed differently; a file
+# written with another layout is started over (``metrics`` backfills it)
+METRICS_VERSION = 1
+
+# Row layout; ``track_notes`` maps each MIDI track name to its note count
+COLUMNS = (
+    'version',
+    'timestamp',
+    'tempo',
+    'time_signature',
+    'track_count',
+    'audio_tracks',
+    'midi_tracks',
+    'return_tracks',
+    'scene_count',
+    'locator_count',
+    'clip_count',
+    'midi_clip_count',
+    'device_count',
+    'note_count',
+    'automation_lanes',
+    'automation_points',
+    'track_notes',
+)
+
+
+def version_metrics(v, summary: Dict) -> List:
+    """Metrics row of one ``VersionInfo`` from its analysis summary."""
+    info = summary['session_info']
+    tracks = list(summary['tracks'].values())
+    track_types = [track['type'] for track in tracks]
+    track_notes: Dict[str, int] = {}
+    for track in tracks:
+        if track['type'] == 'MidiTrack':
+            # Tracks sharing a name are added up
+            notes = track['midi_stats'].get('total_notes', 0)
+            track_notes[track['name']] = track_notes.get(track['name'], 0) + notes
+
+    return [
+        v.version,
+        v.timestamp.isoformat(),
+        info['tempo'],
+        info['time_signature'],
+        info['track_count'],
+        track_types.count('AudioTrack'),
+        track_types.count('MidiTrack'),
+        track_types.count('ReturnTrack'),
+        info['scene_count'],
+        len(info['locators']),
+        sum(len(track['clips']) for track in tracks),
+        sum(clip['type'] == 'midi' for track in tracks for clip in track['clips']),
+        sum(len(track['devices']) for track in tracks),
+        sum(track['midi_stats'].get('total_notes', 0) for track in tracks),
+        sum(len(track['automation']) for track in tracks),
+        sum(lane['point_count'] for track in tracks for lane in track['automation']),
+        track_notes,
+    ]
+
+
+class MetricsFile:
+    """One metrics row per version in ``_history/metrics.jsonl``.
+
+    The first line names the columns; every other line is one version's
+    row as a JSON array in that order. Rows are only ever appended, as
+    versions are registered, so updating the file costs one write however
+    long the history is. Readers see rows ordered by version timestamp;
+    if a version was recorded twice (e.g. by racing processes) the later
+    row wins.
+    """
+
+    FILENAME = 'metrics.jsonl'
+
+    def __init__(self, history_dir):
+        self.path = Path(history_dir) / self.FILENAME
+        self.rows: Dict[str, List] = {}
+        # Whether the file exists with the current header
+        self._valid = False
+        self._load()
+
+    def _header(self) -> str:
+        return json.dumps({'metrics_version': METRICS_VERSION, 'columns': list(COLUMNS)}) + '\n'
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            if f.readline() != self._header():
+                return
+            self._valid = True
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    # Torn append from an interrupted process
+                    continue
+                if isinstance(row, list) and len(row) == len(COLUMNS):
+                    self.rows[row[0]] = row
+
+    def __contains__(self, version: str) -> bool:
+        return version in self.rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def append(self, rows: Iterable[List]):
+        """Add rows (from ``version_metrics``) in one write."""
+        rows = list(rows)
+        if not rows:
+            return
+        text = ''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in rows)
+        if self._valid:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            # New file, or one written with another layout
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self._header() + text)
+            os.replace(tmp_path, self.path)
+            self._valid = True
+        for row in rows:
+            self.rows[row[0]] = row
+
+    def table(self) -> List[Dict]:
+        """Rows as dicts, oldest version first."""
+        return [dict(zip(COLUMNS, row)) for row in sorted(self.rows.values(), key=lambda row: row[1])]
+
+    def columns(self) -> Dict[str, List]:
+        """One list per column, oldest version first, ready for plotting."""
+        rows = sorted(self.rows.values(), key=lambda row: row[1])
+        return {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
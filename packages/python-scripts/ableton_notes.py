@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Ableton Note Tables
+Columnar storage of a MIDI clip's notes with vectorized statistics (uses NumPy when installed).
+"""
+
+import hashlib
+import math
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import compress, filterfalse, repeat
+from operator import add, mod, sub
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: without NumPy the same statistics come from stdlib arrays
+    np = None
+
+from ableton_loader import parse_column
+
+
+# Pitch stored for notes whose key is missing or unreadable
+NO_PITCH = -1
+
+# Largest start shift (beats) at which an unpaired note counts as moved, not removed and added
+MOVE_WINDOW = 4.0
+
+# MidiNoteEvent attribute behind each float column
+_FLOAT_COLUMNS = (
+    ('start', 'Time'),
+    ('duration', 'Duration'),
+    ('velocity', 'Velocity'),
+    ('off_velocity', 'OffVelocity'),
+)
+
+
+def _pitch(value: Optional[str]) -> int:
+    pitch = int(value)
+    if not 0 <= pitch <= 127:
+        raise ValueError(value)
+    return pitch
+
+
+class NoteTable:
+    """The notes of one MIDI clip as parallel columns, one entry per note.
+
+    ``pitch`` holds MIDI note numbers (NO_PITCH when unknown); ``start``,
+    ``duration``, ``velocity`` and ``off_velocity`` are floats (NaN when
+    missing), times in beats. Notes are grouped by KeyTrack in file order.
+    Columns are NumPy arrays when NumPy is installed, else ``array.array``.
+    """
+
+    __slots__ = ('pitch', 'start', 'duration', 'velocity', 'off_velocity')
+
+    def __init__(self, pitch: array, start: array, duration: array,
+                 velocity: array, off_velocity: array):
+        columns = (pitch, start, duration, velocity, off_velocity)
+        if np is not None:
+            # Zero-copy views of the parsed buffers
+            columns = (np.frombuffer(pitch, dtype=np.int16),) + tuple(
+                np.frombuffer(column, dtype=np.float64) for column in columns[1:])
+        self.pitch, self.start, self.duration, self.velocity, self.off_velocity = columns
+
+    def __len__(self) -> int:
+        return len(self.pitch)
+
+    @classmethod
+    def from_clip(cls, clip: ET.Element) -> 'NoteTable':
+        """Read every MidiNoteEvent of a MidiClip element."""
+        pitch = array('h')
+        floats = {name: array('d') for name, _ in _FLOAT_COLUMNS}
+
+        # Notes are grouped by pitch: each KeyTrack holds its MidiKey and note events
+        for key_track in clip.iterfind('.//Notes/KeyTracks/KeyTrack'):
+            notes = key_track.findall('Notes/MidiNoteEvent')
+            if not notes:
+                continue
+
+            attribs = [note.attrib for note in notes]
+            key_elem = key_track.find('MidiKey')
+            if key_elem is not None:
+                key = parse_column([key_elem.attrib], 'Value', _pitch, NO_PITCH)[0]
+                pitch.extend(array('h', [key]) * len(notes))
+            else:
+                # Files without MidiKey carry the pitch on each note
+                pitch.extend(parse_column(attribs, 'Key', _pitch, NO_PITCH))
+
+            for name, attr in _FLOAT_COLUMNS:
+                floats[name].extend(parse_column(attribs, attr, float, math.nan))
+
+        return cls(pitch, **floats)
+
+    def digest(self) -> str:
+        """Short hash of every column; equal digests mean identical notes."""
+        h = hashlib.blake2b(digest_size=8)
+        for column in (self.pitch, self.start, self.duration, self.velocity, self.off_velocity):
+            h.update(column.tobytes())
+        return h.hexdigest()
+
+    def stats(self) -> Dict:
+        """Clip statistics as stored in the analysis summary (plain JSON types)."""
+        stats = {
+            'note_count': len(self),
+            'digest': self.digest(),
+            'pitch_range': None,
+            'velocity_range': None,
+            'avg_velocity': 0,
+            'density': None,
+            'max_polyphony': 0,
+            'avg_polyphony': None,
+            'pitch_classes': [0] * 12,
+        }
+        if not len(self):
+            return stats
+        if np is not None:
+            stats.update(self._numpy_stats())
+        else:
+            stats.update(self._array_stats())
+        return stats
+
+    def _numpy_stats(self) -> Dict:
+        stats = {}
+        pitches = self.pitch[self.pitch != NO_PITCH]
+        if pitches.size:
+            stats['pitch_range'] = (int(pitches.min()), int(pitches.max()))
+            stats['pitch_classes'] = np.bincount(pitches % 12, minlength=12).tolist()
+
+        velocities = self.velocity[~np.isnan(self.velocity)]
+        if velocities.size:
+            stats['velocity_range'] = (float(velocities.min()), float(velocities.max()))
+            stats['avg_velocity'] = float(velocities.mean())
+
+        timed = ~(np.isnan(self.start) | np.isnan(self.duration))
+        starts = np.sort(self.start[timed])
+        ends = np.sort(self.start[timed] + self.duration[timed])
+        if starts.size:
+            # Notes sounding at each start: started so far minus ended so far
+            sounding = (np.searchsorted(starts, starts, 'right')
+                        - np.searchsorted(ends, starts, 'right'))
+            stats['max_polyphony'] = int(sounding.max())
+            span = float(ends[-1] - starts[0])
+            if span > 0:
+                stats['density'] = starts.size / span
+                stats['avg_polyphony'] = float(self.duration[timed].sum()) / span
+        return stats
+
+    def _array_stats(self) -> Dict:
+        stats = {}
+        pitches = [p for p in self.pitch if p != NO_PITCH]
+        if pitches:
+            stats['pitch_range'] = (min(pitches), max(pitches))
+            counts = Counter(map(mod, pitches, repeat(12)))
+            stats['pitch_classes'] = [counts[pc] for pc in range(12)]
+
+        velocities = list(filterfalse(math.isnan, self.velocity))
+        if velocities:
+            stats['velocity_range'] = (min(velocities), max(velocities))
+            stats['avg_velocity'] = math.fsum(velocities) / len(velocities)
+
+        start, duration = self.start, self.duration
+        if any(map(math.isnan, start)) or any(map(math.isnan, duration)):
+            timed = [not (math.isnan(s) or math.isnan(d)) for s, d in zip(start, duration)]
+            start, duration = list(compress(start, timed)), list(compress(duration, timed))
+        if start:
+            starts = sorted(start)
+            ends = sorted(map(add, start, duration))
+            # Notes sounding at each start: started so far minus ended so far
+            stats['max_polyphony'] = max(map(sub, map(partial(bisect_right, starts), starts),
+                                             map(partial(bisect_right, ends), starts)))
+            span = ends[-1] - starts[0]
+            if span > 0:
+                stats['density'] = len(starts) / span
+                stats['avg_polyphony'] = math.fsum(duration) / span
+        return stats
+
+
+@dataclass
+class NoteDiff:
+    """Note changes between two versions of a clip, as row numbers in each NoteTable."""
+    added: List[int] = field(default_factory=list)                # New rows
+    removed: List[int] = field(default_factory=list)              # Old rows
+    moved: List[Tuple[int, int]] = field(default_factory=list)    # (old, new): same pitch, new start
+    velocity: List[Tuple[int, int]] = field(default_factory=list)  # Same pitch and start, new velocity
+    resized: List[Tuple[int, int]] = field(default_factory=list)  # Same pitch and start, new duration
+
+    def counts(self) -> Dict[str, int]:
+        return {'added': len(self.added), 'removed': len(self.removed), 'moved': len(self.moved),
+                'velocity': len(self.velocity), 'resized': len(self.resized)}
+
+    @property
+    def changed(self) -> bool:
+        return any(self.counts().values())
+
+
+def diff_notes(old: NoteTable, new: NoteTable, move_window: float = MOVE_WINDOW) -> NoteDiff:
+    """Align two versions of a clip's notes and classify every difference.
+
+    Notes pair up by (pitch, start) through a hash map, in order when
+    several share both. Of the rest, each old note takes the unclaimed new
+    note of the same pitch with the nearest start within ``move_window``
+    beats, found by binary search over sorted starts and skipping claimed
+    notes through path-compressed links; notes still unpaired were removed
+    or added. O(n log n) overall.
+    """
+    diff = NoteDiff()
+    old_pitch, old_start = old.pitch.tolist(), old.start.tolist()
+    new_pitch, new_start = new.pitch.tolist(), new.start.tolist()
+
+    # Rows per key, reversed so pop() hands them out in file order
+    new_rows: Dict[Tuple[int, float], List[int]] = defaultdict(list)
+    for j in range(len(new_pitch) - 1, -1, -1):
+        new_rows[(new_pitch[j], new_start[j])].append(j)
+
+    old_left = []
+    old_duration, new_duration = old.duration.tolist(), new.duration.tolist()
+    old_velocity, new_velocity = old.velocity.tolist(), new.velocity.tolist()
+    for i, key in enumerate(zip(old_pitch, old_start)):
+        rows = new_rows.get(key)
+        if not rows:
+            old_left.append(i)
+            continue
+        j = rows.pop()
+        if _differs(old_duration[i], new_duration[j]):
+            diff.resized.append((i, j))
+        if _differs(old_velocity[i], new_velocity[j]):
+            diff.velocity.append((i, j))
+
+    # Unpaired new notes per pitch, by start (notes without a start can only be added)
+    unpaired = [j for rows in new_rows.values() for j in rows]
+    by_pitch: Dict[int, Tuple[List[float], List[int]]] = {}
+    for j in sorted((j for j in unpaired if not math.isnan(new_start[j])), key=new_start.__getitem__):
+        starts, rows = by_pitch.setdefault(new_pitch[j], ([], []))
+        starts.append(new_start[j])
+        rows.append(j)
+
+    # Claimed entries are skipped through "next/previous unclaimed" links
+    # (path-compressed), so the lists never shrink: ``after[k]`` leads to the
+    # first unclaimed position >= k (len = none), ``before[k + 1]`` to one
+    # past the last unclaimed position <= k (0 = none)
+    links = {pitch: (list(range(len(starts) + 1)), list(range(len(starts) + 1)))
+             for pitch, (starts, _) in by_pitch.items()}
+    claimed = set()
+
+    for i in sorted(old_left, key=old_start.__getitem__):
+        starts, rows = by_pitch.get(old_pitch[i], ([], []))
+        time = old_start[i]
+        if not starts or math.isnan(time):
+            diff.removed.append(i)
+            continue
+        after, before = links[old_pitch[i]]
+        k = bisect_left(starts, time)
+        right = _unclaimed(after, k)
+        left = _unclaimed(before, k) - 1
+        if left < 0 and right == len(starts):
+            diff.removed.append(i)
+            continue
+        if right == len(starts) or (left >= 0 and time - starts[left] <= starts[right] - time):
+            k = left
+        else:
+            k = right
+        if abs(starts[k] - time) > move_window:
+            diff.removed.append(i)
+            continue
+        diff.moved.append((i, rows[k]))
+        claimed.add(rows[k])
+        after[k] = k + 1
+        before[k + 1] = k
+
+    diff.added = sorted(j for j in unpaired if j not in claimed)
+    diff.removed.sort()
+    return diff
+
+
+def _unclaimed(links: List[int], k: int) -> int:
+    """Follow ``links`` from ``k`` to a position that links to itself, shortening the path."""
+    root = k
+    while links[root] != root:
+        root = links[root]
+    while links[k] != root:
+        links[k], k = root, links[k]
+    return root
+
+
+def _differs(a: float, b: float) -> bool:
+    """Inequality that treats two missing (NaN) values as equal."""
+    return a != b and not (a != a and b != b)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Ableton Profiler
+Per-phase timings, peak memory and counters shared by every CLI's --profile mode.
+
+Phases used across the scripts: decompress, parse, index, analyze, diff,
+render, write. Code marks them with ``PROFILER.phase(name)`` and bumps
+counters with ``PROFILER.count(name, n)``; both cost almost nothing while
+profiling is off.
+"""
+
+import atexit
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+def _reset_peak():
+    """Restart peak tracking (tracemalloc.reset_peak() is Python 3.9+)."""
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    else:
+        # Restarting also forgets live blocks, so later peaks count only new allocations
+        tracemalloc.stop()
+        tracemalloc.start()
+
+
+class _Phase:
+    """Context manager timing one entry into a phase."""
+
+    __slots__ = ('profiler', 'name', 'start', 'carried')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        if profiler.trace_memory:
+            # Peak so far belongs to the enclosing phase; restart it for this one
+            peak = tracemalloc.get_traced_memory()[1]
+            if profiler._stack:
+                parent = profiler._stack[-1]
+                parent.carried = max(parent.carried, peak)
+            profiler._run_peak = max(profiler._run_peak, peak)
+            _reset_peak()
+        self.carried = 0
+        profiler._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        profiler._stack.pop()
+        stats = profiler.phases[self.name]
+        stats['seconds'] += elapsed
+        stats['calls'] += 1
+        if profiler.trace_memory:
+            peak = max(self.carried, tracemalloc.get_traced_memory()[1])
+            stats['peak_bytes'] = max(stats.get('peak_bytes', 0), peak)
+            if profiler._stack:
+                parent = profiler._stack[-1]
+                parent.carried = max(parent.carried, peak)
+            profiler._run_peak = max(profiler._run_peak, peak)
+        return False
+
+
+class Profiler:
+    """Accumulates phase timings and counters for one run (or one watcher cycle)."""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self.reset()
+
+    def enable(self, trace_memory: bool = True):
+        """Start collecting; tracing memory inflates timings of allocation-heavy phases."""
+        self.enabled = True
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.reset()
+
+    def reset(self):
+        """Forget everything collected so far."""
+        self.phases: Dict[str, Dict] = defaultdict(lambda: {'seconds': 0.0, 'calls': 0})
+        self.counters: Dict[str, int] = defaultdict(int)
+        self._stack: List[_Phase] = []
+        self._run_peak = 0
+        self._started = time.perf_counter()
+        if self.trace_memory and tracemalloc.is_tracing():
+            _reset_peak()
+
+    def phase(self, name: str):
+        """Context manager attributing the enclosed work to ``name``."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return _Phase(self, name)
+
+    def count(self, name: str, n: int = 1):
+        """Add ``n`` to a counter such as ``notes`` or ``elements``."""
+        if self.enabled:
+            self.counters[name] += n
+
+    def snapshot(self) -> Dict:
+        """Everything collected so far, as plain JSON-ready data."""
+        record = {
+            'wall_seconds': round(time.perf_counter() - self._started, 6),
+            'phases': {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in stats.items()}
+                       for name, stats in self.phases.items()},
+            'counters': dict(self.counters),
+        }
+        if self.trace_memory:
+            record['peak_bytes'] = max(self._run_peak, tracemalloc.get_traced_memory()[1])
+        return record
+
+    def merge(self, snapshot: Optional[Dict]):
+        """Fold in a snapshot taken in another process (e.g. a pool worker)."""
+        if not snapshot:
+            return
+        for name, stats in snapshot['phases'].items():
+            mine = self.phases[name]
+            mine['seconds'] += stats['seconds']
+            mine['calls'] += stats['calls']
+            if 'peak_bytes' in stats:
+                mine['peak_bytes'] = max(mine.get('peak_bytes', 0), stats['peak_bytes'])
+        for name, n in snapshot['counters'].items():
+            self.counters[name] += n
+        # Peaks of separate processes do not add up; keep the largest
+        self._run_peak = max(self._run_peak, snapshot.get('peak_bytes', 0))
+
+    def emit(self, destination: str = '-', **fields):
+        """Append the snapshot as one JSON line to a file, or to stderr for ``-``."""
+        record = dict(fields)
+        record.update(self.snapshot())
+        line = json.dumps(record) + '\n'
+        if destination == '-':
+            sys.stderr.write(line)
+        else:
+            with open(destination, 'a') as f:
+                f.write(line)
+
+
+# Process-wide profiler the scripts report into
+PROFILER = Profiler()
+
+
+def add_profile_arguments(parser):
+    """Add the shared --profile / --profile-no-memory options to a CLI parser."""
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='Append per-phase timings, peak memory and counters as JSON lines '
+                             'to FILE (default: stderr)')
+    parser.add_argument('--profile-no-memory', action='store_true',
+                        help='Profile without tracemalloc, for undistorted timings')
+
+
+def start_profiling(args, emit_at_exit: bool = True, **fields) -> bool:
+    """Enable the profiler if the CLI was asked to; returns whether it is on.
+
+    By default the run's record (tagged with ``fields``) is written when the
+    process exits; long-running callers emit per cycle instead.
+    """
+    if getattr(args, 'profile', None) is None:
+        return False
+    PROFILER.enable(trace_memory=not args.profile_no_memory)
+    if emit_at_exit:
+        atexit.register(lambda: PROFILER.emit(args.profile, **fields))
+    return True
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Ableton Seek Index
+Random access into gzipped Ableton files, so one track can be parsed without inflating the whole session.
+"""
+
+import contextlib
+import json
+import os
+import xml.etree.ElementTree as ET
+import xml.parsers.expat
+import zlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from ableton_loader import TRACK_TAGS, iter_chunks
+
+
+# Uncompressed bytes between restart points
+CHECKPOINT_SPACING = 1 << 20
+
+# Compressed bytes read per step when inflating from a checkpoint
+READ_SIZE = 64 * 1024
+
+# Cap on _history/seek/, least recently used files evicted first;
+# override with ABLETON_SEEK_MAX_MB
+SEEK_MAX_MB_ENV = 'ABLETON_SEEK_MAX_MB'
+DEFAULT_SEEK_MAX_BYTES = 512 << 20
+
+
+class SeekIndex:
+    """Restart points and track byte ranges for one Ableton file.
+
+    Python's zlib cannot resume inflate in the middle of Live's own gzip
+    stream (there is no inflatePrime to restore a bit offset), so the index
+    keeps a raw-deflate copy of the XML that is fully flushed every
+    ``spacing`` bytes. Each checkpoint maps an offset in the XML to a byte
+    offset in that copy where a fresh decompressor can start. Both files
+    live under ``_history/seek/`` and are rebuilt when the source changes;
+    the folder is kept under ``ABLETON_SEEK_MAX_MB`` (512 MB by default).
+    """
+
+    DIRNAME = 'seek'
+
+    def __init__(self, file_path, history_dir, spacing: int = CHECKPOINT_SPACING):
+        self.file_path = Path(file_path)
+        directory = Path(history_dir) / self.DIRNAME
+        self.data_path = directory / f"{self.file_path.name}.deflate"
+        self.index_path = directory / f"{self.file_path.name}.json"
+        self.spacing = spacing
+        self.checkpoints: List[List[int]] = []
+        self.tracks: List[Dict] = []
+        if not self._load():
+            self.build()
+
+    @classmethod
+    def for_file(cls, file_path) -> Optional['SeekIndex']:
+        """The index of a file in a versioned project (built on first use), or None outside one."""
+        history_dir = Path(file_path).resolve().parent / '_history'
+        if not history_dir.is_dir():
+            return None
+        return cls(file_path, history_dir)
+
+    def _load(self) -> bool:
+        """Read a stored index if it still describes the source file."""
+        if not self.index_path.exists() or not self.data_path.exists():
+            return False
+        try:
+            with open(self.index_path, 'r') as f:
+                data = json.load(f)
+        except ValueError:
+            return False
+        stat = os.stat(self.file_path)
+        if (data.get('size'), data.get('mtime_ns')) != (stat.st_size, stat.st_mtime_ns):
+            return False
+        self.checkpoints = data['checkpoints']
+        self.tracks = data['tracks']
+        # Hits refresh the mtime, which eviction uses as recency
+        os.utime(self.index_path)
+        return True
+
+    def build(self):
+        """Recompress the XML with restart points and record where each track starts and ends."""
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        stat = os.stat(self.file_path)
+        spans = _TrackSpans()
+        compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+        checkpoints = [[0, 0]]
+        consumed = written = 0
+
+        tmp_path = self.data_path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as out:
+            for chunk in iter_chunks(self.file_path, self.spacing):
+                if consumed:
+                    written += out.write(compressor.flush(zlib.Z_FULL_FLUSH))
+                    checkpoints.append([consumed, written])
+                spans.feed(chunk)
+                written += out.write(compressor.compress(chunk))
+                consumed += len(chunk)
+            written += out.write(compressor.flush())
+        spans.close()
+        os.replace(tmp_path, self.data_path)
+
+        self.checkpoints = checkpoints
+        self.tracks = spans.spans
+        # The index is written last, so a present index always has its data
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                       'length': consumed, 'checkpoints': checkpoints,
+                       'tracks': self.tracks}, f)
+        os.replace(tmp_path, self.index_path)
+        self._evict()
+
+    def _evict(self):
+        """Drop least recently used indexes (and their copies) until the folder fits the cap."""
+        max_bytes = DEFAULT_SEEK_MAX_BYTES
+        if os.environ.get(SEEK_MAX_MB_ENV):
+            max_bytes = int(os.environ[SEEK_MAX_MB_ENV]) * 1024 * 1024
+
+        entries = []
+        for index_path in self.index_path.parent.glob('*.json'):
+            data_path = index_path.with_suffix('.deflate')
+            try:
+                stat = index_path.stat()
+                size = stat.st_size + data_path.stat().st_size
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, size, index_path, data_path))
+
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, index_path, data_path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if index_path == self.index_path:
+                continue
+            for path in (index_path, data_path):
+                with contextlib.suppress(OSError):
+                    path.unlink()
+            total -= size
+
+    def read(self, start: int, end: int) -> bytes:
+        """XML bytes ``[start, end)``, inflated from the nearest checkpoint before ``start``."""
+        pos = bisect_right([c[0] for c in self.checkpoints], start) - 1
+        offset, compressed_offset = self.checkpoints[pos]
+        decompressor = zlib.decompressobj(-15)
+        parts = []
+        have = offset
+        with open(self.data_path, 'rb') as f:
+            f.seek(compressed_offset)
+            while have < end:
+                data = f.read(READ_SIZE)
+                if not data:
+                    break
+                out = decompressor.decompress(data)
+                parts.append(out)
+                have += len(out)
+        return b''.join(parts)[start - offset:end - offset]
+
+    def find_track(self, name: str,
+                   tags: Sequence[str] = ('AudioTrack', 'MidiTrack', 'ReturnTrack')) -> Optional[Dict]:
+        """First track with this name (case-insensitive), in ``SessionIndex.tracks_of`` order."""
+        name = name.lower()
+        for tag in tags:
+            for span in self.tracks:
+                if span['tag'] == tag and (span['name'] or 'Unnamed').lower() == name:
+                    return span
+        return None
+
+    def load(self, span: Dict) -> ET.Element:
+        """Parse one track on its own."""
+        return ET.fromstring(self.read(span['start'], span['end']))
+
+
+class _TrackSpans:
+    """Expat pass recording the byte range and name of every track element."""
+
+    def __init__(self):
+        self.parser = xml.parsers.expat.ParserCreate()
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+        self.spans: List[Dict] = []
+        self._current: Optional[Dict] = None
+        self._stack: List[str] = []
+
+    def feed(self, data: bytes):
+        self.parser.Parse(data, False)
+
+    def close(self):
+        self.parser.Parse(b'', True)
+
+    def _start(self, tag: str, attrib: Dict):
+        if self._current is None:
+            if tag in TRACK_TAGS:
+                self._current = {'tag': tag, 'name': None, 'start': self.parser.CurrentByteIndex}
+            return
+        stack = self._stack
+        if (tag == 'EffectiveName' and self._current['name'] is None
+                and stack and stack[-1] == 'Name'):
+            self._current['name'] = attrib.get('Value', '')
+        stack.append(tag)
+
+    def _end(self, tag: str):
+        if self._current is None:
+            return
+        if self._stack:
+            self._stack.pop()
+            return
+        # The index points at "</Tag>"; Live never pads end tags
+        self._current['end'] = self.parser.CurrentByteIndex + len(tag) + 3
+        self.spans.append(self._current)
+        self._current = None
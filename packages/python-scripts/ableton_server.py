@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Ableton Analysis Server
+Long-lived JSON-RPC 2.0 server over stdio that keeps parsed sessions warm between requests.
+
+Each request and response is one line of JSON:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "compare", "params": {"old_file": "...", "new_file": "..."}}
+    {"jsonrpc": "2.0", "id": 1, "result": {"report": "..."}}
+"""
+
+import contextlib
+import inspect
+import json
+import os
+import sys
+import traceback
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ableton_version_manager import (
+    ProjectVersionManager,
+    VersionInfo,
+    format_change_report,
+    iter_summary_changes,
+    summarize_file,
+)
+from ableton_cache import SummaryCache, open_summary_cache
+from ableton_visualizer import IncrementalTimeline
+
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class SessionPool:
+    """In-memory LRU of session summaries keyed by (path, size, mtime).
+
+    Summaries are a few KB per version, so the pool holds hundreds of
+    sessions in the memory one parsed element tree would take. Files inside
+    a project are also looked up in that project's summary cache (SummaryCache or
+    the SQLite store); the ``max_projects`` most recently used caches stay
+    open, and older ones are closed.
+    """
+
+    def __init__(self, max_sessions: int = 256, max_projects: int = 8):
+        self.max_sessions = max_sessions
+        self.max_projects = max_projects
+        self._sessions: 'OrderedDict[Tuple[str, int, int], Dict]' = OrderedDict()
+        self._disk_caches: 'OrderedDict[str, SummaryCache]' = OrderedDict()
+
+    def summary(self, file_path: str) -> Dict:
+        path = str(Path(file_path).resolve())
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+
+        summary = self._sessions.get(key)
+        if summary is not None:
+            self._sessions.move_to_end(key)
+            return summary
+
+        cache = self.disk_cache(Path(path).parent)
+        if cache is not None:
+            summary = cache.get(path)
+            cache.flush()
+        else:
+            summary = summarize_file(path)
+
+        self._sessions[key] = summary
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return summary
+
+    def version_summary(self, manager: ProjectVersionManager, v: VersionInfo) -> Dict:
+        """Summary of a registered version, read from the archive if its .als was removed."""
+        if Path(v.filepath).exists():
+            return self.summary(v.filepath)
+        return manager.summary(v, self.disk_cache(manager.project_path))
+
+    def disk_cache(self, project_path: Path) -> Optional[SummaryCache]:
+        """The project's summary cache, kept open across requests."""
+        history_dir = project_path / '_history'
+        if not history_dir.is_dir():
+            return None
+        key = str(history_dir)
+        cache = self._disk_caches.get(key)
+        if cache is not None:
+            self._disk_caches.move_to_end(key)
+            return cache
+
+        cache = self._disk_caches[key] = open_summary_cache(history_dir)
+        while len(self._disk_caches) > self.max_projects:
+            _, evicted = self._disk_caches.popitem(last=False)
+            evicted.close()
+        return cache
+
+    def close(self):
+        """Close every open summary cache."""
+        while self._disk_caches:
+            _, cache = self._disk_caches.popitem()
+            cache.close()
+
+
+class AnalysisServer:
+    """Dispatches JSON-RPC requests to the version manager and analyzers."""
+
+    def __init__(self, max_sessions: int = 256, max_projects: int = 8):
+        self.pool = SessionPool(max_sessions, max_projects)
+        self.methods: Dict[str, Callable] = {
+            'scan': self.scan,
+            'history': self.history,
+            'compare': self.compare,
+            'diff-latest': self.diff_latest,
+            'timeline': self.timeline,
+            'metrics': self.metrics,
+        }
+
+    # Version managers are cheap to open (versions.idx + journal) and other
+    # processes may register versions, so each request gets a fresh one.
+
+    def _register(self, project_path: str) -> Tuple[ProjectVersionManager, List[VersionInfo]]:
+        """Manager and the versions it just registered, analyzed through the pooled cache."""
+        manager = ProjectVersionManager(project_path)
+        cache = self.pool.disk_cache(manager.project_path)
+        new_versions = manager.register_new_versions(cache=cache)
+        if new_versions:
+            cache.flush()
+        return manager, new_versions
+
+    def scan(self, project_path: str) -> Dict:
+        _, new_versions = self._register(project_path)
+        return {'new_versions': [v.to_dict() for v in new_versions]}
+
+    def history(self, project_path: str) -> Dict:
+        return ProjectVersionManager(project_path).to_dict()
+
+    def compare(self, old_file: str, new_file: str, output: Optional[str] = None,
+                changes: bool = False) -> Dict:
+        return self._report(old_file, new_file, self.pool.summary(old_file), self.pool.summary(new_file),
+                            output, changes)
+
+    def _report(self, old_file: str, new_file: str, old: Dict, new: Dict,
+                output: Optional[str], changes: bool) -> Dict:
+        result = {'report': format_change_report(old_file, new_file, old, new, output)}
+        if changes:
+            # Same records as `--format ndjson`, so callers need not parse the report
+            result['changes'] = [c.to_record() for c in iter_summary_changes(old, new)]
+        return result
+
+    def diff_latest(self, project_path: str, output: Optional[str] = None,
+                    changes: bool = False) -> Dict:
+        manager, _ = self._register(project_path)
+        versions = manager.get_latest_versions(2)
+        if len(versions) < 2:
+            return {'from_version': None, 'to_version': None,
+                    'report': "Need at least 2 versions to compare."}
+
+        old_version, new_version = versions
+        result = self._report(old_version.filepath, new_version.filepath,
+                              self.pool.version_summary(manager, old_version),
+                              self.pool.version_summary(manager, new_version), output, changes)
+        result.update(from_version=old_version.version, to_version=new_version.version)
+        return result
+
+    def timeline(self, project_path: str, output: Optional[str] = None) -> Dict:
+        manager, _ = self._register(project_path)
+        if output is None:
+            output = str(manager.history_dir / 'timeline.html')
+        cache = self.pool.disk_cache(manager.project_path)
+        path = IncrementalTimeline(manager, cache).render(output)
+        return {'path': str(path) if path else None}
+
+    def metrics(self, project_path: str) -> Dict:
+        """Per-version metrics as one list per column, oldest version first."""
+        manager, _ = self._register(project_path)
+        cache = self.pool.disk_cache(manager.project_path)
+        if manager.record_metrics(manager.get_sorted_versions(), cache):
+            cache.flush()
+        return {'columns': manager.metrics.columns()}
+
+    def handle(self, line: str) -> Optional[Dict]:
+        """Answer one request line; notifications (no id) get no response."""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return _error(None, PARSE_ERROR, f"Parse error: {e}")
+
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return _error(request.get('id') if isinstance(request, dict) else None,
+                          INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get('id')
+        method = self.methods.get(request['method'])
+        if method is None:
+            return _error(request_id, METHOD_NOT_FOUND, f"Unknown method: {request['method']}")
+
+        params = request.get('params') or {}
+        try:
+            if isinstance(params, list):
+                bound = inspect.signature(method).bind(*params)
+            else:
+                bound = inspect.signature(method).bind(**params)
+        except TypeError as e:
+            return _error(request_id, INVALID_PARAMS, str(e))
+
+        try:
+            # Analyzer progress messages must not corrupt the protocol stream
+            with contextlib.redirect_stdout(sys.stderr):
+                result = method(*bound.args, **bound.kwargs)
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            return _error(request_id, SERVER_ERROR, f"{type(e).__name__}: {e}")
+
+        if request_id is None:
+            return None
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    def serve(self, stdin=None, stdout=None):
+        """Read requests until stdin closes."""
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        try:
+            for line in stdin:
+                if not line.strip():
+                    continue
+                response = self.handle(line)
+                if response is not None:
+                    stdout.write(json.dumps(response) + '\n')
+                    stdout.flush()
+        finally:
+            self.pool.close()
+
+
+def _error(request_id, code: int, message: str) -> Dict:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Serve scan/history/compare/diff-latest/timeline/metrics as JSON-RPC over stdio'
+    )
+    parser.add_argument('--max-sessions', type=int, default=256,
+                        help='Session summaries kept in memory (default: 256)')
+    parser.add_argument('--max-projects', type=int, default=8,
+                        help='Project summary caches kept open (default: 8)')
+
+    args = parser.parse_args()
+
+    AnalysisServer(args.max_sessions, args.max_projects).serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Ableton Version Store
+Optional SQLite database (_history/versions.db) holding versions, their metadata and analysis summaries.
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Set ABLETON_VERSION_STORE=sqlite to create the store; once versions.db
+# exists every tool uses it, whatever the environment says
+STORE_ENV = 'ABLETON_VERSION_STORE'
+
+# Bump when the table layout changes
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    version TEXT PRIMARY KEY,
+    filepath TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS versions_timestamp ON versions (timestamp);
+CREATE INDEX IF NOT EXISTS versions_filepath ON versions (filepath);
+CREATE TABLE IF NOT EXISTS summaries (
+    hash TEXT PRIMARY KEY,
+    cache_version INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_hash ON files (hash);
+CREATE TABLE IF NOT EXISTS tracks (
+    hash TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    PRIMARY KEY (hash, position)
+);
+CREATE INDEX IF NOT EXISTS tracks_name ON tracks (name);
+CREATE INDEX IF NOT EXISTS tracks_fingerprint ON tracks (fingerprint);
+"""
+
+
+def store_path(history_dir) -> Path:
+    return Path(history_dir) / VersionStore.FILENAME
+
+
+def store_enabled(history_dir) -> bool:
+    """Whether a project's tools should use the SQLite store."""
+    return os.environ.get(STORE_ENV) == 'sqlite' or store_path(history_dir).exists()
+
+
+class VersionStore:
+    """Versions, metadata and summaries of one project in a WAL-mode SQLite file.
+
+    Readers never block writers and vice versa; writers queue on SQLite's
+    lock (up to ``timeout`` seconds) and every write is one transaction,
+    so the watcher, the analysis server and CLI runs can share the file.
+    Summaries are keyed by content hash like the JSON-lines cache, with
+    ``files`` mapping (path, size, mtime) to a hash and ``tracks`` listing
+    each summary's tracks for lookups by name or fingerprint.
+    """
+
+    FILENAME = 'versions.db'
+
+    def __init__(self, history_dir, timeout: float = 30.0):
+        self.path = store_path(history_dir)
+        # Autocommit; writes open explicit transactions in _write()
+        self.conn = sqlite3.connect(str(self.path), timeout=timeout, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        # Every statement is idempotent, so racing creators are harmless
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema_version', ?)",
+                          (str(SCHEMA_VERSION),))
+        found = self.conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()[0]
+        if int(found) != SCHEMA_VERSION:
+            raise ValueError(f"{self.path} has schema {found}, expected {SCHEMA_VERSION}")
+
+    @contextlib.contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """One write transaction; IMMEDIATE takes the write lock up front."""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    def close(self):
+        self.conn.close()
+
+    # Versions
+
+    def version_count(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM versions').fetchone()[0]
+
+    def version_keys(self) -> List[Tuple[str, str]]:
+        """(version, filepath) of every version, without reading metadata."""
+        return self.conn.execute('SELECT version, filepath FROM versions').fetchall()
+
+    def versions(self, latest: Optional[int] = None) -> List[Dict]:
+        """Versions in ``VersionInfo.to_dict()`` layout, oldest first (only the last ``latest``)."""
+        query = ('SELECT version, filepath, timestamp, metadata FROM versions '
+                 'ORDER BY timestamp DESC, rowid DESC')
+        params: Tuple = ()
+        if latest is not None:
+            query += ' LIMIT ?'
+            params = (latest,)
+        rows = self.conn.execute(query, params).fetchall()
+        return [{'version': version, 'filepath': filepath, 'timestamp': timestamp,
+                 'metadata': json.loads(metadata)}
+                for version, filepath, timestamp, metadata in reversed(rows)]
+
+    def add_versions(self, versions: Iterable[Dict]) -> List[str]:
+        """Insert versions (``to_dict()`` layout) and return the ones this call added.
+
+        Versions already stored, e.g. by a concurrent scan, are left alone.
+        """
+        added = []
+        with self._write() as conn:
+            for v in versions:
+                cursor = conn.execute('INSERT OR IGNORE INTO versions VALUES (?, ?, ?, ?)',
+                                      (v['version'], v['filepath'], v['timestamp'],
+                                       json.dumps(v['metadata'])))
+                if cursor.rowcount:
+                    added.append(v['version'])
+        return added
+
+    def versions_with_track(self, name: str) -> List[str]:
+        """Versions whose latest stored summary has a track with this name."""
+        return [row[0] for row in self.conn.execute(
+            'SELECT DISTINCT v.version FROM versions v '
+            'JOIN files f ON f.path = v.filepath '
+            'JOIN tracks t ON t.hash = f.hash '
+            'WHERE t.name = ? ORDER BY v.timestamp', (name,))]
+
+    # Summaries
+
+    def file_hash(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """Content hash recorded for this exact (path, size, mtime), if any."""
+        row = self.conn.execute('SELECT hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?',
+                                (path, size, mtime_ns)).fetchone()
+        return row[0] if row else None
+
+    def summary(self, key: str, cache_version: int) -> Optional[Dict]:
+        row = self.conn.execute('SELECT summary FROM summaries WHERE hash = ? AND cache_version = ?',
+                                (key, cache_version)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def summary_count(self, cache_version: int) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM summaries WHERE cache_version = ?',
+                                 (cache_version,)).fetchone()[0]
+
+    def record_file(self, path: str, size: int, mtime_ns: int, key: str):
+        with self._write() as conn:
+            conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', (path, size, mtime_ns, key))
+
+    def store_summary(self, key: str, cache_version: int, summary: Dict,
+                      path: str, size: int, mtime_ns: int):
+        """Save a summary, its track rows and the file that produced it in one transaction."""
+        tracks = [(key, position, fingerprint, analysis['name'], analysis['type'])
+                  for position, (fingerprint, analysis) in enumerate(summary['tracks'].items())]
+        with self._write() as conn:
+            conn.execute('INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)',
+                         (key, cache_version, json.dumps(summary, separators=(',', ':'))))
+            conn.execute('DELETE FROM tracks WHERE hash = ?', (key,))
+            conn.executemany('INSERT INTO tracks VALUES (?, ?, ?, ?, ?)', tracks)
+            conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', (path, size, mtime_ns, key))
+
+    def drop_stale_summaries(self, cache_version: int) -> int:
+        """Delete summaries written by another analysis version."""
+        with self._write() as conn:
+            stale = [row[0] for row in conn.execute(
+                'SELECT hash FROM summaries WHERE cache_version != ?', (cache_version,))]
+            for key in stale:
+                conn.execute('DELETE FROM summaries WHERE hash = ?', (key,))
+                conn.execute('DELETE FROM tracks WHERE hash = ?', (key,))
+            return len(stale)
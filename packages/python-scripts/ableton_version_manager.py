@@ -5,13 +5,28 @@ Monitors Ableton project folders for new versions and automatically analyzes cha
 """
 
 import json
-import gzip
+import os
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Set, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Set, TextIO, Tuple
 from dataclasses import dataclass, asdict
 import re
+import sys
+from ableton_loader import TRACK_TAGS, SessionIndex, clip_keys, iterparse_als, load_indexed
+from ableton_profile import PROFILER, add_profile_arguments, start_profiling
+from ableton_archive import DEFAULT_KEYFRAME_EVERY, VersionArchive
+from ableton_envelopes import track_envelopes
+from ableton_metrics import MetricsFile, version_metrics
+from ableton_notes import NoteTable
+from ableton_store import STORE_ENV, VersionStore, store_enabled
+from ableton_diff import Change, write_change_records
+
+
+# Files at least this large on disk (gzipped) are summarized by streaming;
+# override the threshold in MB with ABLETON_STREAMING_SUMMARY_MB (0 = always)
+STREAMING_SUMMARY_MB_ENV = 'ABLETON_STREAMING_SUMMARY_MB'
+DEFAULT_STREAMING_SUMMARY_BYTES = 64 * 1024 * 1024
 
 
 @dataclass
@@ -30,9 +45,34 @@ class VersionInfo:
             'metadata': self.metadata
         }
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'VersionInfo':
+        return cls(
+            version=data['version'],
+            filepath=data['filepath'],
+            timestamp=datetime.fromisoformat(data['timestamp']),
+            metadata=data['metadata']
+        )
+
 
 class ProjectVersionManager:
-    """Manages versions for an Ableton project."""
+    """Manages versions for an Ableton project.
+
+    ``versions.json`` is a periodically compacted snapshot. Registrations
+    since the last compaction are appended to ``versions.journal`` (one JSON
+    object per line), and ``versions.idx`` lists the snapshot's version and
+    filepath keys so scanning never has to parse the snapshot itself.
+
+    With the SQLite store enabled (see ``ableton_store``) versions live in
+    ``versions.db`` instead; the JSON files are imported once and then left
+    untouched.
+
+    Each registered version also gets a row in ``metrics.jsonl`` (see
+    ``ableton_metrics``).
+    """
+
+    # Journal entries accumulated before versions.json is rewritten
+    COMPACT_EVERY = 64
 
     def __init__(self, project_path: str):
         self.project_path = Path(project_path)
@@ -40,44 +80,189 @@ class ProjectVersionManager:
         self.history_dir.mkdir(exist_ok=True)
 
         self.version_db_path = self.history_dir / "versions.json"
-        self.versions: List[VersionInfo] = []
+        self.journal_path = self.history_dir / "versions.journal"
+        self.index_path = self.history_dir / "versions.idx"
+
+        self._versions: Optional[List[VersionInfo]] = None
+        self._journal: List[VersionInfo] = []
+        self._known_versions: Set[str] = set()
+        self._known_paths: Set[str] = set()
+        self._metrics: Optional[MetricsFile] = None
+        self._archive: Optional[VersionArchive] = None
+        self.store: Optional[VersionStore] = None
+        if store_enabled(self.history_dir):
+            self.store = VersionStore(self.history_dir)
+            self._load_store()
+        else:
+            self._load_version_index()
+
+    @property
+    def versions(self) -> List[VersionInfo]:
+        """All known versions (the snapshot is parsed on first access)."""
+        if self._versions is None:
+            self._load_version_db()
+        return self._versions
+
+    @property
+    def metrics(self) -> MetricsFile:
+        """Per-version metrics rows (read on first access)."""
+        if self._metrics is None:
+            self._metrics = MetricsFile(self.history_dir)
+        return self._metrics
+
+    @property
+    def archive(self) -> VersionArchive:
+        """Versions stored by ``archive`` (read on first access)."""
+        if self._archive is None:
+            self._archive = VersionArchive(self.history_dir)
+        return self._archive
+
+    def summary(self, v: VersionInfo, cache, streaming: Optional[bool] = None) -> Dict:
+        """Summary of a version through a summary cache, from the archive if its .als was removed."""
+        if Path(v.filepath).exists() or v.version not in self.archive:
+            return cache.get(v.filepath, streaming)
+        with self.archive.restored(v.version) as path:
+            return cache.get(path, streaming)
+
+    @property
+    def version_count(self) -> int:
+        return len(self._known_versions)
+
+    def is_known(self, version: str) -> bool:
+        return version in self._known_versions
+
+    def _remember(self, version: str, filepath: str):
+        self._known_versions.add(version)
+        self._known_paths.add(filepath)
+
+    def _snapshot_signature(self) -> Optional[str]:
+        if not self.version_db_path.exists():
+            return None
+        stat = self.version_db_path.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _load_store(self):
+        """Load known keys from the SQLite store, importing the JSON database on first use."""
+        if self.store.version_count() == 0 and (self.version_db_path.exists() or self.journal_path.exists()):
+            self._load_version_index()
+            self.store.add_versions(v.to_dict() for v in self.versions)
+            self._versions = None
+        for version, filepath in self.store.version_keys():
+            self._remember(version, filepath)
+
+    def _load_version_index(self):
+        """Load known keys from versions.idx and the journal (fast startup path)."""
+        if self.journal_path.exists():
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        v = VersionInfo.from_dict(json.loads(line))
+                    except (ValueError, KeyError):
+                        # Torn append from an interrupted process
+                        continue
+                    self._journal.append(v)
+                    self._remember(v.version, v.filepath)
+
+        signature = self._snapshot_signature()
+        if signature is None:
+            return
+
+        if self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                if f.readline().rstrip('\n') == signature:
+                    for line in f:
+                        version, _, filepath = line.rstrip('\n').partition('\t')
+                        self._remember(version, filepath)
+                    return
+
+        # Missing or stale index (e.g. versions.json written by an older release)
         self._load_version_db()
+        self._write_index(self._versions)
+
+    def _read_snapshot(self) -> List[VersionInfo]:
+        if not self.version_db_path.exists():
+            return []
+        with open(self.version_db_path, 'r') as f:
+            data = json.load(f)
+        return [VersionInfo.from_dict(v) for v in data.get('versions', [])]
 
     def _load_version_db(self):
-        """Load version database."""
-        if self.version_db_path.exists():
-            with open(self.version_db_path, 'r') as f:
-                data = json.load(f)
-                self.versions = [
-                    VersionInfo(
-                        version=v['version'],
-                        filepath=v['filepath'],
-                        timestamp=datetime.fromisoformat(v['timestamp']),
-                        metadata=v['metadata']
-                    )
-                    for v in data.get('versions', [])
-                ]
+        """Load version database (snapshot plus journal)."""
+        if self.store is not None and self.store.version_count():
+            self._versions = [VersionInfo.from_dict(v) for v in self.store.versions()]
+            for v in self._versions:
+                self._remember(v.version, v.filepath)
+            return
+        versions = self._read_snapshot()
+        seen = {v.version for v in versions}
+        for v in self._journal:
+            if v.version not in seen:
+                versions.append(v)
+                seen.add(v.version)
+        versions.sort(key=lambda v: v.timestamp)
+        self._versions = versions
+        for v in versions:
+            self._remember(v.version, v.filepath)
+
+    def _write_index(self, versions: List[VersionInfo]):
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            f.write(self._snapshot_signature() + '\n')
+            for v in versions:
+                f.write(f"{v.version}\t{v.filepath}\n")
+        os.replace(tmp_path, self.index_path)
 
-    def _save_version_db(self):
-        """Save version database."""
-        with open(self.version_db_path, 'w') as f:
+    def _append_journal(self, new_versions: List[VersionInfo]):
+        with open(self.journal_path, 'a') as f:
+            for v in new_versions:
+                f.write(json.dumps(v.to_dict()) + '\n')
+        self._journal.extend(new_versions)
+
+    def compact(self):
+        """Fold the journal into versions.json and start a new journal."""
+        if self.store is not None:
+            # The store needs no compaction
+            return
+        versions = self.versions
+        tmp_path = self.version_db_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
             json.dump({
                 'project': str(self.project_path),
-                'versions': [v.to_dict() for v in self.versions]
+                'versions': [v.to_dict() for v in versions]
             }, f, indent=2)
+        os.replace(tmp_path, self.version_db_path)
+        self._write_index(versions)
+        # Entries already in the snapshot are skipped if this is interrupted
+        open(self.journal_path, 'w').close()
+        self._journal = []
+
+    def to_dict(self) -> Dict:
+        """The full database in versions.json layout."""
+        return {
+            'project': str(self.project_path),
+            'versions': [v.to_dict() for v in self.versions]
+        }
 
-    def scan_for_versions(self) -> List[VersionInfo]:
-        """Scan project folder for version files."""
+    def scan_for_versions(self, candidates: Optional[Iterable[Path]] = None) -> List[VersionInfo]:
+        """Scan project folder (or just ``candidates``) for version files."""
         version_pattern = re.compile(r'.*_(\d+\.\d+\.\d+)\.als$')
         found_versions = []
+        found_keys: Set[str] = set()
 
-        for als_file in self.project_path.glob('*.als'):
+        if candidates is None:
+            candidates = self.project_path.glob('*.als')
+
+        for als_file in candidates:
+            als_file = Path(als_file)
+            if str(als_file) in self._known_paths:
+                continue
             match = version_pattern.match(als_file.name)
             if match:
                 version_str = match.group(1)
 
                 # Check if we already know about this version
-                if not any(v.version == version_str for v in self.versions):
+                if version_str not in self._known_versions and version_str not in found_keys:
+                    found_keys.add(version_str)
                     # Load metadata if exists
                     metadata = {}
                     json_file = als_file.with_suffix('.json')
@@ -100,22 +285,68 @@ class ProjectVersionManager:
 
         return found_versions
 
-    def register_new_versions(self):
-        """Scan and register any new versions found."""
-        new_versions = self.scan_for_versions()
+    def register_new_versions(self, candidates: Optional[Iterable[Path]] = None,
+                              metrics: bool = True, cache=None):
+        """Scan and register any new versions found.
+
+        Unless ``metrics`` is False, each new version is analyzed (through
+        ``cache``, a summary cache, when given) for its metrics row.
+        """
+        new_versions = self.scan_for_versions(candidates)
 
         if new_versions:
-            self.versions.extend(new_versions)
-            self.versions.sort(key=lambda v: v.timestamp)
-            self._save_version_db()
+            for v in new_versions:
+                self._remember(v.version, v.filepath)
+            if self._versions is not None:
+                self._versions.extend(new_versions)
+                self._versions.sort(key=lambda v: v.timestamp)
+            if self.store is not None:
+                # Versions another process registered meanwhile are not reported as new
+                added = set(self.store.add_versions(v.to_dict() for v in new_versions))
+                new_versions = [v for v in new_versions if v.version in added]
+            else:
+                self._append_journal(new_versions)
+                if len(self._journal) >= self.COMPACT_EVERY:
+                    self.compact()
+            if metrics:
+                self.record_metrics(new_versions, cache)
             return new_versions
 
         return []
 
+    def record_metrics(self, versions: Iterable[VersionInfo], cache=None) -> List[List]:
+        """Append metrics rows for those of ``versions`` that have none yet."""
+        missing = [v for v in versions if v.version not in self.metrics]
+        if not missing:
+            return []
+
+        own_cache = cache is None
+        if own_cache:
+            from ableton_cache import open_summary_cache
+            cache = open_summary_cache(self.history_dir, self.store)
+        rows = []
+        try:
+            for v in missing:
+                try:
+                    rows.append(version_metrics(v, self.summary(v, cache)))
+                except Exception as e:
+                    print(f"Warning: Could not analyze {v.version}: {e}", file=sys.stderr)
+        finally:
+            self.metrics.append(rows)
+            if own_cache:
+                cache.flush()
+        return rows
+
     def get_sorted_versions(self) -> List[VersionInfo]:
         """Get all versions sorted by timestamp."""
         return sorted(self.versions, key=lambda v: v.timestamp)
 
+    def get_latest_versions(self, count: int) -> List[VersionInfo]:
+        """The ``count`` most recent versions, oldest first (one indexed query with the store)."""
+        if self.store is not None and self._versions is None:
+            return [VersionInfo.from_dict(v) for v in self.store.versions(latest=count)]
+        return self.get_sorted_versions()[-count:]
+
     def get_version_pairs(self) -> List[Tuple[VersionInfo, VersionInfo]]:
         """Get consecutive version pairs for comparison."""
         sorted_versions = self.get_sorted_versions()
@@ -131,16 +362,23 @@ class ProjectVersionManager:
 class EnhancedAbletonAnalyzer:
     """Deep analysis of Ableton session files."""
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, root: Optional[ET.Element] = None):
         self.file_path = Path(file_path)
         self.root: Optional[ET.Element] = None
-        self._load()
+        self.index: Optional[SessionIndex] = None
+        # Filled lazily; the tree is never modified once loaded
+        self._tracks: Optional[Dict[str, ET.Element]] = None
+        self._by_name: Optional[Dict[str, ET.Element]] = None
+        self._analyses: Dict[ET.Element, Dict] = {}
+        if root is None:
+            self._load()
+        else:
+            # Already parsed tree or fragment, e.g. one track read via SeekIndex
+            self.root, self.index = root, SessionIndex(root)
 
     def _load(self):
-        """Decompress and parse the file."""
-        with gzip.open(self.file_path, 'rb') as f:
-            xml_content = f.read()
-            self.root = ET.fromstring(xml_content)
+        """Decompress, parse and index the file."""
+        self.root, self.index = load_indexed(self.file_path)
 
     def get_session_info(self) -> Dict:
         """Extract high-level session information."""
@@ -154,12 +392,14 @@ class EnhancedAbletonAnalyzer:
 
         # Tempo
         if self.root is not None:
-            tempo_elem = self.root.find('.//MasterTrack//Tempo/Manual')
+            master = self.index.master
+            master_index = self.index.track(master) if master is not None else None
+            tempo_elem = master_index.first('Tempo/Manual') if master_index else None
             if tempo_elem is not None:
                 info['tempo'] = float(tempo_elem.get('Value', 0))
 
             # Time signature
-            ts_elem = self.root.find('.//MasterTrack//TimeSignature')
+            ts_elem = master_index.first('TimeSignature') if master_index else None
             if ts_elem is not None:
                 numerator = ts_elem.find('.//TimeSignatures//RemoteableTimeSignature//Numerator')
                 denominator = ts_elem.find('.//TimeSignatures//RemoteableTimeSignature//Denominator')
@@ -167,17 +407,13 @@ class EnhancedAbletonAnalyzer:
                     info['time_signature'] = f"{numerator.get('Value')}/{denominator.get('Value')}"
 
             # Tracks
-            info['track_count'] = (
-                len(self.root.findall('.//AudioTrack')) +
-                len(self.root.findall('.//MidiTrack')) +
-                len(self.root.findall('.//ReturnTrack'))
-            )
+            info['track_count'] = len(self.index.tracks_of('AudioTrack', 'MidiTrack', 'ReturnTrack'))
 
             # Scenes
-            info['scene_count'] = len(self.root.findall('.//Scene'))
+            info['scene_count'] = len(self.index.scenes)
 
             # Locators
-            for locator in self.root.findall('.//Locators/Locators/Locator'):
+            for locator in self.index.locators:
                 time_elem = locator.find('.//Time')
                 name_elem = locator.find('.//Name')
                 if time_elem is not None and name_elem is not None:
@@ -197,7 +433,7 @@ class EnhancedAbletonAnalyzer:
 
     def _get_track_name(self, track: ET.Element) -> str:
         """Get track name."""
-        name_elem = track.find('.//Name/EffectiveName')
+        name_elem = self.index.track(track).first('Name/EffectiveName')
         if name_elem is not None and name_elem.get('Value'):
             return name_elem.get('Value')
         return "Unnamed"
@@ -205,34 +441,62 @@ class EnhancedAbletonAnalyzer:
     def _get_device_names(self, track: ET.Element) -> List[str]:
         """Get list of device names in a track."""
         devices = []
-        device_chain = track.find('.//DeviceChain/DeviceChain')
-        if device_chain is not None:
-            for device in device_chain:
-                # Try to get plugin name
-                plugin_name = device.find('.//PluginDesc/VstPluginInfo/PlugName')
-                if plugin_name is not None and plugin_name.get('Value'):
-                    devices.append(plugin_name.get('Value'))
-                else:
-                    # Use tag name for built-in devices
-                    devices.append(device.tag)
+        for device in self.index.devices(track):
+            # Try to get plugin name
+            plugin_name = device.find('.//PluginDesc/VstPluginInfo/PlugName')
+            if plugin_name is not None and plugin_name.get('Value'):
+                devices.append(plugin_name.get('Value'))
+            else:
+                # Use tag name for built-in devices
+                devices.append(device.tag)
         return devices
 
     def get_tracks_with_fingerprints(self) -> Dict[str, ET.Element]:
         """Get all tracks with their fingerprints."""
-        tracks = {}
-        if self.root is not None:
-            all_tracks = (
-                self.root.findall('.//AudioTrack') +
-                self.root.findall('.//MidiTrack') +
-                self.root.findall('.//ReturnTrack')
-            )
-            for track in all_tracks:
-                fingerprint = self.get_track_fingerprint(track)
-                tracks[fingerprint] = track
-        return tracks
+        if self._tracks is None:
+            tracks = {}
+            if self.root is not None:
+                for track in self.index.tracks_of('AudioTrack', 'MidiTrack', 'ReturnTrack'):
+                    fingerprint = self.get_track_fingerprint(track)
+                    tracks[fingerprint] = track
+            self._tracks = tracks
+        return self._tracks
+
+    def get_track_names(self) -> List[str]:
+        """Names of the tracks in ``get_tracks_with_fingerprints()`` order."""
+        return [self._get_track_name(t) for t in self.get_tracks_with_fingerprints().values()]
+
+    def find_track(self, name: str) -> Optional[ET.Element]:
+        """First track with this name (case-insensitive), without analyzing any track."""
+        if self._by_name is None:
+            self._by_name = {}
+            for track in self.get_tracks_with_fingerprints().values():
+                self._by_name.setdefault(self._get_track_name(track).lower(), track)
+        return self._by_name.get(name.lower())
+
+    def get_summary(self) -> Dict:
+        """Session info plus per-track analysis keyed by fingerprint."""
+        with PROFILER.phase('analyze'):
+            tracks = self.get_tracks_with_fingerprints()
+            session_info = self.get_session_info()
+        return {
+            'session_info': session_info,
+            'tracks': {fp: self.analyze_track(track) for fp, track in tracks.items()},
+        }
 
     def analyze_track(self, track: ET.Element) -> Dict:
-        """Deep analysis of a single track."""
+        """Deep analysis of a single track, computed once per track."""
+        analysis = self._analyses.get(track)
+        if analysis is not None:
+            return analysis
+        with PROFILER.phase('analyze'):
+            analysis = self._analyze_track(track)
+        self._analyses[track] = analysis
+        PROFILER.count('tracks_analyzed')
+        PROFILER.count('clips', len(analysis['clips']))
+        return analysis
+
+    def _analyze_track(self, track: ET.Element) -> Dict:
         analysis = {
             'name': self._get_track_name(track),
             'type': track.tag,
@@ -248,23 +512,25 @@ class EnhancedAbletonAnalyzer:
             'midi_stats': {},
         }
 
+        track_index = self.index.track(track)
+
         # Color
-        color_elem = track.find('.//Color')
+        color_elem = track_index.first('Color')
         if color_elem is not None:
             analysis['color'] = color_elem.get('Value')
 
         # Mute/Solo/Arm
-        mute_elem = track.find('.//TrackUnfolded')
+        mute_elem = track_index.first('TrackUnfolded')
         if mute_elem is not None:
             analysis['muted'] = mute_elem.get('Value') == 'true'
 
         # Volume
-        vol_elem = track.find('.//Volume/Manual')
+        vol_elem = track_index.first('Volume/Manual')
         if vol_elem is not None:
             analysis['volume'] = float(vol_elem.get('Value', 0))
 
         # Pan
-        pan_elem = track.find('.//Pan/Manual')
+        pan_elem = track_index.first('Pan/Manual')
         if pan_elem is not None:
             analysis['pan'] = float(pan_elem.get('Value', 0))
 
@@ -274,152 +540,316 @@ class EnhancedAbletonAnalyzer:
         # Automation lanes
         analysis['automation'] = self._analyze_automation(track)
 
-        # Clips with MIDI analysis
-        clip_slots = track.findall('.//ClipSlot')
-        for slot in clip_slots:
-            midi_clip = slot.find('.//MidiClip')
-            audio_clip = slot.find('.//AudioClip')
-            clip = midi_clip or audio_clip
-
-            if clip is not None:
-                clip_name_elem = clip.find('.//Name')
-                clip_info = {
-                    'type': 'midi' if midi_clip is not None else 'audio',
-                    'name': clip_name_elem.get('Value', '') if clip_name_elem is not None else '',
-                }
-
-                # Add MIDI note analysis
-                if midi_clip is not None:
-                    midi_analysis = self._analyze_midi_clip(midi_clip)
-                    clip_info['midi'] = midi_analysis
-
-                    # Aggregate MIDI stats for the track
-                    if 'total_notes' not in analysis['midi_stats']:
-                        analysis['midi_stats'] = {
-                            'total_notes': 0,
-                            'clips_with_notes': 0,
-                            'pitch_range': None
-                        }
-
-                    if midi_analysis['note_count'] > 0:
-                        analysis['midi_stats']['total_notes'] += midi_analysis['note_count']
-                        analysis['midi_stats']['clips_with_notes'] += 1
-
-                        # Update pitch range
-                        if analysis['midi_stats']['pitch_range'] is None:
-                            analysis['midi_stats']['pitch_range'] = midi_analysis['pitch_range']
-                        elif midi_analysis['pitch_range']:
-                            old_min, old_max = analysis['midi_stats']['pitch_range']
-                            new_min, new_max = midi_analysis['pitch_range']
-                            analysis['midi_stats']['pitch_range'] = (
-                                min(old_min, new_min),
-                                max(old_max, new_max)
-                            )
-
-                analysis['clips'].append(clip_info)
+        # Session and Arrangement clips with MIDI analysis
+        for clip in self.index.clips(track):
+            clip_info = {
+                'type': clip.type,
+                'name': clip.name,
+                'view': clip.view,
+                'slot': clip.slot,
+                'start': clip.start,
+                'end': clip.end,
+                'loop': [clip.loop_start, clip.loop_end] if clip.looping else None,
+            }
+
+            # Add MIDI note analysis
+            if clip.type == 'midi':
+                midi_analysis = self._analyze_midi_clip(clip.elem)
+                clip_info['midi'] = midi_analysis
+
+                # Aggregate MIDI stats for the track
+                if 'total_notes' not in analysis['midi_stats']:
+                    analysis['midi_stats'] = {
+                        'total_notes': 0,
+                        'clips_with_notes': 0,
+                        'pitch_range': None,
+                        'max_polyphony': 0,
+                        'pitch_classes': [0] * 12,
+                    }
+
+                if midi_analysis['note_count'] > 0:
+                    analysis['midi_stats']['total_notes'] += midi_analysis['note_count']
+                    analysis['midi_stats']['clips_with_notes'] += 1
+                    analysis['midi_stats']['max_polyphony'] = max(
+                        analysis['midi_stats']['max_polyphony'], midi_analysis['max_polyphony'])
+                    analysis['midi_stats']['pitch_classes'] = [
+                        total + count for total, count in
+                        zip(analysis['midi_stats']['pitch_classes'], midi_analysis['pitch_classes'])
+                    ]
+
+                    # Update pitch range
+                    if analysis['midi_stats']['pitch_range'] is None:
+                        analysis['midi_stats']['pitch_range'] = midi_analysis['pitch_range']
+                    elif midi_analysis['pitch_range']:
+                        old_min, old_max = analysis['midi_stats']['pitch_range']
+                        new_min, new_max = midi_analysis['pitch_range']
+                        analysis['midi_stats']['pitch_range'] = (
+                            min(old_min, new_min),
+                            max(old_max, new_max)
+                        )
+
+            analysis['clips'].append(clip_info)
 
         return analysis
 
     def _analyze_automation(self, track: ET.Element) -> List[Dict]:
         """Analyze automation lanes in a track."""
+        targets = self.index.automation_targets(track)
         automation_lanes = []
+        for envelope in track_envelopes(self.index, track):
+            PROFILER.count('automation_points', len(envelope))
+            automation_lanes.append(envelope.stats(targets.get(envelope.pointee)))
+        return automation_lanes
 
-        # Find all automation envelopes
-        envelopes = track.findall('.//AutomationEnvelopes/Envelopes/AutomationEnvelope')
-
-        for envelope in envelopes:
-            # Get the automated parameter ID
-            pointee = envelope.find('.//Envelope/Automation/Pointee')
-            if pointee is not None:
-                param_id = pointee.get('Id', 'Unknown')
-
-                # Count automation points
-                events = envelope.findall('.//Envelope/Automation/Events/FloatEvent')
-
-                # Get min/max values if there are points
-                values = []
-                for event in events:
-                    value = event.get('Value')
-                    if value:
-                        try:
-                            values.append(float(value))
-                        except ValueError:
-                            pass
-
-                lane_info = {
-                    'parameter': param_id,
-                    'point_count': len(events),
-                }
+    def _analyze_midi_clip(self, clip: ET.Element) -> Dict:
+        """Analyze MIDI notes in a clip."""
+        notes = NoteTable.from_clip(clip)
+        PROFILER.count('notes', len(notes))
+        return notes.stats()
+
+
+def stream_summary(file_path) -> Dict:
+    """``EnhancedAbletonAnalyzer(file_path).get_summary()`` in bounded memory.
+
+    The file is parsed as a stream and only the open ancestors of the
+    current element are kept, plus the track being read. Each finished
+    track is analyzed on its own by the same analyzer code and then
+    dropped, so peak memory follows the largest track, not the session.
+    """
+    track_tags = ('AudioTrack', 'MidiTrack', 'ReturnTrack')
+    by_type: Dict[str, List[Tuple[str, Dict]]] = {tag: [] for tag in track_tags}
+    info = {
+        'tempo': None,
+        'time_signature': None,
+        'track_count': 0,
+        'scene_count': 0,
+        'locators': [],
+    }
+    master_seen = False
+
+    stack: List[ET.Element] = []
+    # Top-level track or locator whose subtree is still being read
+    pending: Optional[ET.Element] = None
+    for event, elem in iterparse_als(file_path, events=('start', 'end')):
+        if event == 'start':
+            if pending is None:
+                stack.append(elem)
+                if elem.tag in TRACK_TAGS or (elem.tag == 'Locator' and len(stack) > 1
+                                              and stack[-2].tag == 'Locators'):
+                    pending = elem
+            continue
+        if pending is not None and elem is not pending:
+            continue
+        pending = None
+
+        if elem.tag in track_tags:
+            analyzer = EnhancedAbletonAnalyzer(file_path, root=elem)
+            by_type[elem.tag].append((analyzer.get_track_fingerprint(elem), analyzer.analyze_track(elem)))
+            info['track_count'] += 1
+        elif elem.tag == 'MasterTrack':
+            if not master_seen:
+                with PROFILER.phase('analyze'):
+                    master_info = EnhancedAbletonAnalyzer(file_path, root=elem).get_session_info()
+                info['tempo'] = master_info['tempo']
+                info['time_signature'] = master_info['time_signature']
+                master_seen = True
+        elif elem.tag == 'Scene':
+            info['scene_count'] += 1
+        elif elem.tag == 'Locator' and len(stack) > 1 and stack[-2].tag == 'Locators':
+            time_elem = elem.find('.//Time')
+            name_elem = elem.find('.//Name')
+            if time_elem is not None and name_elem is not None:
+                info['locators'].append({
+                    'time': float(time_elem.get('Value', 0)),
+                    'name': name_elem.get('Value', '')
+                })
+
+        # Everything needed from this subtree has been taken
+        stack.pop()
+        if stack:
+            stack[-1].remove(elem)
+        elem.clear()
+
+    # Same order and duplicate-fingerprint handling as get_tracks_with_fingerprints()
+    tracks = {}
+    for tag in track_tags:
+        for fingerprint, analysis in by_type[tag]:
+            tracks[fingerprint] = analysis
+    return {'session_info': info, 'tracks': tracks}
+
+
+def use_streaming(file_path) -> bool:
+    """Whether a file is big enough for the bounded-memory summary."""
+    limit = DEFAULT_STREAMING_SUMMARY_BYTES
+    if os.environ.get(STREAMING_SUMMARY_MB_ENV):
+        limit = int(os.environ[STREAMING_SUMMARY_MB_ENV]) * 1024 * 1024
+    return os.path.getsize(file_path) >= limit
+
+
+def summarize_file(file_path, streaming: Optional[bool] = None) -> Dict:
+    """Summary of one file; ``streaming=None`` picks the mode from the file size."""
+    if streaming is None:
+        streaming = use_streaming(file_path)
+    if streaming:
+        return stream_summary(file_path)
+    return EnhancedAbletonAnalyzer(file_path).get_summary()
+
+
+def generate_change_report(old_file: str, new_file: str, output_file: Optional[str] = None,
+                           streaming: Optional[bool] = None) -> str:
+    """Generate detailed change report between two versions."""
+    old = summarize_file(old_file, streaming)
+    new = summarize_file(new_file, streaming)
+    return format_change_report(old_file, new_file, old, new, output_file)
 
-                if values:
-                    lane_info['min_value'] = min(values)
-                    lane_info['max_value'] = max(values)
 
-                automation_lanes.append(lane_info)
+def generate_change_records(old_file: str, new_file: str, output_file: Optional[str] = None,
+                            streaming: Optional[bool] = None) -> int:
+    """Write the changes between two versions as NDJSON to a file or stdout."""
+    old = summarize_file(old_file, streaming)
+    new = summarize_file(new_file, streaming)
+    return write_change_report_records(old_file, new_file, old, new, output_file)
 
-        return automation_lanes
 
-    def _analyze_midi_clip(self, clip: ET.Element) -> Dict:
-        """Analyze MIDI notes in a clip."""
-        midi_info = {
-            'note_count': 0,
-            'pitch_range': None,
-            'velocity_range': None,
-            'avg_velocity': 0,
-        }
+def format_change_report(old_file: str, new_file: str, old: Dict, new: Dict,
+                         output_file: Optional[str] = None) -> str:
+    """Build the change report from two ``get_summary()`` results."""
+    with PROFILER.phase('diff'):
+        changes = list(iter_summary_changes(old, new))
+    PROFILER.count('changes', len(changes))
 
-        # Find all MIDI notes
-        notes = clip.findall('.//Notes/KeyTracks/KeyTrack/Notes/MidiNoteEvent')
+    with PROFILER.phase('render'):
+        report = "\n".join(_change_report_lines(old_file, new_file, old, new, changes))
 
-        if not notes:
-            return midi_info
+    if output_file:
+        with PROFILER.phase('write'):
+            with open(output_file, 'w') as f:
+                f.write(report)
 
-        midi_info['note_count'] = len(notes)
+    return report
 
-        pitches = []
-        velocities = []
 
-        for note in notes:
-            # Get pitch (MIDI note number 0-127)
-            pitch = note.get('Key')
-            if pitch:
-                try:
-                    pitches.append(int(pitch))
-                except ValueError:
-                    pass
+def write_change_report_records(old_file: str, new_file: str, old: Dict, new: Dict,
+                                output_file: Optional[str] = None) -> int:
+    """Stream the changes between two summaries as NDJSON to a file or stdout."""
+    with PROFILER.phase('diff'):
+        if output_file is None:
+            count = _write_summary_records(old_file, new_file, old, new, sys.stdout)
+        else:
+            with open(output_file, 'w') as f:
+                count = _write_summary_records(old_file, new_file, old, new, f)
+    PROFILER.count('changes', count)
+    return count
 
-            # Get velocity (0.0-1.0 in Ableton XML, usually)
-            velocity = note.get('Velocity')
-            if velocity:
-                try:
-                    velocities.append(float(velocity))
-                except ValueError:
-                    pass
 
-        if pitches:
-            midi_info['pitch_range'] = (min(pitches), max(pitches))
+def _write_summary_records(old_file: str, new_file: str, old: Dict, new: Dict, out: TextIO) -> int:
+    return write_change_records(iter_summary_changes(old, new), out,
+                                'ableton_version_manager', old_file, new_file)
 
-        if velocities:
-            midi_info['velocity_range'] = (min(velocities), max(velocities))
-            midi_info['avg_velocity'] = sum(velocities) / len(velocities)
 
-        return midi_info
+# Session-level fields compared between summaries, with their report labels
+SESSION_FIELDS = [
+    ('tempo', 'Tempo', ' BPM'),
+    ('time_signature', 'Time Signature', ''),
+    ('track_count', 'Track Count', ''),
+    ('scene_count', 'Scene Count', ''),
+]
 
 
-def generate_change_report(old_file: str, new_file: str, output_file: Optional[str] = None) -> str:
-    """Generate detailed change report between two versions."""
-    old = EnhancedAbletonAnalyzer(old_file)
-    new = EnhancedAbletonAnalyzer(new_file)
+def iter_summary_changes(old: Dict, new: Dict) -> Iterator[Change]:
+    """Changes between two ``get_summary()`` results, in change-report order.
 
-    old_info = old.get_session_info()
-    new_info = new.get_session_info()
+    Track changes are keyed by fingerprint (``details['fingerprint']``);
+    per-track changes have paths like ``<fingerprint>/volume``.
+    """
+    old_info = old['session_info']
+    new_info = new['session_info']
+    for key, _, _ in SESSION_FIELDS:
+        if old_info[key] != new_info[key]:
+            yield Change('modified', 'session', f"session/{key}", old=old_info[key], new=new_info[key])
 
-    old_tracks = old.get_tracks_with_fingerprints()
-    new_tracks = new.get_tracks_with_fingerprints()
+    old_tracks = old['tracks']
+    new_tracks = new['tracks']
 
     old_fingerprints = set(old_tracks.keys())
     new_fingerprints = set(new_tracks.keys())
 
+    for fp in sorted(new_fingerprints - old_fingerprints):
+        yield Change('added', 'track', fp, {'fingerprint': fp, 'type': new_tracks[fp]['type']},
+                     track=fp.split('::')[0])
+
+    for fp in sorted(old_fingerprints - new_fingerprints):
+        yield Change('removed', 'track', fp, {'fingerprint': fp, 'type': old_tracks[fp]['type']},
+                     track=fp.split('::')[0])
+
+    for fp in old_fingerprints & new_fingerprints:
+        old_analysis = old_tracks[fp]
+        new_analysis = new_tracks[fp]
+
+        def modified(category: str, aspect: str, old_value, new_value) -> Change:
+            return Change('modified', category, f"{fp}/{aspect}", {'fingerprint': fp},
+                          track=old_analysis['name'], old=old_value, new=new_value)
+
+        for aspect in ('volume', 'pan'):
+            if old_analysis[aspect] != new_analysis[aspect]:
+                yield modified('parameter', aspect, old_analysis[aspect], new_analysis[aspect])
+
+        if old_analysis['devices'] != new_analysis['devices']:
+            yield modified('device', 'devices', old_analysis['devices'], new_analysis['devices'])
+
+        if len(old_analysis['clips']) != len(new_analysis['clips']):
+            yield modified('clip', 'clips', len(old_analysis['clips']), len(new_analysis['clips']))
+
+        # Automation changes
+        old_auto_count = len(old_analysis['automation'])
+        new_auto_count = len(new_analysis['automation'])
+        if old_auto_count != new_auto_count:
+            yield modified('automation', 'automation', old_auto_count, new_auto_count)
+
+        # Lanes on both sides whose breakpoints differ (curve details need the files: ableton_diff.py)
+        new_lanes = {lane['parameter']: lane for lane in new_analysis['automation']}
+        for lane in old_analysis['automation']:
+            new_lane = new_lanes.get(lane['parameter'])
+            if new_lane is not None and lane['digest'] != new_lane['digest']:
+                change = modified('automation', f"automation/{lane['parameter']}",
+                                  lane['point_count'], new_lane['point_count'])
+                change.details['parameter'] = new_lane['name'] or lane['parameter']
+                yield change
+
+        # MIDI changes
+        old_midi = old_analysis.get('midi_stats', {})
+        new_midi = new_analysis.get('midi_stats', {})
+
+        old_notes = old_midi.get('total_notes', 0)
+        new_notes = new_midi.get('total_notes', 0)
+        if old_notes != new_notes:
+            yield modified('note', 'midi/total_notes', old_notes, new_notes)
+
+        # Pitch range changes (summaries loaded from JSON hold lists, not tuples)
+        old_pitch = list(old_midi['pitch_range']) if old_midi.get('pitch_range') else None
+        new_pitch = list(new_midi['pitch_range']) if new_midi.get('pitch_range') else None
+        if old_pitch != new_pitch:
+            yield modified('note', 'midi/pitch_range', old_pitch, new_pitch)
+
+        # MIDI clips in the same place whose notes differ (note-level detail needs the files: ableton_diff.py)
+        old_clips = dict(zip(clip_keys((c['view'], c['slot'], c['start'], c['name'])
+                                       for c in old_analysis['clips']),
+                             old_analysis['clips']))
+        for key, clip in zip(clip_keys((c['view'], c['slot'], c['start'], c['name'])
+                                       for c in new_analysis['clips']),
+                             new_analysis['clips']):
+            old_clip = old_clips.get(key)
+            if old_clip is None or 'midi' not in clip or 'midi' not in old_clip:
+                continue
+            if old_clip['midi']['digest'] != clip['midi']['digest']:
+                change = modified('note', f"clips/{key}", old_clip['midi']['note_count'],
+                                  clip['midi']['note_count'])
+                change.details['clip'] = clip['name'] or key
+                yield change
+
+
+def _change_report_lines(old_file: str, new_file: str, old: Dict, new: Dict,
+                         changes: List[Change]) -> List[str]:
     report_lines = [
         "=" * 80,
         f"ABLETON SESSION CHANGE REPORT",
@@ -433,105 +863,173 @@ def generate_change_report(old_file: str, new_file: str, output_file: Optional[s
         "-" * 80,
     ]
 
-    # Session info changes
-    if old_info['tempo'] != new_info['tempo']:
-        report_lines.append(f"  Tempo: {old_info['tempo']} -> {new_info['tempo']} BPM")
-
-    if old_info['time_signature'] != new_info['time_signature']:
-        report_lines.append(f"  Time Signature: {old_info['time_signature']} -> {new_info['time_signature']}")
-
-    if old_info['track_count'] != new_info['track_count']:
-        report_lines.append(f"  Track Count: {old_info['track_count']} -> {new_info['track_count']}")
+    labels = {f"session/{key}": (label, unit) for key, label, unit in SESSION_FIELDS}
+    for change in changes:
+        if change.category == 'session':
+            label, unit = labels[change.path]
+            report_lines.append(f"  {label}: {change.old} -> {change.new}{unit}")
 
-    if old_info['scene_count'] != new_info['scene_count']:
-        report_lines.append(f"  Scene Count: {old_info['scene_count']} -> {new_info['scene_count']}")
-
-    # Track changes
-    added_tracks = new_fingerprints - old_fingerprints
-    removed_tracks = old_fingerprints - new_fingerprints
-    common_tracks = old_fingerprints & new_fingerprints
-
-    if added_tracks or removed_tracks or common_tracks:
+    if old['tracks'] or new['tracks']:
         report_lines.extend(["", "TRACK CHANGES:", "-" * 80])
 
-    if added_tracks:
-        report_lines.append(f"\n  Added Tracks ({len(added_tracks)}):")
-        for fp in sorted(added_tracks):
-            track_name = new.get_track_fingerprint(new_tracks[fp]).split('::')[0]
-            report_lines.append(f"    + {track_name}")
-
-    if removed_tracks:
-        report_lines.append(f"\n  Removed Tracks ({len(removed_tracks)}):")
-        for fp in sorted(removed_tracks):
-            track_name = old.get_track_fingerprint(old_tracks[fp]).split('::')[0]
-            report_lines.append(f"    - {track_name}")
-
-    # Modified tracks
-    if common_tracks:
-        modified = []
-        for fp in common_tracks:
-            old_analysis = old.analyze_track(old_tracks[fp])
-            new_analysis = new.analyze_track(new_tracks[fp])
-
-            changes = []
-            if old_analysis['volume'] != new_analysis['volume']:
-                changes.append(f"volume: {old_analysis['volume']:.2f} -> {new_analysis['volume']:.2f}")
-
-            if old_analysis['pan'] != new_analysis['pan']:
-                changes.append(f"pan: {old_analysis['pan']:.2f} -> {new_analysis['pan']:.2f}")
-
-            if old_analysis['devices'] != new_analysis['devices']:
-                changes.append(f"devices changed")
-
-            if len(old_analysis['clips']) != len(new_analysis['clips']):
-                changes.append(f"clips: {len(old_analysis['clips'])} -> {len(new_analysis['clips'])}")
-
-            # Automation changes
-            old_auto_count = len(old_analysis['automation'])
-            new_auto_count = len(new_analysis['automation'])
-            if old_auto_count != new_auto_count:
-                changes.append(f"automation lanes: {old_auto_count} -> {new_auto_count}")
-
-            # MIDI changes
-            old_midi = old_analysis.get('midi_stats', {})
-            new_midi = new_analysis.get('midi_stats', {})
-
-            old_notes = old_midi.get('total_notes', 0)
-            new_notes = new_midi.get('total_notes', 0)
-
-            if old_notes != new_notes:
-                changes.append(f"MIDI notes: {old_notes} -> {new_notes}")
-
-            # Pitch range changes
-            old_pitch = old_midi.get('pitch_range')
-            new_pitch = new_midi.get('pitch_range')
-
-            if old_pitch != new_pitch and new_pitch:
-                pitch_low, pitch_high = new_pitch
-                note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-                low_note = f"{note_names[pitch_low % 12]}{pitch_low // 12 - 2}"
-                high_note = f"{note_names[pitch_high % 12]}{pitch_high // 12 - 2}"
-                changes.append(f"pitch range: {low_note} to {high_note}")
-
-            if changes:
-                modified.append((old_analysis['name'], changes))
-
-        if modified:
-            report_lines.append(f"\n  Modified Tracks ({len(modified)}):")
-            for track_name, changes in modified:
-                report_lines.append(f"    * {track_name}")
-                for change in changes:
-                    report_lines.append(f"        - {change}")
+    added = [c for c in changes if c.category == 'track' and c.change_type == 'added']
+    if added:
+        report_lines.append(f"\n  Added Tracks ({len(added)}):")
+        for change in added:
+            report_lines.append(f"    + {change.track}")
+
+    removed = [c for c in changes if c.category == 'track' and c.change_type == 'removed']
+    if removed:
+        report_lines.append(f"\n  Removed Tracks ({len(removed)}):")
+        for change in removed:
+            report_lines.append(f"    - {change.track}")
+
+    # Modified tracks, in the order their first change was found
+    modified: Dict[str, Tuple[str, List[str]]] = {}
+    for change in changes:
+        if change.change_type != 'modified' or change.category == 'session':
+            continue
+        fp = change.details['fingerprint']
+        description = _describe_track_change(change.path[len(fp) + 1:], change.old, change.new,
+                                             change.details)
+        if description is not None:
+            modified.setdefault(fp, (change.track, []))[1].append(description)
+
+    if modified:
+        report_lines.append(f"\n  Modified Tracks ({len(modified)}):")
+        for track_name, descriptions in modified.values():
+            report_lines.append(f"    * {track_name}")
+            for description in descriptions:
+                report_lines.append(f"        - {description}")
 
     report_lines.extend(["", "=" * 80])
 
-    report = "\n".join(report_lines)
+    return report_lines
+
+
+def _describe_track_change(aspect: str, old_value, new_value, details: Dict) -> Optional[str]:
+    if aspect in ('volume', 'pan'):
+        return f"{aspect}: {old_value:.2f} -> {new_value:.2f}"
+    if aspect == 'devices':
+        return "devices changed"
+    if aspect == 'clips':
+        return f"clips: {old_value} -> {new_value}"
+    if aspect == 'automation':
+        return f"automation lanes: {old_value} -> {new_value}"
+    if aspect.startswith('automation/'):
+        return f"automation {details['parameter']} edited ({old_value} -> {new_value} points)"
+    if aspect.startswith('clips/'):
+        return f"notes edited in clip '{details['clip']}' ({old_value} -> {new_value} notes)"
+    if aspect == 'midi/total_notes':
+        return f"MIDI notes: {old_value} -> {new_value}"
+    if aspect == 'midi/pitch_range' and new_value:
+        pitch_low, pitch_high = new_value
+        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+        low_note = f"{note_names[pitch_low % 12]}{pitch_low // 12 - 2}"
+        high_note = f"{note_names[pitch_high % 12]}{pitch_high // 12 - 2}"
+        return f"pitch range: {low_note} to {high_note}"
+    return None
+
+
+def _summarize_file(file_path: str, profile: bool = False, trace_memory: bool = False,
+                    streaming: Optional[bool] = None) -> Tuple[Dict, Optional[Dict]]:
+    """Process-pool worker: parse one version and return its summary and profile."""
+    if profile:
+        PROFILER.enable(trace_memory)
+    summary = summarize_file(file_path, streaming)
+    return summary, PROFILER.snapshot() if profile else None
+
+
+def iter_pair_reports(manager: ProjectVersionManager, workers: Optional[int] = None,
+                      reports_dir: Optional[Path] = None, streaming: Optional[bool] = None
+                      ) -> Iterator[Tuple[VersionInfo, VersionInfo, str]]:
+    """Diff every consecutive version pair, yielding reports as pairs complete.
+
+    Each version is parsed once, in a process pool, and its summary serves
+    both pairs it belongs to (and the version's metrics row, if missing);
+    versions already in the project's summary cache are not parsed at all.
+    A pair is reported as soon as both of its versions are available, so
+    output arrives in completion order.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from ableton_cache import open_summary_cache
+
+    pairs = manager.get_version_pairs()
+    if not pairs:
+        return
+
+    # Pairs each version takes part in, so summaries can be dropped once used
+    pairs_of: Dict[str, List[int]] = {}
+    for i, (old, new) in enumerate(pairs):
+        pairs_of.setdefault(old.version, []).append(i)
+        pairs_of.setdefault(new.version, []).append(i)
+    remaining = {version: len(indexes) for version, indexes in pairs_of.items()}
+
+    cache = open_summary_cache(manager.history_dir, manager.store)
+    summaries: Dict[str, Dict] = {}
+    # Pairs already reported; each is reported, and releases its summaries, once
+    reported: Set[int] = set()
+    metrics_rows = []
+
+    def add_summary(v: VersionInfo, summary: Dict):
+        summaries[v.version] = summary
+        if v.version not in manager.metrics:
+            metrics_rows.append(version_metrics(v, summary))
+
+    def finished_pairs(version: str):
+        for i in pairs_of[version]:
+            old, new = pairs[i]
+            if i in reported or old.version not in summaries or new.version not in summaries:
+                continue
+            reported.add(i)
+            output_file = None
+            if reports_dir is not None:
+                output_file = str(Path(reports_dir) / f"changes_{old.version}_to_{new.version}.txt")
+            report = format_change_report(old.filepath, new.filepath,
+                                          summaries[old.version], summaries[new.version],
+                                          output_file)
+            for v in (old, new):
+                remaining[v.version] -= 1
+                if remaining[v.version] == 0:
+                    del summaries[v.version]
+            yield old, new, report
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for v in manager.get_sorted_versions():
+                if not Path(v.filepath).exists():
+                    # Removed after archiving: rebuilt here, one at a time
+                    try:
+                        add_summary(v, manager.summary(v, cache, streaming))
+                    except Exception as e:
+                        print(f"Warning: Could not analyze {v.version}: {e}")
+                    continue
+                summary = cache.lookup(v.filepath)
+                if summary is None:
+                    futures[pool.submit(_summarize_file, v.filepath, PROFILER.enabled,
+                                        PROFILER.trace_memory, streaming)] = v
+                else:
+                    add_summary(v, summary)
 
-    if output_file:
-        with open(output_file, 'w') as f:
-            f.write(report)
+            # Pairs whose versions were both cached
+            for version in list(summaries):
+                if version in summaries:
+                    yield from finished_pairs(version)
 
-    return report
+            for future in as_completed(futures):
+                v = futures[future]
+                try:
+                    summary, worker_profile = future.result()
+                    PROFILER.merge(worker_profile)
+                    add_summary(v, cache.store(v.filepath, summary))
+                except Exception as e:
+                    print(f"Warning: Could not analyze {v.version}: {e}")
+                    continue
+                yield from finished_pairs(v.version)
+    finally:
+        manager.metrics.append(metrics_rows)
+        cache.flush()
 
 
 def main():
@@ -554,13 +1052,58 @@ def main():
     # History command
     history_parser = subparsers.add_parser('history', help='Show version history')
     history_parser.add_argument('project_path', help='Path to Ableton project folder')
+    history_parser.add_argument('--json', action='store_true',
+                                help='Print the version database as JSON')
+    history_parser.add_argument('--track', metavar='NAME',
+                                help='Only versions with an analyzed track of this name (SQLite store only)')
 
     # Diff latest command
     diff_parser = subparsers.add_parser('diff-latest', help='Compare latest two versions')
     diff_parser.add_argument('project_path', help='Path to Ableton project folder')
     diff_parser.add_argument('-o', '--output', help='Output file')
 
+    # Diff all command
+    diff_all_parser = subparsers.add_parser('diff-all', help='Compare every consecutive pair of versions')
+    diff_all_parser.add_argument('project_path', help='Path to Ableton project folder')
+    diff_all_parser.add_argument('-j', '--jobs', type=int, help='Worker processes (default: CPU count)')
+    diff_all_parser.add_argument('-o', '--output-dir', help='Report directory (default: _history/reports)')
+
+    # Metrics command
+    metrics_parser = subparsers.add_parser('metrics', help='Show per-version metrics (tempo, counts, notes, ...)')
+    metrics_parser.add_argument('project_path', help='Path to Ableton project folder')
+    metrics_output = metrics_parser.add_mutually_exclusive_group()
+    metrics_output.add_argument('--json', action='store_true', help='Print one list per column as JSON')
+    metrics_output.add_argument('--csv', action='store_true',
+                                help='Print CSV, one row per version (track_notes as JSON)')
+
+    # Archive command
+    archive_parser = subparsers.add_parser('archive', help='Store versions as keyframes plus deltas')
+    archive_parser.add_argument('project_path', help='Path to Ableton project folder')
+    archive_parser.add_argument('--keyframe-every', type=int, default=DEFAULT_KEYFRAME_EVERY,
+                                help=f'Full copy every N versions (default: {DEFAULT_KEYFRAME_EVERY})')
+    archive_parser.add_argument('--remove-originals', action='store_true',
+                                help='Delete each .als once its archived copy verifies (restore before analyzing)')
+
+    # Restore command
+    restore_parser = subparsers.add_parser('restore', help='Rebuild an archived version')
+    restore_parser.add_argument('project_path', help='Path to Ableton project folder')
+    restore_parser.add_argument('version', help='Version to restore, e.g. 0.1.2')
+    restore_parser.add_argument('-o', '--output', help='Output file (default: original path)')
+
+    for subparser in (compare_parser, diff_parser):
+        subparser.add_argument('--format', choices=['text', 'ndjson'], default='text',
+                               help='text report, or one JSON change record per line')
+
+    for subparser in (compare_parser, diff_parser, diff_all_parser):
+        subparser.add_argument('--streaming', action='store_true', default=None,
+                               help='Summarize in bounded memory (default: only for files over '
+                                    f'{DEFAULT_STREAMING_SUMMARY_BYTES >> 20} MB)')
+
+    for subparser in subparsers.choices.values():
+        add_profile_arguments(subparser)
+
     args = parser.parse_args()
+    start_profiling(args, script='ableton_version_manager.py', command=args.command)
 
     if args.command == 'scan':
         manager = ProjectVersionManager(args.project_path)
@@ -574,7 +1117,10 @@ def main():
             print("No new versions found.")
 
     elif args.command == 'compare':
-        report = generate_change_report(args.old_file, args.new_file, args.output)
+        if args.format == 'ndjson':
+            generate_change_records(args.old_file, args.new_file, args.output, args.streaming)
+            return
+        report = generate_change_report(args.old_file, args.new_file, args.output, args.streaming)
         if not args.output:
             print(report)
         else:
@@ -583,8 +1129,16 @@ def main():
     elif args.command == 'history':
         manager = ProjectVersionManager(args.project_path)
         versions = manager.get_sorted_versions()
-
-        if versions:
+        if args.track:
+            if manager.store is None:
+                print(f"--track needs the SQLite store (set {STORE_ENV}=sqlite).")
+                return
+            matching = set(manager.store.versions_with_track(args.track))
+            versions = [v for v in versions if v.version in matching]
+
+        if args.json:
+            print(json.dumps(manager.to_dict(), indent=2))
+        elif versions:
             print(f"\nVersion History ({len(versions)} versions):")
             print("-" * 80)
             for v in versions:
@@ -597,21 +1151,117 @@ def main():
             print("No versions found.")
 
     elif args.command == 'diff-latest':
+        from ableton_cache import open_summary_cache
+
         manager = ProjectVersionManager(args.project_path)
-        manager.register_new_versions()
-        versions = manager.get_sorted_versions()
+        # Versions analyzed before come straight from the summary cache
+        cache = open_summary_cache(manager.history_dir, manager.store)
+        manager.register_new_versions(cache=cache)
+        versions = manager.get_latest_versions(2)
 
         if len(versions) >= 2:
-            old_version = versions[-2]
-            new_version = versions[-1]
+            old_version, new_version = versions
+            old = manager.summary(old_version, cache, args.streaming)
+            new = manager.summary(new_version, cache, args.streaming)
+            cache.flush()
+            if args.format == 'ndjson':
+                write_change_report_records(old_version.filepath, new_version.filepath, old, new,
+                                            args.output)
+                return
             print(f"Comparing {old_version.version} -> {new_version.version}\n")
-            report = generate_change_report(old_version.filepath, new_version.filepath, args.output)
+            report = format_change_report(old_version.filepath, new_version.filepath, old, new,
+                                          args.output)
             if not args.output:
                 print(report)
             else:
                 print(f"Report saved to {args.output}")
         else:
-            print("Need at least 2 versions to compare.")
+            print("Need at least 2 versions to compare.", file=sys.stderr if args.format == 'ndjson' else None)
+
+    elif args.command == 'diff-all':
+        manager = ProjectVersionManager(args.project_path)
+        # Metrics rows come from the parallel pass below
+        manager.register_new_versions(metrics=False)
+        reports_dir = Path(args.output_dir) if args.output_dir else manager.history_dir / "reports"
+        reports_dir.mkdir(parents=True, exist_ok=True)
+
+        count = 0
+        for old_version, new_version, _ in iter_pair_reports(manager, args.jobs, reports_dir, args.streaming):
+            count += 1
+            print(f"  {old_version.version} -> {new_version.version}")
+        print(f"Wrote {count} report(s) to {reports_dir}")
+
+    elif args.command == 'metrics':
+        manager = ProjectVersionManager(args.project_path)
+        manager.register_new_versions(metrics=False)
+        # Also fills in versions registered before metrics were recorded
+        manager.record_metrics(manager.get_sorted_versions())
+
+        if args.json:
+            print(json.dumps(manager.metrics.columns()))
+        elif args.csv:
+            import csv
+            from ableton_metrics import COLUMNS
+
+            writer = csv.writer(sys.stdout)
+            writer.writerow(COLUMNS)
+            for row in manager.metrics.table():
+                row['track_notes'] = json.dumps(row['track_notes'])
+                writer.writerow(row[column] for column in COLUMNS)
+        elif len(manager.metrics):
+            print(f"\n{'Version':15} {'Tempo':>7} {'Tracks':>6} {'Clips':>6} {'Devices':>7} "
+                  f"{'Notes':>8} {'Lanes':>6} {'Points':>8}")
+            print("-" * 80)
+            for row in manager.metrics.table():
+                tempo = f"{row['tempo']:g}" if row['tempo'] is not None else '-'
+                print(f"{row['version']:15} {tempo:>7} {row['track_count']:>6} {row['clip_count']:>6} "
+                      f"{row['device_count']:>7} {row['note_count']:>8} {row['automation_lanes']:>6} "
+                      f"{row['automation_points']:>8}")
+        else:
+            print("No versions found.")
+
+    elif args.command == 'archive':
+        manager = ProjectVersionManager(args.project_path)
+        manager.register_new_versions()
+        archive = VersionArchive(manager.history_dir, args.keyframe_every)
+
+        archived = []
+        for v in manager.get_sorted_versions():
+            if v.version in archive or not Path(v.filepath).exists():
+                continue
+            record = archive.add(v.version, v.filepath)
+            archived.append(v)
+            print(f"  {v.version:15} {record['kind']}")
+
+        if args.remove_originals:
+            project_dir = manager.project_path.resolve()
+            for v in manager.get_sorted_versions():
+                path = Path(v.filepath).resolve()
+                if v.version not in archive or not path.exists():
+                    continue
+                # Recorded paths can point elsewhere, e.g. in a copied project
+                if path.parent != project_dir:
+                    print(f"  Kept {v.filepath} (outside {project_dir})")
+                    continue
+                if not archive.verify(v.version, path):
+                    print(f"  Kept {path.name} (archived copy does not rebuild it)")
+                    continue
+                os.remove(path)
+                print(f"  Removed {path.name}")
+
+        print(f"Archived {len(archived)} new version(s); "
+              f"{len(archive)} versions in {archive.disk_usage() / 1024 / 1024:.1f} MB")
+
+    elif args.command == 'restore':
+        manager = ProjectVersionManager(args.project_path)
+        archive = VersionArchive(manager.history_dir)
+        if args.version not in archive:
+            print(f"Version {args.version} is not archived.")
+            return
+        output = args.output
+        if output is None:
+            output = manager.project_path / archive.record(args.version)['filename']
+        print(f"Restored {args.version} to {archive.restore(args.version, output)}")
 
     else:
         parser.print_help()
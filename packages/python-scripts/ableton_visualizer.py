@@ -4,17 +4,204 @@ Ableton Version Visualizer
 Creates HTML visualizations of version history and changes.
 """
 
+import html
 import json
+import os
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
-from ableton_version_manager import ProjectVersionManager, EnhancedAbletonAnalyzer
-
+from string import Template
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+from urllib.parse import quote
+from ableton_version_manager import ProjectVersionManager, VersionInfo
+from ableton_cache import CACHE_VERSION, SummaryCache, open_summary_cache
+from ableton_profile import PROFILER, add_profile_arguments, start_profiling
+
+
+# Cards per page in the HTML timeline
+TIMELINE_PAGE_SIZE = 50
+
+# Columns of each row in the timeline data script
+_ROW_FIELDS = ('version', 'timestamp', 'tempo', 'track_count', 'scene_count', 'metadata', 'change')
+
+# Metadata keys already shown elsewhere on a card
+_HIDDEN_METADATA = ('filepath', 'name', 'tempo', 'lastModifiedDate', 'lastModifiedTime')
+
+# Bump when _version_row or _change_summary change; timeline state written
+# with another layout (or another summary CACHE_VERSION) is discarded
+TIMELINE_STATE_VERSION = 1
+
+
+def _version_row(v: VersionInfo, summary: Dict) -> Dict:
+    """Timeline row for one version."""
+    info = summary['session_info']
+    return {
+        'version': v.version,
+        'timestamp': v.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+        'tempo': info['tempo'],
+        'track_count': info['track_count'],
+        'scene_count': info['scene_count'],
+        'metadata': v.metadata,
+        'tracks': list(summary['tracks'].keys())
+    }
+
+
+def _source_stamp(v: VersionInfo) -> Optional[List[int]]:
+    """Size and mtime of a version's file, or None once it was removed (archived)."""
+    try:
+        stat = os.stat(v.filepath)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _change_summary(old: Dict, new: Dict) -> Dict:
+    """Change record between two consecutive timeline rows."""
+    with PROFILER.phase('diff'):
+        old_tracks = set(old['tracks'])
+        new_tracks = set(new['tracks'])
 
-def generate_html_timeline(project_path: str, output_file: str = "timeline.html"):
+    return {
+        'from_version': old['version'],
+        'to_version': new['version'],
+        'timestamp': new['timestamp'],
+        'added_tracks': len(new_tracks - old_tracks),
+        'removed_tracks': len(old_tracks - new_tracks),
+        'tempo_changed': old['tempo'] != new['tempo'],
+        'track_count_delta': new['track_count'] - old['track_count'],
+    }
+
+
+class IncrementalTimeline:
+    """Timeline rows and pair changes that persist between runs.
+
+    Rows and change records are appended to ``_history/timeline_state.jsonl``
+    as they are computed, so registering one new version analyzes only that
+    version and the pair it forms with its predecessor. Each row keeps the
+    size and mtime of the file it came from and is recomputed (with its
+    changes) when a version is saved over. The first line names the layout;
+    the file is rewritten when most of its lines are superseded.
+    """
+
+    FILENAME = 'timeline_state.jsonl'
+
+    def __init__(self, manager: ProjectVersionManager, cache: Optional[SummaryCache] = None):
+        self.manager = manager
+        self.path = manager.history_dir / self.FILENAME
+        self.cache = cache or open_summary_cache(manager.history_dir, manager.store)
+        self.rows: Dict[str, Dict] = {}
+        self.sources: Dict[str, Optional[List[int]]] = {}
+        self.changes: Dict[Tuple[str, str], Dict] = {}
+        # Records in the file, superseded ones included
+        self._records = 0
+        # Whether the file exists with the current header
+        self._valid = False
+        self._load()
+
+    def _header(self) -> str:
+        return json.dumps({'timeline_version': TIMELINE_STATE_VERSION,
+                           'cache_version': CACHE_VERSION}) + '\n'
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as f:
+            if f.readline() != self._header():
+                return
+            self._valid = True
+            for line in f:
+                self._records += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'row' in record:
+                    version = record['row']['version']
+                    self.rows[version] = record['row']
+                    self.sources[version] = record.get('source')
+                elif 'change' in record:
+                    change = record['change']
+                    self.changes[(change['from_version'], change['to_version'])] = change
+
+    def update(self) -> Tuple[List[Dict], List[Dict]]:
+        """Bring the state up to date and return (version rows, changes)."""
+        new_records = []
+        recomputed = set()
+
+        version_analyses = []
+        for v in self.manager.get_sorted_versions():
+            source = _source_stamp(v)
+            row = self.rows.get(v.version)
+            if row is None or self.sources.get(v.version) != source:
+                try:
+                    row = _version_row(v, self.manager.summary(v, self.cache))
+                except Exception as e:
+                    print(f"Warning: Could not analyze {v.version}: {e}")
+                    continue
+                self.rows[v.version] = row
+                self.sources[v.version] = source
+                recomputed.add(v.version)
+                new_records.append({'row': row, 'source': source})
+            version_analyses.append(row)
+
+        changes = []
+        for old, new in zip(version_analyses[:-1], version_analyses[1:]):
+            key = (old['version'], new['version'])
+            change = self.changes.get(key)
+            if change is None or old['version'] in recomputed or new['version'] in recomputed:
+                change = _change_summary(old, new)
+                self.changes[key] = change
+                new_records.append({'change': change})
+            changes.append(change)
+
+        live = len(version_analyses) + len(changes)
+        if not self._valid or self._records + len(new_records) > 2 * live + 64:
+            self._rewrite(version_analyses, changes)
+        elif new_records:
+            with open(self.path, 'a') as f:
+                for record in new_records:
+                    f.write(json.dumps(record, separators=(',', ':')) + '\n')
+            self._records += len(new_records)
+        if new_records:
+            self.cache.flush()
+
+        return version_analyses, changes
+
+    def _rewrite(self, rows: List[Dict], changes: List[Dict]):
+        """Replace the file with the header and only the current rows and changes."""
+        records = [{'row': row, 'source': self.sources[row['version']]} for row in rows]
+        records.extend({'change': change} for change in changes)
+        # Per process, so concurrent writers never share a temporary file
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(self._header())
+            for record in records:
+                f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        os.replace(tmp_path, self.path)
+        self._records = len(records)
+        self._valid = True
+
+    def render(self, output_file: str = "timeline.html"):
+        """Update the state and write the HTML timeline."""
+        versions = self.manager.get_sorted_versions()
+        if not versions:
+            print("No versions found to visualize.")
+            return
+        version_analyses, changes = self.update()
+        return write_html_timeline(self.manager.project_path, versions, version_analyses,
+                                   changes, output_file)
+
+
+def generate_html_timeline(project_path: str, output_file: str = "timeline.html",
+                           incremental: bool = False):
     """Generate an interactive HTML timeline of version history."""
     manager = ProjectVersionManager(project_path)
-    manager.register_new_versions()
+    # Unchanged files come straight from the cache; new ones are analyzed once
+    cache = open_summary_cache(manager.history_dir, manager.store)
+    manager.register_new_versions(cache=cache)
+
+    if incremental:
+        return IncrementalTimeline(manager, cache).render(output_file)
+
     versions = manager.get_sorted_versions()
 
     if not versions:
@@ -25,121 +212,181 @@ def generate_html_timeline(project_path: str, output_file: str = "timeline.html"
     version_analyses = []
     for v in versions:
         try:
-            analyzer = EnhancedAbletonAnalyzer(v.filepath)
-            info = analyzer.get_session_info()
-            tracks = analyzer.get_tracks_with_fingerprints()
-
-            version_analyses.append({
-                'version': v.version,
-                'timestamp': v.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                'tempo': info['tempo'],
-                'track_count': info['track_count'],
-                'scene_count': info['scene_count'],
-                'metadata': v.metadata,
-                'tracks': list(tracks.keys())
-            })
+            version_analyses.append(_version_row(v, manager.summary(v, cache)))
         except Exception as e:
             print(f"Warning: Could not analyze {v.version}: {e}")
+    cache.flush()
 
     # Calculate changes between versions
-    changes = []
-    for i in range(len(version_analyses) - 1):
-        old = version_analyses[i]
-        new = version_analyses[i + 1]
+    changes = [
+        _change_summary(old, new)
+        for old, new in zip(version_analyses[:-1], version_analyses[1:])
+    ]
 
-        old_tracks = set(old['tracks'])
-        new_tracks = set(new['tracks'])
+    return write_html_timeline(manager.project_path, versions, version_analyses, changes, output_file)
 
-        change_summary = {
-            'from_version': old['version'],
-            'to_version': new['version'],
-            'timestamp': new['timestamp'],
-            'added_tracks': len(new_tracks - old_tracks),
-            'removed_tracks': len(old_tracks - new_tracks),
-            'tempo_changed': old['tempo'] != new['tempo'],
-            'track_count_delta': new['track_count'] - old['track_count'],
-        }
-        changes.append(change_summary)
 
-    html = f"""<!DOCTYPE html>
+def write_html_timeline(project_path, versions: List[VersionInfo], version_analyses: List[Dict],
+                        changes: List[Dict], output_file: str = "timeline.html"):
+    """Render timeline rows and change records to an HTML page and its data script.
+
+    The page is a fixed-size shell; the rows go to ``<name>.data.js`` next
+    to it as one compact JSON array per version, streamed row by row, and
+    the browser builds only the cards of the page being viewed.
+    """
+    output_path = Path(output_file)
+    data_path = output_path.with_name(output_path.stem + '.data.js')
+
+    with PROFILER.phase('render'):
+        # Written before the page so it never references rows that are not there yet
+        _write_atomic(data_path, _timeline_data_chunks(project_path, version_analyses, changes))
+        latest = version_analyses[-1] if version_analyses else None
+        shell = _TIMELINE_HTML.substitute(
+            title=html.escape(Path(project_path).name),
+            version_count=len(versions),
+            tempo=latest['tempo'] if latest else 'N/A',
+            track_count=latest['track_count'] if latest else 'N/A',
+            latest_version=html.escape(versions[-1].version) if versions else 'N/A',
+            data_src=html.escape(f"{quote(data_path.name)}?v={len(version_analyses)}"
+                                 f"-{quote(latest['version']) if latest else ''}"),
+            page_size=TIMELINE_PAGE_SIZE,
+        )
+    with PROFILER.phase('write'):
+        _write_atomic(output_path, [shell])
+
+    print(f"Timeline visualization created: {output_path.absolute()}")
+    return output_path
+
+
+def _write_atomic(path: Path, chunks: Iterable[str]):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.writelines(chunks)
+    os.replace(tmp_path, path)
+
+
+def _timeline_data_chunks(project_path, version_analyses: List[Dict],
+                          changes: List[Dict]) -> Iterator[str]:
+    """The data script, one chunk per version row."""
+    header = {'project': Path(project_path).name, 'fields': list(_ROW_FIELDS)}
+    yield 'window.TIMELINE_DATA = ' + json.dumps(header, separators=(',', ':'))[:-1] + ',"rows":['
+    for i, row in enumerate(version_analyses):
+        change = changes[i - 1] if i > 0 else None
+        record = [row['version'], row['timestamp'], row['tempo'], row['track_count'], row['scene_count'],
+                  {key: val for key, val in (row['metadata'] or {}).items()
+                   if key not in _HIDDEN_METADATA} or None,
+                  [change['added_tracks'], change['removed_tracks'], int(change['tempo_changed'])]
+                  if change else None]
+        yield ('\n' if i == 0 else ',\n') + json.dumps(record, separators=(',', ':'), default=str)
+    yield '\n]};\n'
+
+
+_TIMELINE_HTML = Template("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Ableton Version History - {Path(project_path).name}</title>
+    <title>Ableton Version History - $title</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
 
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
             background: #0a0a0a;
             color: #e0e0e0;
             padding: 20px;
-        }}
+        }
 
-        .container {{
+        .container {
             max-width: 1200px;
             margin: 0 auto;
-        }}
+        }
 
-        header {{
+        header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 30px;
             border-radius: 12px;
             margin-bottom: 30px;
             box-shadow: 0 8px 32px rgba(0, 0, 0, 0.3);
-        }}
+        }
 
-        h1 {{
+        h1 {
             font-size: 2.5em;
             margin-bottom: 10px;
             color: white;
-        }}
+        }
 
-        .subtitle {{
+        .subtitle {
             opacity: 0.9;
             font-size: 1.1em;
-        }}
+        }
 
-        .stats {{
+        .stats {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             margin-bottom: 40px;
-        }}
+        }
 
-        .stat-card {{
+        .stat-card {
             background: #1a1a1a;
             padding: 20px;
             border-radius: 8px;
             border: 1px solid #333;
             box-shadow: 0 4px 16px rgba(0, 0, 0, 0.2);
-        }}
+        }
 
-        .stat-label {{
+        .stat-label {
             color: #888;
             font-size: 0.9em;
             margin-bottom: 8px;
             text-transform: uppercase;
             letter-spacing: 1px;
-        }}
+        }
 
-        .stat-value {{
+        .stat-value {
             font-size: 2em;
             font-weight: bold;
             color: #667eea;
-        }}
+        }
+
+        .pager {
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            gap: 12px;
+            margin-bottom: 30px;
+            color: #888;
+        }
+
+        .pager[hidden] {
+            display: none;
+        }
+
+        .pager button {
+            background: #1a1a1a;
+            color: #e0e0e0;
+            border: 1px solid #333;
+            border-radius: 6px;
+            padding: 8px 14px;
+            cursor: pointer;
+        }
+
+        .pager button:disabled {
+            opacity: 0.4;
+            cursor: default;
+        }
 
-        .timeline {{
+        .timeline {
             position: relative;
             padding-left: 40px;
-        }}
+        }
 
-        .timeline::before {{
+        .timeline::before {
             content: '';
             position: absolute;
             left: 20px;
@@ -147,9 +394,9 @@ def generate_html_timeline(project_path: str, output_file: str = "timeline.html"
             bottom: 0;
             width: 2px;
             background: linear-gradient(180deg, #667eea 0%, #764ba2 100%);
-        }}
+        }
 
-        .version-item {{
+        .version-item {
             position: relative;
             margin-bottom: 30px;
             background: #1a1a1a;
@@ -158,14 +405,14 @@ def generate_html_timeline(project_path: str, output_file: str = "timeline.html"
             border-left: 4px solid #667eea;
             box-shadow: 0 4px 16px rgba(0, 0, 0, 0.2);
             transition: transform 0.2s, box-shadow 0.2s;
-        }}
+        }
 
-        .version-item:hover {{
+        .version-item:hover {
             transform: translateX(5px);
             box-shadow: 0 6px 24px rgba(102, 126, 234, 0.3);
-        }}
+        }
 
-        .version-item::before {{
+        .version-item::before {
             content: '';
             position: absolute;
             left: -44px;
@@ -176,208 +423,219 @@ def generate_html_timeline(project_path: str, output_file: str = "timeline.html"
             background: #667eea;
             border: 3px solid #0a0a0a;
             box-shadow: 0 0 0 3px #667eea;
-        }}
+        }
 
-        .version-header {{
+        .version-header {
             display: flex;
             justify-content: space-between;
             align-items: center;
             margin-bottom: 15px;
-        }}
+        }
 
-        .version-number {{
+        .version-number {
             font-size: 1.5em;
             font-weight: bold;
             color: #667eea;
-        }}
+        }
 
-        .version-date {{
+        .version-date {
             color: #888;
             font-size: 0.9em;
-        }}
+        }
 
-        .version-details {{
+        .version-details {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
             gap: 15px;
             margin-top: 15px;
-        }}
+        }
 
-        .detail {{
+        .detail {
             background: #0f0f0f;
             padding: 12px;
             border-radius: 6px;
             border: 1px solid #222;
-        }}
+        }
 
-        .detail-label {{
+        .detail-label {
             font-size: 0.85em;
             color: #888;
             margin-bottom: 4px;
-        }}
+        }
 
-        .detail-value {{
+        .detail-value {
             font-size: 1.1em;
             color: #e0e0e0;
             font-weight: 500;
-        }}
+        }
 
-        .changes {{
+        .changes {
             margin-top: 15px;
             padding-top: 15px;
             border-top: 1px solid #333;
-        }}
+        }
 
-        .change-badge {{
+        .change-badge {
             display: inline-block;
             padding: 6px 12px;
             border-radius: 20px;
             font-size: 0.85em;
             margin-right: 8px;
             margin-bottom: 8px;
-        }}
+        }
 
-        .change-add {{
+        .change-add {
             background: rgba(76, 175, 80, 0.2);
             color: #4CAF50;
             border: 1px solid #4CAF50;
-        }}
+        }
 
-        .change-remove {{
+        .change-remove {
             background: rgba(244, 67, 54, 0.2);
             color: #f44336;
             border: 1px solid #f44336;
-        }}
+        }
 
-        .change-modify {{
+        .change-modify {
             background: rgba(255, 152, 0, 0.2);
             color: #FF9800;
             border: 1px solid #FF9800;
-        }}
+        }
 
-        .no-changes {{
+        .no-changes {
             color: #666;
             font-style: italic;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <header>
-            <h1>🎵 {Path(project_path).name}</h1>
+            <h1>🎵 $title</h1>
             <p class="subtitle">Version History & Change Tracking</p>
         </header>
 
         <div class="stats">
             <div class="stat-card">
                 <div class="stat-label">Total Versions</div>
-                <div class="stat-value">{len(versions)}</div>
+                <div class="stat-value">$version_count</div>
             </div>
             <div class="stat-card">
                 <div class="stat-label">Current Tempo</div>
-                <div class="stat-value">{version_analyses[-1]['tempo'] if version_analyses else 'N/A'}</div>
+                <div class="stat-value">$tempo</div>
             </div>
             <div class="stat-card">
                 <div class="stat-label">Track Count</div>
-                <div class="stat-value">{version_analyses[-1]['track_count'] if version_analyses else 'N/A'}</div>
+                <div class="stat-value">$track_count</div>
             </div>
             <div class="stat-card">
                 <div class="stat-label">Latest Version</div>
-                <div class="stat-value">{versions[-1].version if versions else 'N/A'}</div>
+                <div class="stat-value">$latest_version</div>
             </div>
         </div>
 
-        <div class="timeline">
-"""
-
-    # Add version items to timeline
-    for i, v in enumerate(version_analyses):
-        # Find changes for this version
-        version_changes = None
-        if i > 0:
-            version_changes = changes[i - 1]
-
-        html += f"""
-            <div class="version-item">
-                <div class="version-header">
-                    <span class="version-number">v{v['version']}</span>
-                    <span class="version-date">{v['timestamp']}</span>
-                </div>
-
-                <div class="version-details">
-                    <div class="detail">
-                        <div class="detail-label">Tempo</div>
-                        <div class="detail-value">{v['tempo']} BPM</div>
-                    </div>
-                    <div class="detail">
-                        <div class="detail-label">Tracks</div>
-                        <div class="detail-value">{v['track_count']}</div>
-                    </div>
-                    <div class="detail">
-                        <div class="detail-label">Scenes</div>
-                        <div class="detail-value">{v['scene_count']}</div>
-                    </div>
-"""
-
-        # Add metadata details
-        if v['metadata']:
-            for key, val in v['metadata'].items():
-                if key not in ['filepath', 'name', 'tempo', 'lastModifiedDate', 'lastModifiedTime']:
-                    html += f"""
-                    <div class="detail">
-                        <div class="detail-label">{key.title()}</div>
-                        <div class="detail-value">{val}</div>
-                    </div>
-"""
+        <nav class="pager" id="pager" hidden>
+            <button type="button" id="first">&laquo;</button>
+            <button type="button" id="prev">&lsaquo; Older</button>
+            <span id="page-label"></span>
+            <button type="button" id="next">Newer &rsaquo;</button>
+            <button type="button" id="last">&raquo;</button>
+        </nav>
 
-        html += """
-                </div>
-"""
-
-        # Add changes section
-        if version_changes:
-            html += """
-                <div class="changes">
-"""
-            has_changes = False
-
-            if version_changes['added_tracks'] > 0:
-                html += f"""<span class="change-badge change-add">+{version_changes['added_tracks']} tracks</span>"""
-                has_changes = True
+        <div class="timeline" id="timeline"></div>
+    </div>
 
-            if version_changes['removed_tracks'] > 0:
-                html += f"""<span class="change-badge change-remove">-{version_changes['removed_tracks']} tracks</span>"""
-                has_changes = True
+    <script src="$data_src"></script>
+    <script>
+    (function () {
+        var PAGE_SIZE = $page_size;
+        var data = window.TIMELINE_DATA;
+        var timeline = document.getElementById('timeline');
+        if (!data) {
+            timeline.appendChild(el('p', 'no-changes', 'Timeline data not found; keep the .data.js file next to this page.'));
+            return;
+        }
 
-            if version_changes['tempo_changed']:
-                html += f"""<span class="change-badge change-modify">Tempo changed</span>"""
-                has_changes = True
+        var col = {};
+        data.fields.forEach(function (name, i) { col[name] = i; });
+        var rows = data.rows;
+        var pages = Math.max(1, Math.ceil(rows.length / PAGE_SIZE));
+        var current = 0;
+
+        function el(tag, className, text) {
+            var node = document.createElement(tag);
+            if (className) node.className = className;
+            if (text !== undefined) node.textContent = text;
+            return node;
+        }
 
-            if not has_changes:
-                html += """<span class="no-changes">No major changes detected</span>"""
+        function detail(label, value) {
+            var node = el('div', 'detail');
+            node.appendChild(el('div', 'detail-label', label));
+            node.appendChild(el('div', 'detail-value', String(value)));
+            return node;
+        }
 
-            html += """
-                </div>
-"""
+        function card(row) {
+            var item = el('div', 'version-item');
+            var header = el('div', 'version-header');
+            header.appendChild(el('span', 'version-number', 'v' + row[col.version]));
+            header.appendChild(el('span', 'version-date', row[col.timestamp]));
+            item.appendChild(header);
+
+            var details = el('div', 'version-details');
+            details.appendChild(detail('Tempo', row[col.tempo] + ' BPM'));
+            details.appendChild(detail('Tracks', row[col.track_count]));
+            details.appendChild(detail('Scenes', row[col.scene_count]));
+            var metadata = row[col.metadata] || {};
+            Object.keys(metadata).forEach(function (key) {
+                details.appendChild(detail(key.charAt(0).toUpperCase() + key.slice(1), metadata[key]));
+            });
+            item.appendChild(details);
+
+            // [added tracks, removed tracks, tempo changed]; null for the first version
+            var change = row[col.change];
+            if (change) {
+                var changes = el('div', 'changes');
+                if (change[0] > 0) changes.appendChild(el('span', 'change-badge change-add', '+' + change[0] + ' tracks'));
+                if (change[1] > 0) changes.appendChild(el('span', 'change-badge change-remove', '-' + change[1] + ' tracks'));
+                if (change[2]) changes.appendChild(el('span', 'change-badge change-modify', 'Tempo changed'));
+                if (!changes.firstChild) changes.appendChild(el('span', 'no-changes', 'No major changes detected'));
+                item.appendChild(changes);
+            }
+            return item;
+        }
 
-        html += """
-            </div>
-"""
+        // Only the cards of the page being viewed are ever built
+        function show(page) {
+            current = Math.min(Math.max(page, 1), pages);
+            var first = (current - 1) * PAGE_SIZE;
+            var cards = document.createDocumentFragment();
+            rows.slice(first, first + PAGE_SIZE).forEach(function (row) { cards.appendChild(card(row)); });
+            timeline.textContent = '';
+            timeline.appendChild(cards);
+
+            document.getElementById('page-label').textContent = 'Versions ' + (rows.length ? first + 1 : 0) + '-'
+                + Math.min(first + PAGE_SIZE, rows.length) + ' of ' + rows.length + ' (page ' + current + '/' + pages + ')';
+            document.getElementById('first').disabled = document.getElementById('prev').disabled = current === 1;
+            document.getElementById('last').disabled = document.getElementById('next').disabled = current === pages;
+            if (location.hash !== '#page=' + current) history.replaceState(null, '', '#page=' + current);
+        }
 
-    html += """
-        </div>
-    </div>
+        document.getElementById('first').onclick = function () { show(1); };
+        document.getElementById('prev').onclick = function () { show(current - 1); };
+        document.getElementById('next').onclick = function () { show(current + 1); };
+        document.getElementById('last').onclick = function () { show(pages); };
+        document.getElementById('pager').hidden = pages === 1;
+
+        // Open on the newest versions unless the address names a page
+        var match = /^#page=(\\d+)$$/.exec(location.hash);
+        show(match ? parseInt(match[1], 10) : pages);
+    })();
+    </script>
 </body>
 </html>
-"""
-
-    # Write to file
-    output_path = Path(output_file)
-    with open(output_path, 'w') as f:
-        f.write(html)
-
-    print(f"Timeline visualization created: {output_path.absolute()}")
-    return output_path
+""")
 
 
 def main():
@@ -387,10 +645,15 @@ def main():
     parser = argparse.ArgumentParser(description='Visualize Ableton project version history')
     parser.add_argument('project_path', help='Path to Ableton project folder')
     parser.add_argument('-o', '--output', default='timeline.html', help='Output HTML file')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse stored rows and only analyze versions added since the last run')
+
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_profiling(args, script='ableton_visualizer.py')
 
-    generate_html_timeline(args.project_path, args.output)
+    generate_html_timeline(args.project_path, args.output, args.incremental)
 
 
 if __name__ == '__main__':
@@ -7,12 +7,32 @@ Shows in-depth analysis of a specific track including automation and MIDI.
 import sys
 from pathlib import Path
 from ableton_version_manager import EnhancedAbletonAnalyzer
+from ableton_seek import SeekIndex
+from ableton_profile import add_profile_arguments, start_profiling
+
+
+def _single_track_analyzer(file_path: str, track_name: str):
+    """Analyzer over just the named track, read through the project's seek index."""
+    seek = SeekIndex.for_file(file_path)
+    if seek is None:
+        return None
+    span = seek.find_track(track_name)
+    if span is None:
+        return None
+    return EnhancedAbletonAnalyzer(file_path, root=seek.load(span))
 
 
 def analyze_track_detailed(file_path: str, track_name: str = None):
     """Analyze a specific track or all tracks in detail."""
-    analyzer = EnhancedAbletonAnalyzer(file_path)
-    tracks = analyzer.get_tracks_with_fingerprints()
+    analyzer = _single_track_analyzer(file_path, track_name) if track_name else None
+    if analyzer is None:
+        analyzer = EnhancedAbletonAnalyzer(file_path)
+    if track_name:
+        # Only the requested track is analyzed
+        track_elem = analyzer.find_track(track_name)
+        selected = [track_elem] if track_elem is not None else []
+    else:
+        selected = list(analyzer.get_tracks_with_fingerprints().values())
 
     print("=" * 80)
     print(f"DETAILED TRACK ANALYSIS")
@@ -21,13 +41,9 @@ def analyze_track_detailed(file_path: str, track_name: str = None):
     print("=" * 80)
     print()
 
-    for fingerprint, track_elem in tracks.items():
+    for track_elem in selected:
         analysis = analyzer.analyze_track(track_elem)
 
-        # If track_name specified, only show that track
-        if track_name and analysis['name'].lower() != track_name.lower():
-            continue
-
         print(f"TRACK: {analysis['name']}")
         print("-" * 80)
         print(f"  Type: {analysis['type']}")
@@ -45,7 +61,13 @@ def analyze_track_detailed(file_path: str, track_name: str = None):
             print(f"\n  Clips ({len(analysis['clips'])}):")
             for i, clip in enumerate(analysis['clips'], 1):
                 clip_name = clip['name'] or f"Clip {i}"
-                print(f"    {i}. {clip_name} ({clip['type']})")
+                if clip['view'] == 'session':
+                    where = f"session slot {clip['slot'] + 1}"
+                elif clip['start'] is not None and clip['end'] is not None:
+                    where = f"arrangement {clip['start']:g}-{clip['end']:g}"
+                else:
+                    where = "arrangement"
+                print(f"    {i}. {clip_name} ({clip['type']}, {where})")
 
                 # MIDI analysis
                 if clip['type'] == 'midi' and 'midi' in clip:
@@ -63,6 +85,10 @@ def analyze_track_detailed(file_path: str, track_name: str = None):
                         if midi.get('avg_velocity'):
                             print(f"       Avg Velocity: {midi['avg_velocity']:.2f}")
 
+                        if midi.get('density'):
+                            print(f"       Density: {midi['density']:.2f} notes/beat, "
+                                  f"polyphony max {midi['max_polyphony']} (avg {midi['avg_polyphony']:.2f})")
+
         # MIDI stats for the track
         if analysis['midi_stats'] and analysis['midi_stats'].get('total_notes', 0) > 0:
             print(f"\n  MIDI Summary:")
@@ -76,11 +102,18 @@ def analyze_track_detailed(file_path: str, track_name: str = None):
                 high_note = f"{note_names[high % 12]}{high // 12 - 2}"
                 print(f"    Overall Range: {low_note} to {high_note}")
 
+            pitch_classes = analysis['midi_stats'].get('pitch_classes')
+            if pitch_classes:
+                note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+                used = [f"{name} {count}" for name, count in zip(note_names, pitch_classes) if count]
+                print(f"    Pitch Classes: {', '.join(used)}")
+                print(f"    Max Polyphony: {analysis['midi_stats']['max_polyphony']}")
+
         # Automation
         if analysis['automation']:
             print(f"\n  Automation Lanes ({len(analysis['automation'])}):")
             for auto in analysis['automation']:
-                param = auto['parameter']
+                param = f"{auto['name']} ({auto['parameter']})" if auto['name'] else auto['parameter']
                 points = auto['point_count']
                 print(f"    - {param}: {points} points", end='')
 
@@ -92,17 +125,11 @@ def analyze_track_detailed(file_path: str, track_name: str = None):
         print()
         print()
 
-        # If we were looking for a specific track, we found it
-        if track_name:
-            break
-
-    if track_name and not any(a['name'].lower() == track_name.lower()
-                               for a in [analyzer.analyze_track(t) for t in tracks.values()]):
+    if track_name and not selected:
         print(f"Track '{track_name}' not found.")
         print(f"\nAvailable tracks:")
-        for t in tracks.values():
-            analysis = analyzer.analyze_track(t)
-            print(f"  - {analysis['name']}")
+        for name in analyzer.get_track_names():
+            print(f"  - {name}")
 
 
 def main():
@@ -114,8 +141,10 @@ def main():
     )
     parser.add_argument('file', help='Path to .als file')
     parser.add_argument('-t', '--track', help='Specific track name to analyze')
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    start_profiling(args, script='analyze_track.py')
 
     if not Path(args.file).exists():
         print(f"Error: File not found: {args.file}")
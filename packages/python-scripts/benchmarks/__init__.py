@@ -0,0 +1,4 @@
+"""
+Ableton Tools Benchmarks
+Synthetic session generator and timed scenarios; run with ``python -m benchmarks.run``.
+"""
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Synthetic Session Generator
+Builds deterministic gzipped .als files shaped like real Ableton Live sets.
+"""
+
+import gzip
+import os
+import random
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+
+@dataclass
+class SessionSpec:
+    """Size knobs for a synthetic session."""
+    midi_tracks: int = 16
+    audio_tracks: int = 8
+    return_tracks: int = 2
+    scenes: int = 8
+    session_clips: int = 4          # per track, in clip slots
+    arrangement_clips: int = 4      # per track, on the arrangement timeline
+    notes_per_clip: int = 64
+    automation_lanes: int = 2       # per track
+    points_per_lane: int = 32
+    devices_per_track: int = 3
+    locators: int = 4
+    tempo: float = 120.0
+    seed: int = 0
+    version: int = 0                # drift step, see generate_project()
+
+
+DEVICE_TAGS = ['Operator', 'Eq8', 'Compressor2', 'Reverb', 'AutoFilter', 'Saturator']
+
+
+class _Writer:
+    """Tab-indented line writer matching Live's own XML layout."""
+
+    def __init__(self, out):
+        self.out = out
+        self.depth = 0
+
+    def open(self, tag: str, **attrs):
+        self.out.write(f"{chr(9) * self.depth}<{tag}{_attrs(attrs)}>\n".encode())
+        self.depth += 1
+
+    def close(self, tag: str):
+        self.depth -= 1
+        self.out.write(f"{chr(9) * self.depth}</{tag}>\n".encode())
+
+    def leaf(self, tag: str, **attrs):
+        self.out.write(f"{chr(9) * self.depth}<{tag}{_attrs(attrs)} />\n".encode())
+
+    def value(self, tag: str, value):
+        self.leaf(tag, Value=value)
+
+
+def _attrs(attrs) -> str:
+    return ''.join(f" {k}={quoteattr(str(v))}" for k, v in attrs.items())
+
+
+def _write_clip(w: _Writer, rng: random.Random, kind: str, name: str, start: float,
+                length: float, notes: int, clip_id: int):
+    tag = 'MidiClip' if kind == 'midi' else 'AudioClip'
+    w.open(tag, Id=clip_id, Time=start)
+    w.value('CurrentStart', start)
+    w.value('CurrentEnd', start + length)
+    w.open('Loop')
+    w.value('LoopStart', 0)
+    w.value('LoopEnd', length)
+    w.value('LoopOn', 'true')
+    w.close('Loop')
+    w.value('Name', name)
+    w.value('Color', rng.randrange(70))
+    if kind == 'midi':
+        w.open('Notes')
+        w.open('KeyTracks')
+        by_key = {}
+        for _ in range(notes):
+            key = rng.randrange(36, 96)
+            by_key.setdefault(key, []).append(
+                (round(rng.random() * length * 4) / 4, rng.choice((0.25, 0.5, 1.0)),
+                 rng.randrange(1, 128))
+            )
+        note_id = 1
+        for idx, key in enumerate(sorted(by_key)):
+            w.open('KeyTrack', Id=idx)
+            w.open('Notes')
+            for time, duration, velocity in sorted(by_key[key]):
+                w.leaf('MidiNoteEvent', Time=time, Duration=duration, Velocity=velocity,
+                       OffVelocity=64, IsEnabled='true', NoteId=note_id)
+                note_id += 1
+            w.close('Notes')
+            w.value('MidiKey', key)
+            w.close('KeyTrack')
+        w.close('KeyTracks')
+        w.close('Notes')
+    else:
+        w.open('SampleRef')
+        w.open('FileRef')
+        w.value('RelativePath', f"Samples/Recorded/{name}.wav")
+        w.close('FileRef')
+        w.close('SampleRef')
+    w.close(tag)
+
+
+def _write_track(w: _Writer, spec: SessionSpec, tag: str, track_id: int, name: str):
+    kind = 'midi' if tag == 'MidiTrack' else 'audio'
+    # Each track draws from its own stream, so adding a track leaves the others untouched
+    rng = random.Random(f"{spec.seed}:{track_id}")
+    # Every version re-rolls the mixer of one track in eight
+    last_touched = spec.version - (track_id + spec.version) % 8
+    mixer_rng = random.Random(f"{spec.seed}:{track_id}:{max(last_touched, 0)}")
+    w.open(tag, Id=track_id)
+    w.value('LomId', 0)
+    w.open('Name')
+    w.value('EffectiveName', name)
+    w.value('UserName', name)
+    w.close('Name')
+    w.value('Color', track_id % 70)
+    w.value('TrackUnfolded', 'false')
+
+    w.open('AutomationEnvelopes')
+    w.open('Envelopes')
+    for lane in range(spec.automation_lanes):
+        w.open('AutomationEnvelope', Id=lane)
+        w.open('EnvelopeTarget')
+        w.value('PointeeId', track_id * 100 + lane)
+        w.close('EnvelopeTarget')
+        w.open('Automation')
+        w.open('Events')
+        time = 0.0
+        for point in range(spec.points_per_lane):
+            w.leaf('FloatEvent', Id=point, Time=time, Value=round(rng.random(), 4))
+            time += rng.choice((0.5, 1.0, 2.0))
+        w.close('Events')
+        w.close('Automation')
+        w.close('AutomationEnvelope')
+    w.close('Envelopes')
+    w.close('AutomationEnvelopes')
+
+    w.open('DeviceChain')
+    w.open('Mixer')
+    w.open('Volume')
+    w.value('Manual', round(mixer_rng.uniform(0.3, 1.0), 4))
+    w.close('Volume')
+    w.open('Pan')
+    w.value('Manual', round(mixer_rng.uniform(-0.5, 0.5), 4))
+    w.close('Pan')
+    w.close('Mixer')
+
+    clip_id = 0
+    w.open('MainSequencer')
+    w.open('ClipSlotList')
+    for slot in range(spec.scenes):
+        w.open('ClipSlot', Id=slot)
+        w.open('ClipSlot')
+        w.open('Value')
+        if slot < spec.session_clips and tag != 'ReturnTrack':
+            _write_clip(w, rng, kind, f"{name} Clip {slot + 1}", 0, 4.0,
+                        spec.notes_per_clip, clip_id)
+            clip_id += 1
+        w.close('Value')
+        w.close('ClipSlot')
+        w.close('ClipSlot')
+    w.close('ClipSlotList')
+    if tag != 'ReturnTrack':
+        w.open('ClipTimeable' if kind == 'midi' else 'Sample')
+        w.open('ArrangerAutomation')
+        w.open('Events')
+        for index in range(spec.arrangement_clips):
+            _write_clip(w, rng, kind, f"{name} Arr {index + 1}", index * 16.0, 16.0,
+                        spec.notes_per_clip, clip_id)
+            clip_id += 1
+        w.close('Events')
+        w.close('ArrangerAutomation')
+        w.close('ClipTimeable' if kind == 'midi' else 'Sample')
+    w.close('MainSequencer')
+
+    w.open('DeviceChain')
+    w.open('Devices')
+    for index in range(spec.devices_per_track):
+        device = DEVICE_TAGS[(track_id + index) % len(DEVICE_TAGS)]
+        w.open(device, Id=index)
+        w.value('On', 'true')
+        for param in range(8):
+            w.open(f"Param{param}")
+            w.value('Manual', round(rng.random(), 4))
+            w.close(f"Param{param}")
+        w.close(device)
+    w.close('Devices')
+    w.close('DeviceChain')
+    w.close('DeviceChain')
+    w.close(tag)
+
+
+def write_session(path, spec: SessionSpec):
+    """Write one synthetic .als file."""
+    with gzip.open(path, 'wb', compresslevel=6) as out:
+        out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n')
+        w = _Writer(out)
+        w.open('Ableton', MajorVersion=5, MinorVersion='11.0_433', Creator='Ableton Live 11.3')
+        w.open('LiveSet')
+        w.open('Tracks')
+        # Separate Id ranges per track type, so added MIDI tracks leave the rest unchanged
+        for index in range(spec.midi_tracks):
+            _write_track(w, spec, 'MidiTrack', 10000 + index, f"MIDI {index + 1}")
+        for index in range(spec.audio_tracks):
+            _write_track(w, spec, 'AudioTrack', 1000 + index, f"Audio {index + 1}")
+        for index in range(spec.return_tracks):
+            _write_track(w, spec, 'ReturnTrack', 100 + index, f"{chr(65 + index)}-Return")
+        w.close('Tracks')
+
+        w.open('MasterTrack')
+        w.open('Name')
+        w.value('EffectiveName', 'Master')
+        w.close('Name')
+        w.open('DeviceChain')
+        w.open('Mixer')
+        w.open('Volume')
+        w.value('Manual', 1)
+        w.close('Volume')
+        w.open('Tempo')
+        w.value('Manual', spec.tempo)
+        w.close('Tempo')
+        w.open('TimeSignature')
+        w.open('TimeSignatures')
+        w.open('RemoteableTimeSignature', Id=0)
+        w.value('Numerator', 4)
+        w.value('Denominator', 4)
+        w.value('Time', 0)
+        w.close('RemoteableTimeSignature')
+        w.close('TimeSignatures')
+        w.close('TimeSignature')
+        w.close('Mixer')
+        w.close('DeviceChain')
+        w.close('MasterTrack')
+
+        w.open('Locators')
+        w.open('Locators')
+        for index in range(spec.locators):
+            w.open('Locator', Id=index)
+            w.value('Time', index * 32)
+            w.value('Name', f"Section {index + 1}")
+            w.close('Locator')
+        w.close('Locators')
+        w.close('Locators')
+
+        w.open('Scenes')
+        for index in range(spec.scenes):
+            w.open('Scene', Id=index)
+            w.value('Name', f"Scene {index + 1}")
+            w.close('Scene')
+        w.close('Scenes')
+        w.close('LiveSet')
+        w.close('Ableton')
+
+
+def generate_project(project_dir, versions: int, spec: SessionSpec, name: str = 'Synthetic'):
+    """Write a project folder of versions that drift slightly from one another.
+
+    Each version re-rolls the mixer of one track in eight, every third
+    version changes the tempo and every fifth adds a MIDI track, so
+    consecutive versions share most of their XML like real saves do.
+    """
+    project_dir = Path(project_dir)
+    project_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    base = datetime(2026, 1, 1).timestamp()
+    for index in range(versions):
+        version_spec = replace(
+            spec,
+            midi_tracks=spec.midi_tracks + index // 5,
+            tempo=spec.tempo + (index // 3) % 3,
+            version=index,
+        )
+        path = project_dir / f"{name}_0.0.{index + 1}.als"
+        write_session(path, version_spec)
+        mtime = base + index * 3600
+        os.utime(path, (mtime, mtime))
+        paths.append(path)
+    return paths
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark Runner
+Times the analyzers on generated sessions and writes machine-readable results.
+
+    python -m benchmarks.run --size medium -o before.json
+    python -m benchmarks.run --size medium --compare before.json
+"""
+
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ableton_loader import load_indexed
+from ableton_diff import AbletonDiff
+from ableton_version_manager import EnhancedAbletonAnalyzer, generate_change_report
+from ableton_visualizer import generate_html_timeline
+from benchmarks.generator import SessionSpec, generate_project
+
+
+# Preset session shapes and version counts
+SIZES = {
+    'small': (SessionSpec(midi_tracks=8, audio_tracks=4, notes_per_clip=32, points_per_lane=16), 6),
+    'medium': (SessionSpec(), 12),
+    'large': (SessionSpec(midi_tracks=80, audio_tracks=40, notes_per_clip=400, points_per_lane=400), 12),
+}
+
+
+@dataclass
+class Scenario:
+    """One timed operation; ``setup`` runs untimed before every repetition."""
+    name: str
+    run: Callable[[], object]
+    setup: Optional[Callable[[], None]] = None
+
+
+def build_scenarios(project: Path, paths: List[Path]) -> List[Scenario]:
+    """Scenarios over the last two versions and the whole project."""
+    old_file, new_file = str(paths[-2]), str(paths[-1])
+    timeline_file = str(project / 'bench_timeline.html')
+    state = {}
+
+    def load_analyzer():
+        state['analyzer'] = EnhancedAbletonAnalyzer(new_file)
+
+    def analyze_tracks():
+        analyzer = state['analyzer']
+        return [analyzer.analyze_track(t) for t in analyzer.get_tracks_with_fingerprints().values()]
+
+    def load_diff(deep: bool):
+        return lambda: state.update(diff=AbletonDiff(old_file, new_file, deep=deep))
+
+    def clear_history():
+        shutil.rmtree(project / '_history', ignore_errors=True)
+
+    def warm_timeline():
+        if not (project / '_history' / 'timeline_state.jsonl').exists():
+            generate_html_timeline(str(project), timeline_file, incremental=True)
+
+    return [
+        Scenario('load', lambda: load_indexed(new_file)),
+        Scenario('session_info', lambda: state['analyzer'].get_session_info(), load_analyzer),
+        Scenario('analyze_track', analyze_tracks, load_analyzer),
+        Scenario('diff_compare', lambda: state['diff'].compare(), load_diff(False)),
+        Scenario('diff_compare_deep', lambda: state['diff'].compare(), load_diff(True)),
+        Scenario('change_report', lambda: generate_change_report(old_file, new_file)),
+        Scenario('timeline', lambda: generate_html_timeline(str(project), timeline_file), clear_history),
+        Scenario('timeline_incremental',
+                 lambda: generate_html_timeline(str(project), timeline_file, incremental=True),
+                 warm_timeline),
+    ]
+
+
+def measure(scenario: Scenario, repeat: int, memory: bool) -> Dict:
+    """Wall time of each repetition, plus peak traced memory from one extra run."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if scenario.setup:
+                scenario.setup()
+            start = time.perf_counter()
+            scenario.run()
+            times.append(time.perf_counter() - start)
+
+    result = {
+        'name': scenario.name,
+        'seconds': [round(t, 6) for t in times],
+        'min': round(min(times), 6),
+        'median': round(statistics.median(times), 6),
+    }
+
+    if memory:
+        # Traced separately: tracemalloc slows allocation-heavy code several times over
+        gc.collect()
+        with contextlib.redirect_stdout(io.StringIO()):
+            if scenario.setup:
+                scenario.setup()
+            tracemalloc.start()
+            scenario.run()
+        result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def prepare_project(workdir: Path, spec: SessionSpec, versions: int) -> List[Path]:
+    """Generate the project, reusing one already generated from the same spec."""
+    project = workdir / 'project'
+    spec_path = workdir / 'spec.json'
+    wanted = {'spec': asdict(spec), 'versions': versions}
+    if spec_path.exists() and json.loads(spec_path.read_text()) == wanted:
+        return sorted(project.glob('*.als'), key=lambda p: os.path.getmtime(p))
+
+    shutil.rmtree(project, ignore_errors=True)
+    paths = generate_project(project, versions, spec)
+    spec_path.write_text(json.dumps(wanted))
+    return paths
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(baseline: Dict, current: Dict):
+    """Median time and peak memory of each scenario relative to a baseline run."""
+    before = {r['name']: r for r in baseline['results']}
+    print(f"{'scenario':24} {'before':>10} {'after':>10} {'ratio':>7} {'peak ratio':>11}")
+    print("-" * 66)
+    for result in current['results']:
+        old = before.get(result['name'])
+        if old is None:
+            print(f"{result['name']:24} {'-':>10} {result['median']:>10.4f}")
+            continue
+        ratio = result['median'] / old['median'] if old['median'] else float('inf')
+        peak = ''
+        if result.get('peak_bytes') and old.get('peak_bytes'):
+            peak = f"{result['peak_bytes'] / old['peak_bytes']:.2f}x"
+        print(f"{result['name']:24} {old['median']:>10.4f} {result['median']:>10.4f} "
+              f"{ratio:>6.2f}x {peak:>11}")
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the Ableton analysis scripts')
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='Preset (default: small)')
+    parser.add_argument('--midi-tracks', type=int, help='MIDI tracks in the first version')
+    parser.add_argument('--audio-tracks', type=int, help='Audio tracks')
+    parser.add_argument('--clips', type=int, help='Session and arrangement clips per track')
+    parser.add_argument('--notes', type=int, help='MIDI notes per clip')
+    parser.add_argument('--points', type=int, help='Automation points per lane')
+    parser.add_argument('--versions', type=int, help='Versions in the project (at least 2)')
+    parser.add_argument('--seed', type=int, help='Generator seed')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Timed runs per scenario (default: 3)')
+    parser.add_argument('--only', help='Comma-separated scenario names')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc run')
+    parser.add_argument('--workdir', help='Keep generated files here and reuse them across runs')
+    parser.add_argument('-o', '--output', help='Write results as JSON (default: stdout)')
+    parser.add_argument('--compare', help='Print ratios against a previous results file')
+
+    args = parser.parse_args()
+
+    spec, versions = SIZES[args.size]
+    overrides = {
+        'midi_tracks': args.midi_tracks,
+        'audio_tracks': args.audio_tracks,
+        'session_clips': args.clips,
+        'arrangement_clips': args.clips,
+        'notes_per_clip': args.notes,
+        'points_per_lane': args.points,
+        'seed': args.seed,
+    }
+    spec = replace(spec, **{k: v for k, v in overrides.items() if v is not None})
+    versions = max(args.versions or versions, 2)
+
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix='ableton-bench-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        print(f"Generating {versions} versions in {workdir}...", file=sys.stderr)
+        paths = prepare_project(workdir, spec, versions)
+        als_bytes = sum(p.stat().st_size for p in paths)
+
+        scenarios = build_scenarios(workdir / 'project', paths)
+        if args.only:
+            wanted = set(args.only.split(','))
+            scenarios = [s for s in scenarios if s.name in wanted]
+
+        results = []
+        for scenario in scenarios:
+            print(f"  {scenario.name}...", file=sys.stderr)
+            results.append(measure(scenario, args.repeat, not args.no_memory))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'xml_cache': os.environ.get('ABLETON_XML_CACHE', ''),
+            'size': args.size,
+            'spec': asdict(spec),
+            'versions': versions,
+            'als_bytes': als_bytes,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    elif not args.compare:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            print_comparison(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
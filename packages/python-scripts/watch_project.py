@@ -4,30 +4,101 @@ Ableton Project Watcher
 Monitors an Ableton project folder for new versions and automatically generates reports.
 """
 
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
 import time
 import sys
 from pathlib import Path
 from datetime import datetime
-from ableton_version_manager import ProjectVersionManager, generate_change_report
-from ableton_visualizer import generate_html_timeline
+from typing import Dict, List, Optional, Tuple
+from ableton_version_manager import ProjectVersionManager, format_change_report
+from ableton_visualizer import IncrementalTimeline
+from ableton_profile import PROFILER, add_profile_arguments, start_profiling
+
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+
+# struct inotify_event header: wd, mask, cookie, len (name follows)
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatch:
+    """Minimal inotify binding that reports files closed or renamed into one directory."""
+
+    def __init__(self, directory: Path, mask: int = IN_CLOSE_WRITE | IN_MOVED_TO):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed: {os.strerror(errno)}")
+
+        self.overflowed = False
+
+    def read(self, timeout: Optional[float]) -> List[str]:
+        """Wait up to ``timeout`` seconds (None = forever) and return changed file names."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset + _INOTIFY_EVENT.size <= len(data):
+            _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+            elif name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
 
 
 class ProjectWatcher:
     """Watches an Ableton project folder for changes."""
 
-    def __init__(self, project_path: str, check_interval: int = 10):
+    def __init__(self, project_path: str, check_interval: int = 10,
+                 mode: str = 'auto', debounce: float = 0.5, profile_log: Optional[str] = None):
         self.project_path = Path(project_path)
         self.check_interval = check_interval
+        self.mode = mode
+        self.debounce = debounce
+        # With profiling on, each cycle that processes versions appends a record here
+        self.profile_log = profile_log
         self.manager = ProjectVersionManager(str(project_path))
-        self.last_version_count = len(self.manager.versions)
+        self.last_version_count = self.manager.version_count
+        self.timeline = IncrementalTimeline(self.manager)
 
         # Create reports directory
         self.reports_dir = self.project_path / "_history" / "reports"
         self.reports_dir.mkdir(parents=True, exist_ok=True)
 
-    def check_for_new_versions(self):
-        """Check for new versions and process them."""
-        new_versions = self.manager.register_new_versions()
+    def check_for_new_versions(self, candidates: Optional[List[Path]] = None):
+        """Check for new versions (optionally only among ``candidates``) and process them."""
+        PROFILER.reset()
+        # Metrics rows use the timeline's cache, so nothing is parsed twice
+        new_versions = self.manager.register_new_versions(candidates, cache=self.timeline.cache)
 
         if new_versions:
             print(f"\n{'='*80}")
@@ -43,17 +114,21 @@ class ProjectWatcher:
                             print(f"  {key}: {val}")
 
             # Generate comparison report with previous version
-            versions = self.manager.get_sorted_versions()
+            versions = self.manager.get_latest_versions(2)
             if len(versions) >= 2:
-                old_version = versions[-2]
-                new_version = versions[-1]
+                old_version, new_version = versions
 
                 print(f"\n  Comparing {old_version.version} -> {new_version.version}...")
 
                 report_file = self.reports_dir / f"changes_{old_version.version}_to_{new_version.version}.txt"
-                report = generate_change_report(
+                # Summaries go through the timeline's cache, so the timeline
+                # update below does not parse either version again
+                cache = self.timeline.cache
+                report = format_change_report(
                     old_version.filepath,
                     new_version.filepath,
+                    self.manager.summary(old_version, cache),
+                    self.manager.summary(new_version, cache),
                     str(report_file)
                 )
 
@@ -67,27 +142,98 @@ class ProjectWatcher:
             # Update HTML timeline
             print("\n  Updating timeline visualization...")
             timeline_file = self.project_path / "_history" / "timeline.html"
-            generate_html_timeline(str(self.project_path), str(timeline_file))
+            self.timeline.render(str(timeline_file))
             print(f"  Timeline updated: {timeline_file}")
 
             print(f"\n{'='*80}\n")
 
-            self.last_version_count = len(versions)
+            if self.profile_log is not None and PROFILER.enabled:
+                PROFILER.emit(self.profile_log, script='watch_project.py',
+                              timestamp=datetime.now().isoformat(),
+                              versions=[v.version for v in new_versions])
+
+            self.last_version_count = self.manager.version_count
             return True
 
         return False
 
+    def _open_inotify(self) -> Optional[InotifyWatch]:
+        """Open an inotify watch unless polling was requested or it is unavailable."""
+        if self.mode == 'poll':
+            return None
+        try:
+            return InotifyWatch(self.project_path)
+        except (OSError, AttributeError) as e:
+            if self.mode == 'inotify':
+                raise
+            print(f"inotify unavailable ({e}); falling back to polling")
+            return None
+
+    def _poll_loop(self):
+        while True:
+            self.check_for_new_versions()
+            time.sleep(self.check_interval)
+
+    def _inotify_loop(self, watch: InotifyWatch):
+        """React to .als writes once each file has been quiet for ``debounce`` seconds.
+
+        Live writes a set in several steps, so an event only arms a timer;
+        the file is handed to the version manager once its size and mtime
+        are unchanged since the last event.
+        """
+        pending: Dict[str, Tuple[float, Tuple[int, int]]] = {}
+
+        while True:
+            now = time.monotonic()
+            timeout = max(0.0, min(d for d, _ in pending.values()) - now) if pending else None
+
+            for name in watch.read(timeout):
+                if not name.endswith('.als'):
+                    continue
+                signature = _stat_signature(self.project_path / name)
+                if signature is not None:
+                    pending[name] = (time.monotonic() + self.debounce, signature)
+
+            if watch.overflowed:
+                # Events were dropped; fall back to one full scan
+                watch.overflowed = False
+                pending.clear()
+                self.check_for_new_versions()
+                continue
+
+            now = time.monotonic()
+            stable = []
+            for name, (deadline, signature) in list(pending.items()):
+                if deadline > now:
+                    continue
+                current = _stat_signature(self.project_path / name)
+                if current is None:
+                    del pending[name]
+                elif current == signature:
+                    del pending[name]
+                    stable.append(self.project_path / name)
+                else:
+                    pending[name] = (now + self.debounce, current)
+
+            if stable:
+                self.check_for_new_versions(stable)
+
     def run(self):
         """Start watching the project folder."""
+        watch = self._open_inotify()
+
         print(f"{'='*80}")
         print(f"Watching Ableton Project: {self.project_path.name}")
         print(f"{'='*80}")
-        print(f"Check interval: {self.check_interval} seconds")
+        if watch is not None:
+            print(f"Mode: inotify (debounce {self.debounce} seconds)")
+        else:
+            print(f"Check interval: {self.check_interval} seconds")
         print(f"Reports directory: {self.reports_dir}")
         print(f"Press Ctrl+C to stop\n")
 
         # Initial scan
-        self.manager.register_new_versions()
+        self.manager.register_new_versions(cache=self.timeline.cache)
         versions = self.manager.get_sorted_versions()
         print(f"Current versions: {len(versions)}")
         for v in versions:
@@ -96,12 +242,25 @@ class ProjectWatcher:
         print(f"\nWatching for changes...\n")
 
         try:
-            while True:
-                self.check_for_new_versions()
-                time.sleep(self.check_interval)
+            if watch is not None:
+                self._inotify_loop(watch)
+            else:
+                self._poll_loop()
         except KeyboardInterrupt:
             print("\n\nStopping watcher...")
             print("Goodbye!")
+        finally:
+            if watch is not None:
+                watch.close()
+
+
+def _stat_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """(size, mtime_ns) of a file, or None if it has gone away."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
 
 
 def main():
@@ -121,6 +280,9 @@ Examples:
 
   # Check once and exit (no watching)
   %(prog)s "/path/to/project" --once
+
+  # Force the sleep-poll loop (e.g. on network shares)
+  %(prog)s "/path/to/project" --mode poll
         """
     )
 
@@ -132,15 +294,30 @@ Examples:
         '-i', '--interval',
         type=int,
         default=10,
-        help='Check interval in seconds (default: 10)'
+        help='Check interval in seconds when polling (default: 10)'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=['auto', 'inotify', 'poll'],
+        default='auto',
+        help='inotify events on Linux with polling as fallback (default: auto)'
+    )
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=0.5,
+        help='Seconds a saved file must stay unchanged before it is analyzed (default: 0.5)'
     )
     parser.add_argument(
         '--once',
         action='store_true',
         help='Check once and exit (do not watch continuously)'
     )
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    # The watcher logs one record per processed save instead of one at exit
+    start_profiling(args, emit_at_exit=False)
 
     # Validate project path
     project_path = Path(args.project_path)
@@ -152,7 +329,8 @@ Examples:
         print(f"Error: Project path is not a directory: {project_path}")
         sys.exit(1)
 
-    watcher = ProjectWatcher(str(project_path), args.interval)
+    watcher = ProjectWatcher(str(project_path), args.interval, args.mode, args.debounce,
+                             args.profile)
 
     if args.once:
         # Just check once